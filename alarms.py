@@ -0,0 +1,130 @@
+# таблица предупреждений по V, T и p: пороги из params собираются один раз при создании модели,
+# уровень каждой переменной считается одним проходом по строке таблицы с гистерезисом,
+# события (возникновение и снятие предупреждений) появляются только при смене уровня
+#
+# уровни: -2 / 2 - за пределом (использование реактора невозможно), -1 / 1 - предупреждение,
+# 0 - норма; уровень снижается, только когда значение отошло от порога дальше полосы гистерезиса
+# (повышается сразу), поэтому значение у порога не даёт дребезга предупреждений
+# (numpy загружается только для AlarmArrays: модель одного реактора импортируется при запуске окна)
+
+
+# переменная -> (группа params, пороги: нижний предел, нижнее предупреждение, верхнее, верхний предел)
+ALARM_LIMITS = {
+    'V': ('V', ('reacror_limit_min', 'reacror_warning_min', 'reacror_warning_max', 'reacror_limit_max')),
+    'T': ('T', ('limit_min', 'warning_min', 'warning_max', 'limit_max')),
+    'p': ('p', ('limit_min', 'warning_min', 'warning_max', 'limit_max')),
+}
+# полоса гистерезиса по умолчанию (V - % заполнения, T - °C, p - атм);
+# задаётся в params['alarms'][<переменная>]['hysteresis']
+HYSTERESIS = {'V': 0.5, 'T': 0.5, 'p': 0.02}
+# начальные уровни (пустой реактор - уровень ниже предела)
+INITIAL_LEVELS = {'V': -2, 'T': 0, 'p': 0}
+# уровень -> прежний индекс ind_V (-1 - предел, 0 - предупреждение, 1 - норма)
+IND_V = (-1, 0, 1, 0, -1)
+
+
+def hysteresis(params, name):
+    return params.get('alarms', {}).get(name, {}).get('hysteresis', HYSTERESIS[name])
+
+
+# строка таблицы: (нижний предел, нижнее предупреждение, верхнее предупреждение, верхний предел, полоса);
+# для ReactorEnsemble группы params - массивы, и строка состоит из массивов
+def alarm_row(params, name, band=None):
+    group, keys = ALARM_LIMITS[name]
+    return tuple(params[group][key] for key in keys) + (hysteresis(params, name) if band is None else band,)
+
+
+def _level(x, limit_min, warning_min, warning_max, limit_max):
+    if x < limit_min:
+        return -2
+    if x < warning_min:
+        return -1
+    if x > limit_max:
+        return 2
+    if x > warning_max:
+        return 1
+    return 0
+
+
+class AlarmTable:
+    def __init__(self, params):
+        self.rows = {name: alarm_row(params, name) for name in ALARM_LIMITS}
+        self.levels = dict(INITIAL_LEVELS)
+        # (переменная, прежний уровень, новый уровень) с прошлого вызова journal.record_alarms;
+        # предупреждения, действующие с начала работы, попадают в журнал первым вызовом
+        self.events = [(name, 0, level) for name, level in self.levels.items() if level]
+
+    # новый уровень переменной по значению x; block - регулятор заблокирован на пределе
+    # (уровень - предел с той стороны, у которой находится значение)
+    def update(self, name, x, block=False):
+        old = self.levels[name]
+        limit_min, warning_min, warning_max, limit_max, band = self.rows[name]
+        if block:
+            new = -2 if x < (limit_min + limit_max) / 2 else 2
+        else:
+            new = _level(x, limit_min, warning_min, warning_max, limit_max)
+            if abs(new) < abs(old):
+                held = _level(x, limit_min + band, warning_min + band, warning_max - band, limit_max - band)
+                new = held if abs(held) < abs(old) else old
+        if new != old:
+            self.levels[name] = new
+            self.events.append((name, old, new))
+        return new
+
+
+# та же таблица для N реакторов: пороги, значения и уровни - массивы формы (N,)
+# (пороги с учётом полосы и середины пределов считаются один раз, промежуточные маски - в рабочих массивах)
+class AlarmArrays:
+    def __init__(self, params, bands, n):
+        import numpy as np
+        self.rows = {name: alarm_row(params, name, bands[name]) for name in ALARM_LIMITS}
+        # пороги снятия предупреждения (отступ на полосу гистерезиса) и середина между пределами
+        self.held_rows = {name: (limit_min + band, warning_min + band, warning_max - band, limit_max - band)
+                          for name, (limit_min, warning_min, warning_max, limit_max, band) in self.rows.items()}
+        self.middles = {name: (row[0] + row[3]) / 2 for name, row in self.rows.items()}
+        self.levels = {name: np.full(n, level, dtype=np.int8) for name, level in INITIAL_LEVELS.items()}
+        # маска реакторов, у которых уровень изменился на последнем шаге, и прежние уровни
+        self.changed = {name: np.zeros(n, dtype=bool) for name in ALARM_LIMITS}
+        self.previous = {name: levels.copy() for name, levels in self.levels.items()}
+        self.ind_V = np.array(IND_V, dtype=np.int8)
+        self._held = np.empty(n, dtype=np.int8)
+        self._abs_new = np.empty(n, dtype=np.int8)
+        self._abs_old = np.empty(n, dtype=np.int8)
+        self._lower = np.empty(n, dtype=bool)
+        self._mask = np.empty(n, dtype=bool)
+
+    # уровни в out: условия записываются от слабого к сильному (последняя запись - как первая ветвь _level)
+    def _level(self, x, limit_min, warning_min, warning_max, limit_max, out):
+        import numpy as np
+        mask = self._mask
+        out.fill(0)
+        for compare, threshold, level in ((np.greater, warning_max, 1), (np.greater, limit_max, 2),
+                                          (np.less, warning_min, -1), (np.less, limit_min, -2)):
+            compare(x, threshold, out=mask)
+            np.copyto(out, level, where=mask)
+        return out
+
+    def update(self, name, x, block=None):
+        import numpy as np
+        old = self.levels[name]
+        limit_min, warning_min, warning_max, limit_max, _ = self.rows[name]
+        new = self._level(x, limit_min, warning_min, warning_max, limit_max, np.empty_like(old))
+        np.abs(new, out=self._abs_new)
+        np.abs(old, out=self._abs_old)
+        lower = np.less(self._abs_new, self._abs_old, out=self._lower)
+        if lower.any():
+            held = self._level(x, *self.held_rows[name], self._held)
+            np.copyto(new, old, where=lower)
+            np.abs(held, out=self._abs_new)
+            np.less(self._abs_new, self._abs_old, out=self._mask)
+            lower &= self._mask
+            np.copyto(new, held, where=lower)
+        if block is not None and block.any():
+            np.copyto(new, 2, where=block)
+            below = np.less(x, self.middles[name], out=self._mask)
+            below &= block
+            np.copyto(new, -2, where=below)
+        self.previous[name] = old
+        np.not_equal(new, old, out=self.changed[name])
+        self.levels[name] = new
+        return new
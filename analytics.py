@@ -0,0 +1,223 @@
+# показатели качества регулирования Т и p после прогона: по записанной траектории (телеметрия,
+# telemetry.RECORD: значение, уставка, выход регулятора и включён ли контур) для каждого скачка уставки -
+# время нарастания, время установления, перерегулирование, установившаяся ошибка,
+# IAE / ISE / ITAE и затраты на управление
+#
+# расчёт векторный: траектории всех прогонов склеиваются в плоские массивы с номером прогона,
+# участки (от скачка уставки до следующего) выделяются масками, показатели участков считаются
+# через ufunc.reduceat - без циклов Python по отсчётам, участкам и прогонам
+#
+# участок начинается при включении контура или смене уставки во время работы контура;
+# отсчёты при выключенном контуре не учитываются
+# (смещение уставки на 1e-7 при блокировке на пределе - не скачок, см. MIN_STEP)
+#
+# python analytics.py Reports/Exp_1.tlm Reports/Exp_2.tlm  - Reports/<exp>_control.xlsx для каждого прогона
+# python analytics.py Reports/*.tlm --summary all.csv       - и общая таблица всех прогонов
+import argparse
+import os
+import sys
+
+import numpy as np
+
+from pid_tuning import SETTLING_BAND, SETTLING_ATOL
+from telemetry import TelemetryReader, CONTROL_BITS
+
+
+# контур -> (поле значения, поле уставки, поле выхода регулятора, орган управления)
+LOOPS = {
+    'T': ('T', 'T_id', 'output_T', 'T_control'),
+    'p': ('p', 'p_id', 'output_p', 'p_control'),
+}
+# изменение уставки меньше этого - не скачок
+MIN_STEP = 1e-6
+# уровни для времени нарастания, доля скачка
+RISE_LOW, RISE_HIGH = 0.1, 0.9
+# столбцы таблицы показателей и их заголовки в отчёте
+SUMMARY_COLUMNS = {
+    'run': 'Прогон',
+    'loop': 'Контур',
+    'start': 'Начало, с',
+    'duration': 'Длительность, с',
+    'initial': 'Начальное значение',
+    'set_point': 'Уставка',
+    'step': 'Скачок',
+    'rise': 'Время нарастания, с',
+    'settling': 'Время установления, с',
+    'overshoot': 'Перерегулирование, %',
+    'final_error': 'Установившаяся ошибка',
+    'iae': 'IAE',
+    'ise': 'ISE',
+    'itae': 'ITAE',
+    'effort': 'Затраты на управление (интеграл |u|)',
+    'output_variation': 'Изменение выхода (сумма |du|)',
+}
+SUMMARY_SUFFIX = '_control.xlsx'
+
+
+# первая / последняя позиция участка, где mask истинна (-1 - нет такой позиции)
+def _first(mask, starts, size):
+    positions = np.where(mask, np.arange(len(mask)), size)
+    first = np.minimum.reduceat(positions, starts)
+    return np.where(first < size, first, -1)
+
+
+def _last(mask, starts):
+    return np.maximum.reduceat(np.where(mask, np.arange(len(mask)), -1), starts)
+
+
+# показатели по участкам; массивы - отсчёты всех прогонов подряд, run - номер прогона каждого отсчёта
+# (None - один прогон), active - включён ли контур (None - всё время);
+# возвращает словарь столбцов (массивы по участкам, ключи - SUMMARY_COLUMNS без 'loop')
+def step_metrics(time, value, set_point, output, active=None, run=None,
+                 band=SETTLING_BAND, atol=SETTLING_ATOL, min_step=MIN_STEP):
+    time = np.asarray(time, dtype=float)
+    value = np.asarray(value, dtype=float)
+    set_point = np.asarray(set_point, dtype=float)
+    output = np.asarray(output, dtype=float)
+    n = len(time)
+    run = np.zeros(n, dtype=np.int64) if run is None else np.asarray(run)
+    active = np.ones(n, dtype=bool) if active is None else np.asarray(active, dtype=bool)
+
+    # длительность шага каждого отсчёта; после паузы в работе контура (и пропуска времени без изменений
+    # в сценарии с --fast-idle) - длительность следующего шага
+    same_run = np.zeros(n, dtype=bool)
+    same_run[1:] = run[1:] == run[:-1]
+    dt = np.zeros(n)
+    dt[1:] = np.diff(time)
+    continued = same_run.copy()
+    continued[1:] &= active[:-1]
+    next_dt = np.zeros(n)
+    next_dt[:-1] = np.where(same_run[1:], dt[1:], 0.0)
+    dt = np.where(continued, dt, next_dt)
+    changed = np.zeros(n, dtype=bool)
+    changed[1:] = np.abs(np.diff(set_point)) > min_step
+    begins = active & (~continued | changed)
+
+    # только отсчёты при включённом контуре
+    index = np.flatnonzero(active)
+    empty = np.empty(0)
+    if len(index) == 0:
+        return {name: empty for name in tuple(SUMMARY_COLUMNS) + ('samples',) if name != 'loop'}
+    t, x, r, u, dt = time[index], value[index], set_point[index], output[index], dt[index]
+    m = len(index)
+    starts = np.flatnonzero(begins[index])
+    ends = np.append(starts[1:], m) - 1
+    segment = np.cumsum(begins[index]) - 1
+    lengths = ends - starts + 1
+
+    # начало участка - момент перед первым шагом с новой уставкой, начальное значение - значение в этот момент
+    t0 = t[starts] - dt[starts]
+    before = index[starts] - 1
+    has_before = (before >= 0) & same_run[index[starts]]
+    x0 = np.where(has_before, value[np.maximum(before, 0)], x[starts])
+    target = r[starts]
+    step = target - x0
+    is_step = np.abs(step) > min_step
+
+    e = r - x
+    abs_e = np.abs(e)
+    # ход к уставке в долях скачка (0 - начальное значение, 1 - уставка)
+    progress = (x - x0[segment]) / np.where(is_step, step, 1.0)[segment]
+    i_low = _first(progress >= RISE_LOW, starts, m)
+    i_high = _first(progress >= RISE_HIGH, starts, m)
+    rise = np.where(is_step & (i_low >= 0) & (i_high >= 0), t[i_high] - t[np.maximum(i_low, 0)], np.nan)
+    overshoot = np.maximum(np.maximum.reduceat(progress, starts) - 1, 0.0) * 100
+    overshoot = np.where(is_step, overshoot, np.nan)
+
+    # установление - как в pid_tuning.performance: полоса max(band * |скачок|, atol), время - до отсчёта
+    # после последнего выхода из полосы; 0 - не выходил из полосы, inf - к концу участка не установился
+    tolerance = np.maximum(band * np.abs(step), atol)
+    last_out = _last(abs_e > tolerance[segment], starts)
+    settled_at = np.minimum(last_out + 1, m - 1)
+    settling = np.where(last_out == ends, np.inf, np.where(last_out < 0, 0.0, t[settled_at] - t0))
+
+    since = t - t0[segment]
+    du = np.abs(np.diff(u, prepend=u[0]))
+    du[starts] = 0.0
+    return {
+        'run': run[index[starts]],
+        'start': t0,
+        'duration': t[ends] - t0,
+        'initial': x0,
+        'set_point': target,
+        'step': step,
+        'rise': rise,
+        'settling': settling,
+        'overshoot': overshoot,
+        'final_error': e[ends],
+        'iae': np.add.reduceat(abs_e * dt, starts),
+        'ise': np.add.reduceat(e * e * dt, starts),
+        'itae': np.add.reduceat(since * abs_e * dt, starts),
+        'effort': np.add.reduceat(np.abs(u) * dt, starts),
+        'output_variation': np.add.reduceat(du, starts),
+        'samples': lengths,
+    }
+
+
+# записи телеметрии нескольких прогонов -> плоские массивы полей контура и номер прогона
+def loop_arrays(records_list, loop):
+    value, set_point, output, control = LOOPS[loop]
+    records = np.concatenate(records_list) if len(records_list) != 1 else records_list[0]
+    run = np.repeat(np.arange(len(records_list)), [len(records) for records in records_list])
+    active = (records['controls'] & CONTROL_BITS[control]) != 0
+    return records['time'], records[value], records[set_point], records[output], active, run
+
+
+# таблица показателей (pandas) по записям телеметрии прогонов; names - имена прогонов
+def control_summary(records_list, names=None, loops=tuple(LOOPS), **options):
+    import pandas as pd
+    names = np.asarray(names if names is not None else range(len(records_list)), dtype=object)
+    tables = []
+    for loop in loops:
+        time, value, set_point, output, active, run = loop_arrays(records_list, loop)
+        columns = step_metrics(time, value, set_point, output, active, run, **options)
+        columns.pop('samples')
+        table = pd.DataFrame(columns)
+        table.insert(1, 'loop', loop)
+        table['run'] = names[table['run'].to_numpy(dtype=np.int64)]
+        tables.append(table)
+    table = pd.concat(tables, ignore_index=True)
+    return table.sort_values(['run', 'start', 'loop'], kind='stable', ignore_index=True)
+
+
+# таблица с заголовками отчёта
+def report_table(table):
+    return table[list(SUMMARY_COLUMNS)].rename(columns=SUMMARY_COLUMNS)
+
+
+def summary_path(telemetry_path):
+    return os.path.splitext(telemetry_path)[0] + SUMMARY_SUFFIX
+
+
+# Reports/<exp>_control.xlsx для каждого файла телеметрии (рядом с Reports/<exp>.xlsx);
+# все прогоны считаются одним вызовом; возвращает общую таблицу
+def export_control_summary(telemetry_paths, xlsx_paths=None):
+    readers = [TelemetryReader(path) for path in telemetry_paths]
+    names = [os.path.splitext(os.path.basename(path))[0] for path in telemetry_paths]
+    table = control_summary([reader.records for reader in readers])
+    if xlsx_paths is None:
+        xlsx_paths = [summary_path(path) for path in telemetry_paths]
+    runs = table['run'].to_numpy()
+    for i, (name, path) in enumerate(zip(names, xlsx_paths)):
+        report_table(table[runs == i].assign(run=name)).to_excel(path, index=False)
+    table['run'] = np.asarray(names, dtype=object)[runs.astype(np.int64)]
+    return table
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Показатели качества регулирования Т и p по телеметрии')
+    parser.add_argument('telemetry', nargs='+', help='файлы телеметрии Reports/<exp>.tlm')
+    parser.add_argument('--summary', help='общая таблица всех прогонов (.csv или .xlsx)')
+    args = parser.parse_args(argv)
+
+    table = export_control_summary(args.telemetry)
+    if args.summary:
+        if args.summary.endswith('.xlsx'):
+            report_table(table).to_excel(args.summary, index=False)
+        else:
+            table.to_csv(args.summary, index=False)
+    print(f"прогонов: {len(args.telemetry)}, скачков уставки: {len(table)}")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
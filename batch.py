@@ -0,0 +1,208 @@
+# пакетный прогон экспериментов без окна: каталог файлов параметров, для каждого - сценарий,
+# эксперименты выполняются в пуле процессов, отчёты - в Reports/<exp>.* как из окна модели
+#
+# python batch.py experiments/                          - сценарий каждого X.json берётся из X.scenario.json
+# python batch.py experiments/ --scenario default.json  - сценарий для файлов без собственного
+# python batch.py experiments/ --workers 4 --no-telemetry
+# python batch.py variants/ --checkpoint прогрев.ckpt  - варианты «что если» из одного сохранённого состояния
+#                                                       (время сценариев - от контрольной точки)
+#
+# сводка по всем экспериментам - Reports/batch_summary.csv (--summary)
+import argparse
+import csv
+import glob
+import json
+import os
+import sys
+import time
+import traceback
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from concurrent.futures.process import BrokenProcessPool
+
+from integrators import INTEGRATORS
+from reactor_model import TICK
+from report_sink import report_path, unique_exp_names
+
+
+SCENARIO_SUFFIX = '.scenario.json'
+SUMMARY_COLUMNS = ('exp', 'params', 'scenario', 'status', 'error', 'model_time', 'wall_time',
+                   'V', 'T', 'p', 'c_product', 'conversion', 'actions', 'report', 'traceback')
+
+
+# эксперименты каталога: (путь к параметрам, путь к сценарию или None)
+def find_experiments(paths, default_scenario=None):
+    experiments = []
+    for path in paths:
+        files = sorted(glob.glob(os.path.join(path, '*.json'))) if os.path.isdir(path) else [path]
+        for params_path in files:
+            if params_path.endswith(SCENARIO_SUFFIX):
+                continue
+            scenario_path = params_path[:-len('.json')] + SCENARIO_SUFFIX
+            if not os.path.exists(scenario_path):
+                scenario_path = default_scenario
+            experiments.append((params_path, scenario_path))
+    return experiments
+
+
+# один эксперимент (выполняется в процессе пула); ошибки возвращаются в строке сводки
+def run_experiment(params, params_path, scenario_path, options):
+    from scenario import run_scenario, load_scenario
+    row = {'exp': params['name']['exp'], 'params': params_path, 'scenario': scenario_path}
+    started = time.perf_counter()
+    try:
+        if scenario_path is None:
+            raise FileNotFoundError(f"нет сценария: {params_path[:-len('.json')] + SCENARIO_SUFFIX}")
+        runner = run_scenario(params, load_scenario(scenario_path), **options)
+        s = runner.model.state
+        row.update(status='ok', error='', model_time=round(s.time, 3), V=s.V, T=s.T, p=s.p,
+                   c_product=s.c_product, conversion=s.conversion, actions=len(runner.journal),
+                   report=report_path(params) if options.get('report', True) else '')
+    except Exception as error:
+        row.update(status='failed', error=f'{type(error).__name__}: {error}',
+                   traceback=traceback.format_exc())
+    row['wall_time'] = round(time.perf_counter() - started, 3)
+    return row
+
+
+class BatchRunner:
+    def __init__(self, experiments, workers=None, options=None, progress=sys.stderr):
+        self.workers = workers or os.cpu_count()
+        self.options = options or {}
+        self.progress = progress
+        self.tasks = []
+        self.rows = []
+        self.errors = []  # строки сводки для файлов, которые не удалось прочитать
+        # файлы параметров читаются заранее: ошибка чтения - отдельная строка сводки, а имена
+        # экспериментов делаются уникальными по всему прогону
+        params_list = []
+        for params_path, scenario_path in experiments:
+            try:
+                with open(params_path, encoding='utf-8') as file:
+                    params = json.load(file)
+                params['name']['exp']
+            except Exception as error:
+                self.errors.append({'exp': os.path.basename(params_path), 'params': params_path,
+                                    'scenario': scenario_path, 'status': 'failed',
+                                    'error': f'{type(error).__name__}: {error}'})
+                continue
+            params_list.append(params)
+            self.tasks.append((params, params_path, scenario_path))
+        unique_exp_names(params_list)
+        self.total = len(experiments)
+        self.started = None
+
+    def report(self, row):
+        self.rows.append(row)
+        if self.progress is None:
+            return
+        done = len(self.rows)
+        elapsed = time.perf_counter() - self.started
+        eta = elapsed / done * (self.total - done)
+        status = 'ok' if row['status'] == 'ok' else 'ОШИБКА ' + row['error']
+        print(f"[{done}/{self.total}] {row['exp']}: {status} ({row.get('wall_time', 0):.2f} с, "
+              f"осталось ~{eta:.0f} с)", file=self.progress, flush=True)
+
+    def run(self):
+        self.started = time.perf_counter()
+        for row in self.errors:
+            self.report(row)
+        pending = deque(self.tasks)
+        while pending:
+            # эксперименты, выполнявшиеся при аварийном завершении процесса пула, повторяются
+            # по одному в отдельном процессе: так отказ получает только сам виновник
+            for task in self._run_pool(pending):
+                self._run_isolated(task)
+        return self.rows
+
+    # прогон в пуле; в работе не больше экспериментов, чем процессов, чтобы при аварийном
+    # завершении процесса (пул сломан) было известно, какие эксперименты под подозрением
+    def _run_pool(self, pending):
+        with ProcessPoolExecutor(min(self.workers, len(pending))) as pool:
+            running = {}
+            while pending or running:
+                try:
+                    while pending and len(running) < self.workers:
+                        running[pool.submit(run_experiment, *pending[0], self.options)] = pending[0]
+                        pending.popleft()
+                except BrokenProcessPool:
+                    # пул сломался, пока обрабатывались результаты: эксперимент остаётся в очереди,
+                    # виновник - среди выполняющихся (их futures завершатся с BrokenProcessPool)
+                    if not running:
+                        return []
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                broken = []
+                for future in done:
+                    task = running.pop(future)
+                    try:
+                        row = future.result()
+                    except BrokenProcessPool:
+                        broken.append(task)
+                        continue
+                    self.report(row)
+                if broken:
+                    # эксперименты, успевшие завершиться до поломки пула, засчитываются и не повторяются;
+                    # под подозрением - только незавершённые
+                    for future in [future for future in running if future.done()]:
+                        if future.exception() is None:
+                            self.report(future.result())
+                            del running[future]
+                    return broken + list(running.values())
+        return []
+
+    def _run_isolated(self, task):
+        with ProcessPoolExecutor(1) as pool:
+            try:
+                row = pool.submit(run_experiment, *task, self.options).result()
+            except BrokenProcessPool:
+                row = {'exp': task[0]['name']['exp'], 'params': task[1], 'scenario': task[2],
+                       'status': 'failed', 'error': 'процесс завершился аварийно'}
+        self.report(row)
+
+
+def write_summary(rows, path):
+    with open(path, 'w', newline='', encoding='utf-8') as file:
+        writer = csv.DictWriter(file, SUMMARY_COLUMNS, extrasaction='ignore')
+        writer.writeheader()
+        writer.writerows(sorted(rows, key=lambda row: row['exp']))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Пакетный прогон экспериментов модели реактора')
+    parser.add_argument('paths', nargs='+', help='каталоги с файлами параметров (или сами файлы)')
+    parser.add_argument('--scenario', help='сценарий для файлов без собственного <имя>.scenario.json')
+    parser.add_argument('--workers', type=int, help='число процессов (по умолчанию - все ядра)')
+    parser.add_argument('--dt', type=float, default=TICK, help='шаг модели, с')
+    parser.add_argument('--integrator', choices=list(INTEGRATORS), default='euler', help='интегратор Т и p')
+    parser.add_argument('--no-report', action='store_true', help='не сохранять отчёты')
+    parser.add_argument('--no-telemetry', action='store_true', help='не записывать телеметрию')
+    parser.add_argument('--checkpoint', help='начать каждый эксперимент с контрольной точки (checkpoint.py)')
+    parser.add_argument('--fast-idle', action='store_true',
+                        help='пропускать интервалы без изменений (в телеметрии - разрыв по времени)')
+    parser.add_argument('--summary', help='файл сводки (по умолчанию Reports/batch_summary.csv)')
+    parser.add_argument('-q', '--quiet', action='store_true', help='не выводить ход выполнения')
+    args = parser.parse_args(argv)
+
+    experiments = find_experiments(args.paths, args.scenario)
+    if not experiments:
+        print('нет файлов параметров', file=sys.stderr)
+        return 2
+    options = {'dt': args.dt, 'integrator': args.integrator,
+               'report': not args.no_report, 'telemetry': not args.no_telemetry, 'checkpoint': args.checkpoint,
+               'fast_idle': args.fast_idle}
+    runner = BatchRunner(experiments, args.workers, options, None if args.quiet else sys.stderr)
+    started = time.perf_counter()
+    rows = runner.run()
+    elapsed = time.perf_counter() - started
+
+    summary = args.summary or report_path({'name': {'exp': 'batch_summary'}}, '.csv')
+    write_summary(rows, summary)
+    failed = [row for row in rows if row['status'] != 'ok']
+    print(f"экспериментов: {len(rows)}, ошибок: {len(failed)}, за {elapsed:.1f} с; сводка: {summary}")
+    for row in failed:
+        print(f"  {row['exp']}: {row['error']}", file=sys.stderr)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
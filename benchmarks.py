@@ -0,0 +1,241 @@
+# замеры производительности основных операций (без экрана: Qt offscreen, рендер Agg)
+#
+# python benchmarks.py                       - вывести результаты (JSON)
+# python benchmarks.py -o results.json       - сохранить результаты в файл
+# python benchmarks.py --compare old.json    - сравнить с прошлым прогоном (код возврата 1 при регрессии)
+import os
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+os.environ.setdefault('MPLBACKEND', 'Agg')
+
+import argparse
+import json
+import platform
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+
+# задержки (с) -> сводка в мс: p50, p99, среднее и число операций в секунду
+def summarize(samples):
+    samples = np.asarray(samples)
+    return {
+        'n': int(len(samples)),
+        'p50_ms': float(np.percentile(samples, 50) * 1e3),
+        'p99_ms': float(np.percentile(samples, 99) * 1e3),
+        'mean_ms': float(samples.mean() * 1e3),
+        'per_second': float(len(samples) / samples.sum()) if samples.sum() else None,
+    }
+
+
+# первый вызов не учитывается (импорты, кэши)
+def measure(func, repeat):
+    func()
+    samples = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - t0)
+    return summarize(samples)
+
+
+def default_params():
+    from ui_cache import load_ui_type
+    from wind_params import save_params
+    Form1, Window1 = load_ui_type('param.ui')
+    window = Window1()
+    form = Form1()
+    form.setupUi(window)
+    params = save_params(form)
+    window.deleteLater()
+    return params
+
+
+# пакет потока модели из одного шага (физика, телеметрия, журнал), кадр окна по новому снимку
+# и шаг модели без окна
+def bench_tick(app, params, ticks):
+    import copy
+    import main
+    from journal import EventJournal
+    from reactor_model import ReactorModel, ReactorControls, TICK
+    from sim_worker import SimulationWorker
+    from telemetry import TelemetryRecorder
+
+    results = {}
+    model = ReactorModel(copy.deepcopy(params))
+    controls = ReactorControls(feed_1=True, feed_2=True, T_control=True, p_control=True)
+    results['model_step'] = measure(lambda: model.step(TICK, controls), ticks)
+
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp:
+        # отчёт и телеметрия окна модели пишутся во временную папку
+        os.chdir(tmp)
+        try:
+            # пакет потока модели (без потока: шаги вызываются напрямую)
+            telemetry = TelemetryRecorder(os.path.join(tmp, 'worker.tlm'))
+            worker = SimulationWorker(ReactorModel(copy.deepcopy(params)),
+                                      ReactorControls(feed_1=True, feed_2=True, T_control=True, p_control=True),
+                                      EventJournal(), telemetry)
+            results['worker_batch'] = measure(lambda: worker.step_batch(1, time.time()), ticks)
+            telemetry.close()
+
+            main.params = copy.deepcopy(params)
+            main.open_second_window(app, main.params)
+            main.timer.stop()
+            main.graph_update_timer.stop()
+            form = main.form
+            form.checkBox.setChecked(True)
+            form.checkBox_2.setChecked(True)
+            form.checkBox_4.setChecked(True)
+            form.checkBox_5.setChecked(True)
+            form.checkBox_7.setChecked(True)
+            main.read_controls()
+            # поток модели останавливается (после применения изменений органов управления),
+            # дальше пакеты и снимки делаются в этом потоке, чтобы замер кадра не зависел от потока модели
+            sim_worker = main.sim_worker
+            sim_worker.stop()
+            sim_worker.telemetry = None  # закрыта потоком модели при остановке
+
+            # кадр окна по новому снимку (пакет из одного шага - вне замера)
+            samples = []
+            for _ in range(ticks + 1):
+                sim_worker.step_batch(1, time.time())
+                sim_worker.publish()
+                t0 = time.perf_counter()
+                main.update_current_time()
+                samples.append(time.perf_counter() - t0)
+            results['window_frame'] = summarize(samples[1:])
+
+            # пакет из одного шага, снимок и кадр окна (как прежний такт окна 10 мс)
+            def gui_tick():
+                sim_worker.step_batch(1, time.time())
+                sim_worker.publish()
+                main.update_current_time()
+            results['gui_tick'] = measure(gui_tick, ticks)
+            main.report_sink.close()
+            main.second_window.close()
+        finally:
+            os.chdir(cwd)
+    return results
+
+
+# перерисовка графика в зависимости от длины истории
+def bench_graph(app, lengths, repeat):
+    from PyQt6.QtWidgets import QWidget, QVBoxLayout
+    from graphs import DynamicGraph
+
+    results = {}
+    for blit in (False, True):
+        mode = 'blit' if blit else 'draw'
+        results[mode] = {}
+        for length in lengths:
+            holder = QWidget()
+            holder.resize(600, 300)
+            layout = QVBoxLayout(holder)
+            graph = DynamicGraph(parent=holder, blit=blit)
+            layout.addWidget(graph)
+            holder.show()
+            app.processEvents()
+            for i in range(length):
+                graph.append(i * 0.5, (25 + np.sin(i / 50), 25.0))
+            x = [length * 0.5]
+
+            def refresh():
+                x[0] += 0.5
+                graph.update_figure(x[0], 25 + np.sin(x[0] / 25), 25.0)
+            results[mode][str(length)] = measure(refresh, repeat)
+            holder.close()
+            holder.deleteLater()
+            app.processEvents()
+    return results
+
+
+# экспорт отчёта в зависимости от числа строк
+def bench_export(rows_list, repeat):
+    from journal import EventJournal, CONTROL_ACTIONS
+    from report_sink import ReportSink
+    import main
+
+    results = {'xlsx': {}, 'csv_stream': {}}
+    main_journal = main.journal
+    with tempfile.TemporaryDirectory() as tmp:
+        for rows in rows_list:
+            journal = EventJournal()
+            t = time.time()
+            for i in range(rows):
+                _, action_on, action_off = CONTROL_ACTIONS[i % len(CONTROL_ACTIONS)]
+                journal.append(t + i, action_on if i % 2 else action_off)
+            main.journal = journal
+            path = os.path.join(tmp, 'report.xlsx')
+            results['xlsx'][str(rows)] = measure(lambda: main.create_excel(path), repeat)
+
+            def stream():
+                sink = ReportSink(os.path.join(tmp, 'report.csv'))
+                sink.write_from(journal)
+                sink.close()
+            results['csv_stream'][str(rows)] = measure(stream, repeat)
+    main.journal = main_journal
+    return results
+
+
+# сравнение p50 с прошлым прогоном; возвращает список регрессий
+def compare(current, baseline, threshold, path=''):
+    regressions = []
+    for key, value in current.items():
+        if key not in baseline:
+            continue
+        if isinstance(value, dict) and 'p50_ms' in value:
+            old = baseline[key]['p50_ms']
+            if old and value['p50_ms'] > old * threshold:
+                regressions.append(f"{path}{key}: p50 {old:.3f} -> {value['p50_ms']:.3f} мс")
+        elif isinstance(value, dict):
+            regressions += compare(value, baseline[key], threshold, f'{path}{key}/')
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Замеры производительности модели реактора')
+    parser.add_argument('-o', '--output', help='файл для результатов (JSON)')
+    parser.add_argument('--ticks', type=int, default=2000, help='число тактов для замера такта')
+    parser.add_argument('--repeat', type=int, default=50, help='повторов для остальных замеров')
+    parser.add_argument('--lengths', default='100,7200,57600', help='длины истории графика')
+    parser.add_argument('--rows', default='100,1000,10000', help='числа строк отчёта')
+    parser.add_argument('--compare', help='прошлые результаты (JSON) для сравнения')
+    parser.add_argument('--threshold', type=float, default=1.2, help='допустимый рост p50 при сравнении')
+    args = parser.parse_args(argv)
+
+    os.chdir(os.path.dirname(os.path.abspath(__file__)))
+    from PyQt6.QtWidgets import QApplication
+    app = QApplication.instance() or QApplication([sys.argv[0]])
+    params = default_params()
+
+    results = {
+        'meta': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        },
+        'tick': bench_tick(app, params, args.ticks),
+        'graph_refresh': bench_graph(app, [int(n) for n in args.lengths.split(',')], args.repeat),
+        'export': bench_export([int(n) for n in args.rows.split(',')], max(3, args.repeat // 10)),
+    }
+    text = json.dumps(results, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as file:
+            file.write(text)
+    else:
+        print(text)
+
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as file:
+            baseline = json.load(file)
+        regressions = compare(results, baseline, args.threshold)
+        for line in regressions:
+            print('регрессия:', line, file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,212 @@
+# контрольные точки: полное состояние модели, регуляторов, органов управления и журнала
+# в компактном двоичном файле с версией формата; по контрольной точке работа продолжается
+# в окне модели (python main.py --restore файл.ckpt) или без окна (scenario.py / batch.py --checkpoint),
+# в том числе несколько вариантов «что если» из одного прогретого состояния реактора
+#
+# формат: заголовок (метка, версия, длина), затем сжатое zlib тело:
+#   JSON (параметры, интегратор Т и p), далее секции фиксированной структуры (struct, little-endian):
+#   состояние реактора, органы управления, ПИД-регуляторы, шаг интеграторов, предупреждения,
+#   кинетика, журнал (массивы времени, действий и статусов как есть)
+# состояние собирается в потоке модели между шагами (dumps), запись файла - в фоновом потоке
+import json
+import math
+import os
+import struct
+import sys
+import threading
+import zlib
+from array import array
+from collections import namedtuple
+
+from alarms import ALARM_LIMITS
+from journal import EventJournal, CONTROL_ACTIONS
+from reactor_model import ReactorModel, ReactorControls
+
+
+MAGIC = b'RCKP'
+VERSION = 1
+# заголовок: метка, версия, длина сжатого тела
+HEADER = struct.Struct('<4sHI')
+
+# поля ReactorState и их типы struct (d - float, b - индекс, ? - флаг)
+STATE_FIELDS = (
+    ('time', 'd'), ('V', 'd'), ('V_1', 'd'), ('V_2', 'd'), ('T', 'd'), ('p', 'd'),
+    ('T_id', 'd'), ('p_id', 'd'), ('output_T', 'd'), ('output_p', 'd'), ('elapsed_time', 'd'),
+    ('c_1', 'd'), ('c_2', 'd'), ('c_product', 'd'), ('conversion', 'd'),
+    ('ind_V', 'b'), ('level_V', 'b'), ('ind_T', 'b'), ('ind_p', 'b'), ('thermal', 'b'),
+    ('ind_T_block', '?'), ('ind_p_block', '?'), ('timer_active', '?'),
+)
+STATE = struct.Struct('<' + ''.join(code for _, code in STATE_FIELDS))
+CONTROL_FIELDS = ('feed_1', 'feed_2', 'discharge', 'T_control', 'mixing', 'p_control', 'reset_timer')
+CONTROLS = struct.Struct('<' + '?' * len(CONTROL_FIELDS))
+# уставка, интеграл и прошлая ошибка регулятора (коэффициенты - из params)
+PID = struct.Struct('<3d')
+# последний шаг адаптивных интеграторов Т и p (NaN - нет)
+INTEGRATOR_STEPS = struct.Struct('<2d')
+ALARM_NAMES = tuple(ALARM_LIMITS)
+ALARM_LEVELS = struct.Struct('<' + 'b' * len(ALARM_NAMES))
+ALARM_EVENT = struct.Struct('<3b')
+COUNT = struct.Struct('<I')
+# количества веществ, предложенный шаг, сохранённая W (есть ли, h, kappa, сумма, q, возраст), счётчики
+KINETICS = struct.Struct('<4d?4dI3Q')
+JOURNAL_CONTROLS = struct.Struct('<' + '?' * len(CONTROL_ACTIONS))
+
+# прочитанная контрольная точка: meta - JSON-часть (params, integrator, integrator_options),
+# body - двоичные секции (разбираются в restore)
+Checkpoint = namedtuple('Checkpoint', 'meta body')
+
+
+def _or_nan(value):
+    return math.nan if value is None else value
+
+
+def _optional(value):
+    return None if math.isnan(value) else value
+
+
+# массив журнала в little-endian
+def _array_bytes(values):
+    if sys.byteorder == 'big':
+        values = array(values.typecode, values)
+        values.byteswap()
+    return values.tobytes()
+
+
+def _array_from(typecode, data):
+    values = array(typecode)
+    values.frombytes(data)
+    if sys.byteorder == 'big':
+        values.byteswap()
+    return values
+
+
+# ---- запись ----
+
+# контрольная точка в байтах; вызывается в потоке модели между шагами (состояние согласовано)
+def dumps(model, controls, journal):
+    s = model.state
+    integrator = model.integrator_T
+    options = {name: value for name, value in vars(integrator).items() if name != 'h'}
+    meta = {'params': model.params, 'integrator': integrator.name, 'integrator_options': options}
+    meta_bytes = json.dumps(meta, ensure_ascii=False).encode()
+    parts = [COUNT.pack(len(meta_bytes)), meta_bytes]
+    parts.append(STATE.pack(*(getattr(s, name) for name, _ in STATE_FIELDS)))
+    parts.append(CONTROLS.pack(*(getattr(controls, name) for name in CONTROL_FIELDS)))
+    for pid in (model.pid_T, model.pid_p):
+        parts.append(PID.pack(pid.set_point, pid.integral, pid.previous_error))
+    parts.append(INTEGRATOR_STEPS.pack(_or_nan(getattr(model.integrator_T, 'h', None)),
+                                       _or_nan(getattr(model.integrator_p, 'h', None))))
+    alarms = model.alarms
+    parts.append(ALARM_LEVELS.pack(*(alarms.levels[name] for name in ALARM_NAMES)))
+    parts.append(COUNT.pack(len(alarms.events)))
+    parts += [ALARM_EVENT.pack(ALARM_NAMES.index(name), old, new) for name, old, new in alarms.events]
+    kinetics = model.kinetics
+    w = kinetics.w or (math.nan,) * 4 + (0,)
+    parts.append(KINETICS.pack(*kinetics.n, _or_nan(kinetics.h), kinetics.w is not None, *w,
+                               kinetics.steps, kinetics.rejected, kinetics.factorizations))
+    parts.append(COUNT.pack(len(journal)))
+    parts.append(JOURNAL_CONTROLS.pack(*(journal.last_controls[name] for name, _, _ in CONTROL_ACTIONS)))
+    parts += [_array_bytes(journal.timestamps), _array_bytes(journal.actions), _array_bytes(journal.statuses)]
+    body = zlib.compress(b''.join(parts), 6)
+    return HEADER.pack(MAGIC, VERSION, len(body)) + body
+
+
+# запись через временный файл: при сбое во время записи прежняя контрольная точка не портится
+def write_checkpoint(path, data):
+    temporary = path + '.tmp'
+    with open(temporary, 'wb') as file:
+        file.write(data)
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(temporary, path)
+
+
+# сохранение: состояние собирается сразу, файл пишется в фоновом потоке
+# (поток не daemon: процесс дождётся записи); возвращает поток записи
+def save_checkpoint(path, model, controls, journal):
+    thread = threading.Thread(target=write_checkpoint, args=(path, dumps(model, controls, journal)),
+                              name='checkpoint-writer')
+    thread.start()
+    return thread
+
+
+# ---- чтение ----
+
+def loads(data):
+    if len(data) < HEADER.size or data[:len(MAGIC)] != MAGIC:
+        raise ValueError('не файл контрольной точки')
+    magic, version, length = HEADER.unpack_from(data)
+    if version != VERSION:
+        raise ValueError(f'неподдерживаемая версия контрольной точки {version}')
+    if len(data) - HEADER.size != length:
+        raise ValueError('файл контрольной точки повреждён (неполная запись)')
+    try:
+        body = zlib.decompress(data[HEADER.size:])
+    except zlib.error:
+        raise ValueError('файл контрольной точки повреждён') from None
+    (meta_length,) = COUNT.unpack_from(body)
+    meta_end = COUNT.size + meta_length
+    return Checkpoint(json.loads(body[COUNT.size:meta_end].decode()), memoryview(body)[meta_end:])
+
+
+def read_checkpoint(path):
+    with open(path, 'rb') as file:
+        try:
+            return loads(file.read())
+        except ValueError as error:
+            raise ValueError(f'{path}: {error}') from None
+
+
+# перенос состояния контрольной точки в созданные модель, органы управления и журнал
+# (параметры модели не меняются: вариант может продолжаться с другими уставками, скоростями и порогами)
+def restore(checkpoint, model, controls, journal):
+    body = checkpoint.body
+    offset = 0
+
+    def take(layout):
+        nonlocal offset
+        values = layout.unpack_from(body, offset)
+        offset += layout.size
+        return values
+
+    s = model.state
+    for (name, _), value in zip(STATE_FIELDS, take(STATE)):
+        setattr(s, name, value)
+    for name, value in zip(CONTROL_FIELDS, take(CONTROLS)):
+        setattr(controls, name, value)
+    for pid in (model.pid_T, model.pid_p):
+        pid.set_point, pid.integral, pid.previous_error = take(PID)
+    for integrator, h in zip((model.integrator_T, model.integrator_p), take(INTEGRATOR_STEPS)):
+        if hasattr(integrator, 'h'):
+            integrator.h = _optional(h)
+    alarms = model.alarms
+    alarms.levels = dict(zip(ALARM_NAMES, take(ALARM_LEVELS)))
+    (n_events,) = take(COUNT)
+    alarms.events = []
+    for _ in range(n_events):
+        index, old, new = take(ALARM_EVENT)
+        alarms.events.append((ALARM_NAMES[index], old, new))
+    kinetics = model.kinetics
+    values = take(KINETICS)
+    kinetics.n = list(values[:3])
+    kinetics.h = _optional(values[3])
+    kinetics.w = tuple(values[5:10]) if values[4] else None
+    kinetics.steps, kinetics.rejected, kinetics.factorizations = values[10:]
+    (count,) = take(COUNT)
+    journal.last_controls = {name: value for (name, _, _), value in
+                             zip(CONTROL_ACTIONS, take(JOURNAL_CONTROLS))}
+    for name, typecode in (('timestamps', 'd'), ('actions', 'B'), ('statuses', 'B')):
+        size = count * array(typecode).itemsize
+        setattr(journal, name, _array_from(typecode, body[offset:offset + size]))
+        offset += size
+    return model, controls, journal
+
+
+# модель, органы управления и журнал по файлу контрольной точки;
+# params=None - параметры из контрольной точки
+def load_checkpoint(path, params=None):
+    checkpoint = read_checkpoint(path)
+    meta = checkpoint.meta
+    model = ReactorModel(meta['params'] if params is None else params, meta['integrator'],
+                         **meta['integrator_options'])
+    return restore(checkpoint, model, ReactorControls(), EventJournal())
@@ -0,0 +1,227 @@
+# сервер состояния и управления для внешних программ (панели оператора, имитаторы SCADA)
+# asyncio работает в отдельном потоке и не блокирует цикл событий Qt; окно модели только
+# публикует ссылку на последнее состояние и забирает накопленные команды в начале кадра
+#
+# протокол - строки JSON (одна строка - одно сообщение):
+#   клиент: {"cmd": "subscribe", "rate": 10}  - получать состояние 10 раз в секунду (rate 0 - отписка)
+#           {"cmd": "get"}                     - последнее состояние один раз
+#           {"cmd": "set", "checkBox_4": true, "dial_3": 30, "doubleSpinBox": 60}
+#                                              - как виджеты окна модели (или ключи сценария: T_control, ...);
+#                                                флаги - true/false, скорости и уставки - числа, иначе error
+#                                                и команда не выполняется
+#   сервер: {"type": "state", "seq": ..., "time": ..., "V": ..., ...}
+#           {"type": "ok"} / {"type": "error", "error": "..."}
+#
+# адрес: tcp://127.0.0.1:8765 или unix:///tmp/reactor.sock
+# медленный клиент не копит очередь: пока предыдущая отправка не ушла (drain), новые состояния
+# не ставятся в очередь, а следующим отправляется самое свежее
+import asyncio
+import json
+import os
+import sys
+import threading
+from collections import deque
+
+from scenario import coerce_value, normalize_changes, WIDGET_KEYS, RATE_KEYS, SETPOINT_KEYS
+
+
+DEFAULT_RATE = 10
+MAX_RATE = 100
+# поля ReactorState в сообщении состояния
+STATE_FIELDS = ('time', 'V', 'V_1', 'V_2', 'T', 'p', 'T_id', 'p_id', 'ind_V', 'ind_T', 'ind_p',
+                'ind_T_block', 'ind_p_block', 'thermal', 'output_T', 'output_p',
+                'c_1', 'c_2', 'c_product', 'conversion')
+CONTROL_FIELDS = ('feed_1', 'feed_2', 'discharge', 'T_control', 'mixing', 'p_control')
+# ключ команды -> имя виджета окна модели
+WIDGET_NAMES = {key: name for name, key in WIDGET_KEYS.items()}
+
+
+# состояние модели для отправки клиентам
+def snapshot(model, controls):
+    s = model.state
+    state = {name: getattr(s, name) for name in STATE_FIELDS}
+    state['fill'] = model.fill_percent()
+    state['controls'] = {name: getattr(controls, name) for name in CONTROL_FIELDS}
+    state['v'] = dict(model.params['v'])
+    return state
+
+
+# применение команды к виджетам окна модели (form - Ui окна), как если бы их изменил пользователь
+# (значения ограничиваются пределами виджетов, обработчики виджетов обновляют params);
+# вызывается в кадре окна: неверная запись пропускается, чтобы исключение не остановило окно
+# (команды клиентов проверяются при приёме, в _handle)
+def apply_to_form(form, changes):
+    for key, value in changes.items():
+        try:
+            value = coerce_value(key, value)
+            widget = getattr(form, WIDGET_NAMES[key])
+        except (KeyError, TypeError, ValueError) as error:
+            print(f'команда пропущена: {key}={value!r}: {error}', file=sys.stderr)
+            continue
+        if key in RATE_KEYS:
+            widget.setValue(value)
+        elif key in SETPOINT_KEYS:
+            widget.setValue(value)
+        else:
+            widget.setChecked(value)
+
+
+def parse_address(address):
+    if address.startswith('unix://'):
+        return 'unix', address[len('unix://'):]
+    if address.startswith('tcp://'):
+        address = address[len('tcp://'):]
+    host, _, port = address.rpartition(':')
+    return 'tcp', (host or '127.0.0.1', int(port))
+
+
+class ControlServer:
+    def __init__(self, address):
+        self.kind, self.address = parse_address(address)
+        self.latest = (0, None)   # (номер, состояние) - замена ссылки атомарна, блокировка не нужна
+        self.encoded = (0, b'')   # последнее состояние в виде строки протокола (кодируется один раз)
+        self.commands = deque()   # изменения от клиентов до начала следующего кадра
+        self.clients = 0
+        self.client_tasks = set()
+        self.writers = set()
+        self.loop = None
+        self.server = None
+        self.thread = None
+        self.error = None
+
+    def start(self):
+        ready = threading.Event()
+        self.thread = threading.Thread(target=self._thread_main, args=(ready,), name='control-server',
+                                       daemon=True)
+        self.thread.start()
+        ready.wait()
+        if self.error is not None:
+            raise self.error
+        return self
+
+    def stop(self):
+        if self.loop is None:
+            return
+        # соединения закрываются до остановки цикла, чтобы обработчики клиентов завершились сами
+        asyncio.run_coroutine_threadsafe(self._shutdown(), self.loop).result(timeout=5)
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join()
+        self.loop = None
+        if self.kind == 'unix' and os.path.exists(self.address):
+            os.unlink(self.address)
+
+    # вызывается окном модели в конце кадра; состояние собирается, только если есть клиенты
+    def publish(self, model, controls):
+        if self.clients:
+            self.latest = (self.latest[0] + 1, snapshot(model, controls))
+
+    # команды, накопленные с прошлого кадра (вызывается в начале кадра - на границе шагов модели)
+    def take_commands(self):
+        commands = []
+        while self.commands:
+            commands.append(self.commands.popleft())
+        return commands
+
+    def _thread_main(self, ready):
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        try:
+            if self.kind == 'unix':
+                if os.path.exists(self.address):
+                    os.unlink(self.address)
+                start = asyncio.start_unix_server(self._client, self.address)
+            else:
+                start = asyncio.start_server(self._client, *self.address)
+            self.server = self.loop.run_until_complete(start)
+        except Exception as error:
+            self.error = error
+            self.loop.close()
+            self.loop = None
+            ready.set()
+            return
+        ready.set()
+        try:
+            self.loop.run_forever()
+        finally:
+            self.server.close()
+            tasks = asyncio.all_tasks(self.loop)
+            for task in tasks:
+                task.cancel()
+            self.loop.run_until_complete(asyncio.gather(*tasks, return_exceptions=True))
+            self.loop.close()
+
+    async def _shutdown(self):
+        self.server.close()
+        for writer in self.writers:
+            writer.close()
+        if self.client_tasks:
+            await asyncio.wait(self.client_tasks, timeout=2)
+
+    def _encode_latest(self):
+        seq, state = self.latest
+        if self.encoded[0] != seq:
+            message = dict(state, type='state', seq=seq)
+            self.encoded = (seq, (json.dumps(message, ensure_ascii=False) + '\n').encode())
+        return self.encoded
+
+    @staticmethod
+    def _send(writer, message):
+        writer.write((json.dumps(message, ensure_ascii=False) + '\n').encode())
+
+    async def _client(self, reader, writer):
+        self.clients += 1
+        self.client_tasks.add(asyncio.current_task())
+        self.writers.add(writer)
+        subscription = {'rate': 0}
+        sender = asyncio.create_task(self._stream(writer, subscription))
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                try:
+                    message = json.loads(line)
+                    self._handle(message, subscription, writer)
+                except Exception as error:
+                    self._send(writer, {'type': 'error', 'error': f'{type(error).__name__}: {error}'})
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            self.clients -= 1
+            self.client_tasks.discard(asyncio.current_task())
+            self.writers.discard(writer)
+            sender.cancel()
+            writer.close()
+
+    def _handle(self, message, subscription, writer):
+        cmd = message.get('cmd')
+        if cmd == 'subscribe':
+            subscription['rate'] = min(max(float(message.get('rate', DEFAULT_RATE)), 0), MAX_RATE)
+            self._send(writer, {'type': 'ok'})
+        elif cmd == 'get':
+            if self.latest[1] is None:
+                raise ValueError('состояние ещё не опубликовано')
+            writer.write(self._encode_latest()[1])
+        elif cmd == 'set':
+            # ключи и значения проверяются до постановки в очередь: неверная команда - error клиенту
+            self.commands.append(normalize_changes(message, skip=('cmd',)))
+            self._send(writer, {'type': 'ok'})
+        else:
+            raise ValueError(f'неизвестная команда: {cmd}')
+
+    # отправка подписчику: не чаще rate раз в секунду и только новые состояния;
+    # drain ждёт, пока клиент примет данные, за это время устаревшие состояния просто пропускаются
+    async def _stream(self, writer, subscription):
+        sent = 0
+        try:
+            while True:
+                rate = subscription['rate']
+                await asyncio.sleep(1 / rate if rate else 0.1)
+                if not rate or self.latest[0] == sent:
+                    continue
+                sent, data = self._encode_latest()
+                writer.write(data)
+                await writer.drain()
+        except ConnectionError:
+            pass
@@ -0,0 +1,281 @@
+# пакетная модель: N реакторов с разными параметрами, состояние хранится в массивах NumPy формы (N,)
+# логика шага совпадает с reactor_model.ReactorModel, но ветвления заменены масками
+# промежуточные массивы шага выделяются один раз (ufunc с out=), редкие ветви (смена уставки,
+# блокировка на пределе, слив) пропускаются, если их маска пуста
+#
+# выигрыш (python ensemble.py N, N = 1e3..1e5) - против той же работы на объектах Python:
+# полный шаг быстрее цикла по ReactorModel.step в ~20-100 раз, ПИД-шаг - цикла по PIDController.update
+# в ~15-50 раз; полный шаг (объёмы, предупреждения, отключение регуляторов) - это ~70 проходов
+# по массивам, поэтому против цикла только по PIDController.update он быстрее лишь в ~3-8 раз
+import numpy as np
+
+from alarms import AlarmArrays, ALARM_LIMITS, hysteresis
+from reactor_model import TICK, PID_DT_PER_TICK, PID_GAINS
+
+
+# поля словаря params (в формате wind_params.save_params), которые переносятся в массивы
+PARAM_FIELDS = {
+    'V': ('reactor', 'reacror_warning_min', 'reacror_warning_max', 'reacror_limit_min', 'reacror_limit_max'),
+    'T': ('ambient', 'ideal', 'warning_min', 'warning_max', 'limit_min', 'limit_max'),
+    'v': ('reagent_1', 'reagent_2', 'discharge', 'mixing'),
+    'p': ('atmosphere', 'ideal', 'warning_min', 'warning_max', 'limit_min', 'limit_max'),
+}
+CONTROL_FIELDS = ('feed_1', 'feed_2', 'discharge', 'T_control', 'mixing', 'p_control')
+
+
+# органы управления всех реакторов: булевы массивы формы (N,)
+class EnsembleControls:
+    def __init__(self, n):
+        for name in CONTROL_FIELDS:
+            setattr(self, name, np.zeros(n, dtype=bool))
+
+
+class ReactorEnsemble:
+    def __init__(self, params_list):
+        self.n = n = len(params_list)
+        # параметры: self.params['T']['ideal'] - массив уставок Т всех реакторов
+        self.params = {group: {key: np.array([float(params[group][key]) for params in params_list])
+                               for key in keys}
+                       for group, keys in PARAM_FIELDS.items()}
+        # коэффициенты ПИД-регуляторов: params['pid'] (как в ReactorModel), иначе PID_GAINS
+        self.gains = {loop: {name: np.array([float(params.get('pid', {}).get(loop, PID_GAINS)[name])
+                                             for params in params_list])
+                             for name in PID_GAINS}
+                      for loop in ('T', 'p')}
+        P = self.params
+        self.V_1, self.V_2, self.V = np.zeros(n), np.zeros(n), np.zeros(n)
+        self.T = P['T']['ambient'].copy()
+        self.p = P['p']['atmosphere'].copy()
+        self.T_id = P['T']['ideal'].copy()
+        self.p_id = P['p']['ideal'].copy()
+        # интегралы и предыдущие ошибки ПИД-регуляторов
+        self.integral_T, self.previous_error_T = np.zeros(n), np.zeros(n)
+        self.integral_p, self.previous_error_p = np.zeros(n), np.zeros(n)
+        self.output_T, self.output_p = np.zeros(n), np.zeros(n)
+        self.ind_V = np.full(n, -1, dtype=np.int8)
+        self.ind_T, self.ind_p = np.zeros(n, dtype=np.int8), np.zeros(n, dtype=np.int8)
+        self.ind_T_block, self.ind_p_block = np.zeros(n, dtype=bool), np.zeros(n, dtype=bool)
+        self.thermal = np.zeros(n, dtype=np.int8)
+        # таблица предупреждений (как ReactorModel.alarms), полосы гистерезиса - свои у каждого реактора
+        self.alarms = AlarmArrays(P, {name: np.array([float(hysteresis(params, name)) for params in params_list])
+                                      for name in ALARM_LIMITS}, n)
+        self.time = 0
+        # рабочие массивы шага
+        self._f = [np.empty(n) for _ in range(3)]
+        self._b = [np.empty(n, dtype=bool) for _ in range(3)]
+        self._output = np.empty(n)
+        self._blocked = np.empty(n, dtype=bool)
+        self._converged = np.empty(n, dtype=bool)
+        self._empty = np.empty(n, dtype=bool)
+
+    # шаг всех реакторов длительностью dt (с); controls изменяется на месте
+    def step(self, dt, controls):
+        self.time += dt
+        self._step_volumes(dt, controls)
+        self._check_V()
+        np.equal(self.ind_V, -1, out=self._empty)
+        controls.mixing &= ~(self._empty | (np.abs(self.ind_T) == 2))
+        pid_dt = dt / TICK * PID_DT_PER_TICK
+        self._step_T(pid_dt, controls)
+        self.ind_T = self.alarms.update('T', self.T, self.ind_T_block)
+        self._step_p(pid_dt, controls)
+        self.ind_p = self.alarms.update('p', self.p, self.ind_p_block)
+
+    # заполненность реакторов, %
+    def fill_percent(self):
+        return self.V / self.params['V']['reactor'] * 100
+
+    def _step_volumes(self, dt, controls):
+        V_reactor = self.params['V']['reactor']
+        v = self.params['v']
+        dV, fill, share = self._f
+        fits = self._b[0]
+        # залив реагентов; подача отключается, если реактор переполнится
+        for flag, rate, V_i in ((controls.feed_1, v['reagent_1'], self.V_1),
+                                (controls.feed_2, v['reagent_2'], self.V_2)):
+            if not flag.any():
+                continue
+            np.multiply(rate, dt, out=dV)
+            dV /= 60
+            np.add(self.V, dV, out=fill)
+            fill /= V_reactor
+            fill *= 100
+            np.less(fill, 100, out=fits)
+            flag &= fits
+            np.add(V_i, dV, out=V_i, where=flag)
+            np.add(self.V, dV, out=self.V, where=flag)
+        # слив реагентов
+        if not controls.discharge.any():
+            return
+        np.multiply(v['discharge'], dt, out=dV)
+        dV /= 60
+        np.subtract(self.V, dV, out=fill)
+        fill /= V_reactor
+        fill *= 100
+        mask = np.greater(fill, 0, out=fits)
+        mask &= controls.discharge
+        np.divide(dV, self.V, out=share, where=mask)
+        for V_i in (self.V_1, self.V_2):
+            np.multiply(V_i, share, out=fill, where=mask)
+            np.subtract(V_i, fill, out=V_i, where=mask)
+        np.subtract(self.V, dV, out=self.V, where=mask)
+
+    def _check_V(self):
+        level = self.alarms.update('V', self.fill_percent())
+        self.ind_V = self.alarms.ind_V[level + 2]
+
+    # ПИД-шаг с блокировкой при выходе за пределы; возвращает выход регулятора и маску блокировки
+    # (рабочие массивы: действительны до следующего вызова)
+    def _pid(self, x, x_id, integral, previous_error, ideal, limit_min, limit_max, active, pid_dt, gains):
+        error, term, x_new = self._f
+        changed, inactive, outside = self._b
+        output, blocked = self._output, self._blocked
+        # при смене уставки регулятор создаётся заново (обнуляются интеграл и предыдущая ошибка)
+        np.not_equal(ideal, x_id, out=changed)
+        if changed.any():
+            np.copyto(x_id, ideal, where=changed)
+            np.copyto(integral, 0.0, where=changed)
+            np.copyto(previous_error, 0.0, where=changed)
+
+        np.subtract(x_id, x, out=error)
+        np.multiply(error, pid_dt, out=term)
+        np.add(integral, term, out=integral, where=active)
+        # output = kp * error + ki * integral + kd * (error - previous_error) / pid_dt
+        np.multiply(gains['kp'], error, out=output)
+        np.multiply(gains['ki'], integral, out=term)
+        output += term
+        np.subtract(error, previous_error, out=term)
+        term /= pid_dt
+        np.multiply(gains['kd'], term, out=term)
+        output += term
+        np.logical_not(active, out=inactive)
+        np.copyto(output, 0.0, where=inactive)
+        np.copyto(previous_error, error, where=active)
+        np.multiply(output, pid_dt, out=x_new)
+        x_new += x
+        np.less_equal(x_new, limit_min, out=blocked)
+        np.greater_equal(x_new, limit_max, out=outside)
+        blocked |= outside
+        blocked &= active
+        if blocked.any():
+            np.add(x_id, 0.0000001, out=x_id, where=blocked)
+            np.logical_or(inactive, blocked, out=inactive)
+        np.copyto(x, x_new, where=~inactive)
+        return output, blocked
+
+    def _step_T(self, pid_dt, controls):
+        P = self.params['T']
+        active = controls.T_control & ~self._empty
+        output, blocked = self._pid(self.T, self.T_id, self.integral_T, self.previous_error_T,
+                                    P['ideal'], P['limit_min'], P['limit_max'], active, pid_dt,
+                                    self.gains['T'])
+        np.copyto(self.output_T, output, where=active)
+        np.copyto(self.ind_T_block, blocked, where=active)
+        converged = self._converged_mask(output, self.T, self.T_id, active)
+        stop = self._b[0]
+        np.logical_or(blocked, converged, out=stop)
+        stop |= self._empty
+        controls.T_control &= ~stop
+        # характер изменения Т: знак выхода регулятора; 0 - при сходимости и у выключенного регулятора
+        # (при ind_V == -1 остаётся прежним, при нулевом выходе - тоже)
+        sign, nonzero = self._f[0], self._b[1]
+        np.sign(output, out=sign)
+        np.not_equal(output, 0, out=nonzero)
+        nonzero &= active
+        np.copyto(self.thermal, sign, where=nonzero, casting='unsafe')
+        idle = self._b[2]
+        np.logical_or(active, self._empty, out=idle)
+        np.logical_not(idle, out=idle)
+        idle |= converged
+        np.copyto(self.thermal, 0, where=idle)
+
+    # регулятор сошёлся: |выход| < 0.01 и |x - уставка| < 0.05
+    def _converged_mask(self, output, x, x_id, active):
+        converged, near = self._converged, self._b[0]
+        distance = self._f[0]
+        np.abs(output, out=distance)
+        np.less(distance, 0.01, out=converged)
+        np.subtract(x, x_id, out=distance)
+        np.abs(distance, out=distance)
+        np.less(distance, 0.05, out=near)
+        converged &= near
+        converged &= active
+        return converged
+
+    def _step_p(self, pid_dt, controls):
+        P = self.params['p']
+        active = controls.p_control.copy()
+        output, blocked = self._pid(self.p, self.p_id, self.integral_p, self.previous_error_p,
+                                    P['ideal'], P['limit_min'], P['limit_max'], active, pid_dt,
+                                    self.gains['p'])
+        np.copyto(self.output_p, output, where=active)
+        np.copyto(self.ind_p_block, blocked, where=active)
+        converged = self._converged_mask(output, self.p, self.p_id, active)
+        controls.p_control &= ~(blocked | converged)
+
+
+# сравнение скорости с той же работой на объектах Python: полный шаг - с циклом по ReactorModel.step,
+# ПИД-шаг - с циклом по PIDController.update
+if __name__ == "__main__":
+    import sys
+    import time
+    from reactor_model import PIDController, ReactorModel, ReactorControls
+
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    steps = 50
+    params = {
+        'name': {'reagent_1': '', 'reagent_2': '', 'exp': 'bench'},
+        'V': {'reactor': 20.0, 'reacror_warning_min': 10, 'reacror_warning_max': 90,
+              'reacror_limit_min': 3, 'reacror_limit_max': 97},
+        'T': {'ambient': 25.0, 'ideal': 36.6, 'warning_min': 10.0, 'warning_max': 90.0,
+              'limit_min': 4.0, 'limit_max': 97.0},
+        'v': {'reagent_1': 40, 'reagent_2': 40, 'reagent_min': 0, 'reagent_max': 40,
+              'discharge': 80, 'discharge_min': 0, 'discharge_max': 80,
+              'mixing': 200, 'mixing_min': 50, 'mixing_max': 500},
+        'p': {'atmosphere': 1.0, 'ideal': 1.5, 'warning_min': 0.3, 'warning_max': 300.0,
+              'limit_min': 0.1, 'limit_max': 340.0},
+    }
+    ensemble = ReactorEnsemble([params] * n)
+    controls = EnsembleControls(n)
+    controls.feed_1[:] = controls.feed_2[:] = controls.T_control[:] = controls.p_control[:] = True
+    t0 = time.perf_counter()
+    for _ in range(steps):
+        ensemble.step(TICK, controls)
+    t_ensemble = time.perf_counter() - t0
+
+    # тот же объём работы поштучно: ReactorModel на каждый реактор
+    models = [(ReactorModel(params), ReactorControls(feed_1=True, feed_2=True, T_control=True, p_control=True))
+              for _ in range(n)]
+    t0 = time.perf_counter()
+    for _ in range(steps):
+        for model, model_controls in models:
+            model.step(TICK, model_controls)
+    t_models = time.perf_counter() - t0
+
+    # только ПИД-регуляторы температуры
+    controllers = [PIDController(set_point=36.6, **PID_GAINS) for _ in range(n)]
+    T = [25.0] * n
+    t0 = time.perf_counter()
+    for _ in range(steps):
+        for i, pid in enumerate(controllers):
+            T[i] += pid.update(T[i], PID_DT_PER_TICK) * PID_DT_PER_TICK
+    t_pid = time.perf_counter() - t0
+
+    # только ПИД-шаг ансамбля на той же задаче (без объёмов, предупреждений и отключения регуляторов)
+    pid_ensemble = ReactorEnsemble([params] * n)
+    P = pid_ensemble.params['T']
+    active = np.ones(n, dtype=bool)
+    t0 = time.perf_counter()
+    for _ in range(steps):
+        pid_ensemble._pid(pid_ensemble.T, pid_ensemble.T_id, pid_ensemble.integral_T,
+                          pid_ensemble.previous_error_T, P['ideal'], P['limit_min'], P['limit_max'],
+                          active, PID_DT_PER_TICK, pid_ensemble.gains['T'])
+    t_pid_ensemble = time.perf_counter() - t0
+
+    print(f"N={n}, шагов={steps}")
+    print(f"ансамбль (полный шаг):        {t_ensemble / steps * 1e3:.3f} мс/шаг")
+    print(f"цикл по ReactorModel.step:    {t_models / steps * 1e3:.3f} мс/шаг "
+          f"(в {t_models / t_ensemble:.1f}x медленнее полного шага)")
+    print(f"ПИД-шаг ансамбля:             {t_pid_ensemble / steps * 1e3:.3f} мс/шаг")
+    print(f"цикл по PIDController.update: {t_pid / steps * 1e3:.3f} мс/шаг "
+          f"(в {t_pid / t_pid_ensemble:.1f}x медленнее ПИД-шага, в {t_pid / t_ensemble:.1f}x - полного шага)")
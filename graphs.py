@@ -0,0 +1,208 @@
+# графики окна модели (matplotlib импортируется только при открытии окна модели)
+from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
+from matplotlib.figure import Figure
+import numpy as np
+
+from series_buffer import SeriesBuffer, MinMaxPyramid
+
+
+# сколько последних точек хранится на графиках без прореживания (при обновлении раз в 0.5 с - 1 час)
+GRAPH_RETENTION = 7200
+# пирамида прореживания: уровень l - корзины по PYRAMID_FACTOR**l точек (4 уровня по GRAPH_RETENTION
+# корзин при обновлении раз в 0.5 с - больше 10 суток истории)
+PYRAMID_FACTOR = 4
+PYRAMID_LEVELS = 4
+# наименьший видимый интервал при приближении колесом мыши, с
+MIN_SPAN = 10
+
+
+# базовый класс графиков
+# blit=True - статичный фон (оси, сетка, подписи) кэшируется, при обновлении перерисовываются
+#             только линии, а полная перерисовка выполняется лишь при изменении пределов осей
+# deferred=True - update_figure только готовит данные, отрисовку выполняет render_graphs
+# история хранится в пирамиде min/max: отрисовывается не больше точек, чем пикселей по ширине осей,
+# колесо мыши меняет видимый интервал (от MIN_SPAN до всей истории)
+class BaseGraph(FigureCanvas):
+    def __init__(self, parent=None, width=5, height=4, dpi=100, retention=GRAPH_RETENTION,
+                 blit=False, deferred=False):
+        self.fig = Figure(figsize=(width, height), dpi=dpi)
+        self.axes = self.fig.add_subplot(111)
+        FigureCanvas.__init__(self, self.fig)
+        self.setParent(parent)
+        
+        self.retention = retention
+        self.xdata = SeriesBuffer(retention)
+        self.lines = []
+        self.data_sets = []
+        self.line_styles = []  # Сохраняем стили линий
+        self.pyramid = MinMaxPyramid(0, retention, PYRAMID_FACTOR, PYRAMID_LEVELS)
+        self.span = None  # видимый интервал по x, None - вся история
+        
+        self.blit_mode = blit
+        self.deferred = deferred
+        self.dirty = False  # есть неотрисованные изменения
+        self.full_redraw = True  # требуется полная перерисовка (изменились пределы осей)
+        self.background = None
+        if blit:
+            self.mpl_connect('draw_event', self.on_draw)
+        
+        grid_color = '#b0b0b0'
+        self.axes.grid(True, color=grid_color)
+        for spine in self.axes.spines.values():
+            spine.set_color(grid_color)
+    
+    # новая точка всех линий (values - в порядке линий)
+    def append(self, x, values):
+        self.xdata.append(x)
+        for data, value in zip(self.data_sets, values):
+            data.append(value)
+        self.pyramid.append(x, values)
+
+    def update_figure(self):
+        if len(self.xdata):
+            x_last = self.xdata.last()
+            x_from = x_last - self.span if self.span else None
+            width = max(int(self.axes.get_window_extent().width), 100)
+            xdata, series = self.pyramid.select(self.xdata, self.data_sets, x_from, width)
+            for line, data in zip(self.lines, series):
+                line.set_data(xdata, data)
+            y_min = min(float(np.min(data)) for data in series)
+            y_max = max(float(np.max(data)) for data in series)
+            x_first = x_from if x_from is not None and x_from > xdata[0] else xdata[0]
+            self.set_limits(x_first, x_last + 1, y_min - 1, y_max + 1)
+        else:
+            for line in self.lines:
+                line.set_data([], [])
+        self.dirty = True
+        if not self.deferred:
+            self.render()
+
+    # видимый интервал по x (None - вся история)
+    def set_span(self, span):
+        self.span = span
+        self.full_redraw = True
+        BaseGraph.update_figure(self)
+
+    # колесо мыши: приближение (вверх) и отдаление (вниз) в 2 раза
+    def wheelEvent(self, event):
+        if not len(self.xdata):
+            return
+        history = self.xdata.last() - self.pyramid.first(self.xdata)
+        span = self.span or history
+        span = span / 2 if event.angleDelta().y() > 0 else span * 2
+        self.set_span(None if span >= history else max(span, MIN_SPAN))
+    
+    # установка пределов осей; в режиме blit пределы расширяются с запасом,
+    # чтобы полная перерисовка требовалась не при каждом обновлении
+    def set_limits(self, x_min, x_max, y_min, y_max):
+        if self.blit_mode:
+            x_lo, x_hi = self.axes.get_xlim()
+            span = x_max - x_min
+            if self.full_redraw or x_min < x_lo or x_min > x_lo + 0.25 * span or x_max > x_hi:
+                x_lo, x_hi = x_min, x_max + 0.25 * span
+            y_lo, y_hi = self.axes.get_ylim()
+            # пределы по y сужаются, если данные занимают меньше половины диапазона
+            if self.full_redraw or y_min < y_lo or y_max > y_hi or (y_max - y_min) < 0.5 * (y_hi - y_lo):
+                margin = 0.1 * (y_max - y_min)
+                y_lo, y_hi = y_min - margin, y_max + margin
+            x_min, x_max, y_min, y_max = x_lo, x_hi, y_lo, y_hi
+        if (x_min, x_max) != tuple(self.axes.get_xlim()) or (y_min, y_max) != tuple(self.axes.get_ylim()):
+            self.axes.set_xlim(x_min, x_max)
+            self.axes.set_ylim(y_min, y_max)
+            self.full_redraw = True
+    
+    # отрисовка накопленных изменений; скрытые графики пропускаются до появления на экране
+    def render(self):
+        if not self.dirty or not self.isVisible() or self.visibleRegion().isEmpty():
+            return
+        self.dirty = False
+        if not self.blit_mode or self.full_redraw or self.background is None:
+            self.draw()
+        else:
+            self.restore_region(self.background)
+            for line in self.lines:
+                self.axes.draw_artist(line)
+            self.blit(self.fig.bbox)
+    
+    # после полной перерисовки фон без линий кэшируется, затем поверх рисуются линии
+    def on_draw(self, event):
+        self.full_redraw = False
+        self.background = self.copy_from_bbox(self.fig.bbox)
+        for line in self.lines:
+            self.axes.draw_artist(line)
+    
+    def showEvent(self, event):
+        super().showEvent(event)
+        self.dirty = True
+        self.full_redraw = True
+    
+    def clear_data(self):
+        self.xdata.clear()
+        for data in self.data_sets:
+            data.clear()
+        self.pyramid.clear()
+        self.axes.cla()
+        self.axes.grid(True, color='#b0b0b0')
+        # Пересоздание линий с сохранением стилей
+        self.lines = [self.make_line(style['color'], style['linestyle']) for style in self.line_styles]
+        self.dirty = True
+        self.full_redraw = True
+        if not self.deferred:
+            self.render()
+
+    # замена всей истории графика (data_sets - в порядке линий графика)
+    def set_history(self, xdata, data_sets):
+        self.clear_data()
+        for k, x in enumerate(xdata):
+            self.append(x, [data[k] for data in data_sets])
+        BaseGraph.update_figure(self)
+
+    def make_line(self, color, style):
+        line, = self.axes.plot([], [], color=color, linestyle=style, animated=self.blit_mode)
+        return line
+
+    def add_line(self, color, style='-'):
+        self.lines.append(self.make_line(color, style))
+        self.data_sets.append(SeriesBuffer(self.retention))
+        self.line_styles.append({'color': color, 'linestyle': style})
+        self.pyramid = MinMaxPyramid(len(self.data_sets), self.retention, PYRAMID_FACTOR, PYRAMID_LEVELS)
+
+
+# отрисовка всех графиков в одном кадре (для графиков с deferred=True)
+def render_graphs(graphs):
+    for graph in graphs:
+        graph.render()
+
+# класс графика температуры
+class DynamicGraph(BaseGraph):
+    def __init__(self, parent=None, **kwargs):
+        super().__init__(parent, **kwargs)
+        self.add_line('r', '-')
+        self.add_line('b', '--')
+
+    def update_figure(self, x, temp, ideal_temp):
+        self.append(x, (temp, ideal_temp))
+        super().update_figure()
+
+# класс графика объёмов
+class MultiVariableGraph(BaseGraph):
+    def __init__(self, parent=None, **kwargs):
+        super().__init__(parent, **kwargs)
+        self.add_line('g', '-')
+        self.add_line('b', '-')
+        self.add_line('r', '--')
+
+    def update_figure(self, x, V1, V2, V):
+        self.append(x, (V2, V, V1))
+        super().update_figure()
+
+# класс графика давления
+class PGraph(BaseGraph):
+    def __init__(self, parent=None, **kwargs):
+        super().__init__(parent, **kwargs)
+        self.add_line('r', '-')
+        self.add_line('b', '--')
+
+    def update_figure(self, x, pressure, ideal_pressure):
+        self.append(x, (pressure, ideal_pressure))
+        super().update_figure()
@@ -0,0 +1,148 @@
+# интеграторы для регулируемых Т и p: непрерывная форма ПИД-контура
+#   dx/dt = u,  dI/dt = e,  e = set_point - x,  u = Kp*e + Ki*I + Kd*de/dt = (Kp*e + Ki*I) / (1 + Kd)
+# выход за limit_min / limit_max определяется как событие (пересечение границы внутри шага)
+#
+# 'euler' - эталонный режим: дискретный ПИД-регулятор с явным Эйлером, как в исходной модели
+# 'rk4'   - Рунге-Кутта 4 порядка с постоянным шагом (не больше h_max)
+# 'rk45'  - Дормана-Принса 5(4) с адаптивным шагом по оценке погрешности
+
+# точность определения момента события (доля шага)
+EVENT_TOL = 1e-9
+
+
+class EulerIntegrator:
+    name = 'euler'
+
+    # шаг длительностью dt (время ПИД-регулятора); возвращает (новое x, выход регулятора, блокировка)
+    def advance_pid(self, pid, x, dt, limit_min, limit_max):
+        output = pid.update(x, dt)
+        x_new = x + output*dt
+        if x_new <= limit_min or x_new >= limit_max:
+            return x, output, True
+        return x_new, output, False
+
+
+# общая часть интеграторов Рунге-Кутты: состояние (x, I) и поиск событий
+class _ODEIntegrator:
+    def advance_pid(self, pid, x, dt, limit_min, limit_max):
+        kp, ki, kd, sp = pid.Kp, pid.Ki, pid.Kd, pid.set_point
+
+        def f(x, integral):
+            e = sp - x
+            return (kp*e + ki*integral) / (1 + kd), e
+
+        x, integral, blocked = self.integrate(f, x, pid.integral, dt, limit_min, limit_max)
+        # состояние дискретного регулятора согласуется с непрерывным (можно переключиться на 'euler')
+        pid.integral = integral
+        pid.previous_error = sp - x
+        output = f(x, integral)[0]
+        return x, output, blocked
+
+    # поиск момента пересечения границы внутри шага h бисекцией; возвращает состояние до пересечения
+    def _locate_event(self, f, x, integral, h, limit_min, limit_max):
+        lo, hi = 0.0, 1.0
+        x_lo, i_lo = x, integral
+        while hi - lo > EVENT_TOL:
+            mid = (lo + hi) / 2
+            x_mid, i_mid = self.single_step(f, x, integral, h * mid)[:2]
+            if limit_min < x_mid < limit_max:
+                lo, x_lo, i_lo = mid, x_mid, i_mid
+            else:
+                hi = mid
+        return x_lo, i_lo, h * lo
+
+
+class RK4Integrator(_ODEIntegrator):
+    name = 'rk4'
+
+    def __init__(self, h_max=None):
+        self.h_max = h_max
+
+    def single_step(self, f, x, integral, h):
+        k1x, k1i = f(x, integral)
+        k2x, k2i = f(x + h/2*k1x, integral + h/2*k1i)
+        k3x, k3i = f(x + h/2*k2x, integral + h/2*k2i)
+        k4x, k4i = f(x + h*k3x, integral + h*k3i)
+        return (x + h/6*(k1x + 2*k2x + 2*k3x + k4x),
+                integral + h/6*(k1i + 2*k2i + 2*k3i + k4i))
+
+    def integrate(self, f, x, integral, dt, limit_min, limit_max):
+        n = 1 if not self.h_max else max(1, int(-(-dt // self.h_max)))
+        h = dt / n
+        for _ in range(n):
+            x_new, i_new = self.single_step(f, x, integral, h)
+            if not limit_min < x_new < limit_max:
+                x, integral, _ = self._locate_event(f, x, integral, h, limit_min, limit_max)
+                return x, integral, True
+            x, integral = x_new, i_new
+        return x, integral, False
+
+
+# коэффициенты Дормана-Принса
+_A = ((),
+      (1/5,),
+      (3/40, 9/40),
+      (44/45, -56/15, 32/9),
+      (19372/6561, -25360/2187, 64448/6561, -212/729),
+      (9017/3168, -355/33, 46732/5247, 49/176, -5103/18656),
+      (35/384, 0, 500/1113, 125/192, -2187/6784, 11/84))
+_B5 = (35/384, 0, 500/1113, 125/192, -2187/6784, 11/84, 0)
+_B4 = (5179/57600, 0, 7571/16695, 393/640, -92097/339200, 187/2100, 1/40)
+
+
+class RK45Integrator(_ODEIntegrator):
+    name = 'rk45'
+
+    def __init__(self, rtol=1e-6, atol=1e-9):
+        self.rtol = rtol
+        self.atol = atol
+        self.h = None  # последний принятый шаг (используется как начальный в следующем вызове)
+
+    # шаг Дормана-Принса: (x, I) 5 порядка и оценка погрешности
+    def single_step(self, f, x, integral, h):
+        kx, ki = [], []
+        for a in _A:
+            xs = x + h * sum(c*k for c, k in zip(a, kx))
+            is_ = integral + h * sum(c*k for c, k in zip(a, ki))
+            dx, di = f(xs, is_)
+            kx.append(dx)
+            ki.append(di)
+        x5 = x + h * sum(b*k for b, k in zip(_B5, kx))
+        i5 = integral + h * sum(b*k for b, k in zip(_B5, ki))
+        x4 = x + h * sum(b*k for b, k in zip(_B4, kx))
+        i4 = integral + h * sum(b*k for b, k in zip(_B4, ki))
+        err = max(abs(x5 - x4) / (self.atol + self.rtol * max(abs(x), abs(x5))),
+                  abs(i5 - i4) / (self.atol + self.rtol * max(abs(integral), abs(i5))))
+        return x5, i5, err
+
+    def integrate(self, f, x, integral, dt, limit_min, limit_max):
+        t = 0.0
+        h = min(self.h or dt, dt)
+        while t < dt:
+            h = min(h, dt - t)
+            x_new, i_new, err = self.single_step(f, x, integral, h)
+            if err > 1:
+                # шаг отклонён: уменьшение по оценке погрешности
+                h *= max(0.2, 0.9 * err ** -0.2)
+                continue
+            if not limit_min < x_new < limit_max:
+                x, integral, _ = self._locate_event(f, x, integral, h, limit_min, limit_max)
+                return x, integral, True
+            t += h
+            x, integral = x_new, i_new
+            self.h = h * min(5.0, 0.9 * err ** -0.2) if err > 0 else h * 5
+            h = self.h
+        return x, integral, False
+
+
+INTEGRATORS = {
+    'euler': EulerIntegrator,
+    'rk4': RK4Integrator,
+    'rk45': RK45Integrator,
+}
+
+
+def make_integrator(name='euler', **options):
+    if name not in INTEGRATORS:
+        raise ValueError(f"неизвестный интегратор: {name} (доступны: {', '.join(INTEGRATORS)})")
+    return INTEGRATORS[name](**options)
@@ -0,0 +1,150 @@
+# журнал действий оператора: компактные типизированные записи (время, код действия, статус),
+# таблица pandas собирается только по запросу (при сохранении отчёта или просмотре)
+from array import array
+from datetime import datetime
+from enum import IntEnum
+
+
+# столбцы таблицы отчёта
+REPORT_COLUMNS = ["Время", "Действие", "Статус действия"]
+
+
+class Action(IntEnum):
+    FEED_1_ON = 1
+    FEED_1_OFF = 2
+    FEED_2_ON = 3
+    FEED_2_OFF = 4
+    MIXING_ON = 5
+    MIXING_OFF = 6
+    DISCHARGE_ON = 7
+    DISCHARGE_OFF = 8
+    T_CONTROL_ON = 9
+    T_CONTROL_OFF = 10
+    P_CONTROL_ON = 11
+    P_CONTROL_OFF = 12
+    END = 13
+    # предупреждения (alarms.AlarmTable): статус - возникло или снято
+    V_LIMIT_LOW = 14
+    V_WARNING_LOW = 15
+    V_WARNING_HIGH = 16
+    V_LIMIT_HIGH = 17
+    T_LIMIT_LOW = 18
+    T_WARNING_LOW = 19
+    T_WARNING_HIGH = 20
+    T_LIMIT_HIGH = 21
+    P_LIMIT_LOW = 22
+    P_WARNING_LOW = 23
+    P_WARNING_HIGH = 24
+    P_LIMIT_HIGH = 25
+
+
+class Status(IntEnum):
+    DONE = 1
+    RAISED = 2
+    CLEARED = 3
+
+
+ACTION_TEXT = {
+    Action.FEED_1_ON: "Вкл. добавления первого реагента",
+    Action.FEED_1_OFF: "Выкл. добавления первого реагента",
+    Action.FEED_2_ON: "Вкл. добавления второго реагента",
+    Action.FEED_2_OFF: "Выкл. добавления второго реагента",
+    Action.MIXING_ON: "Вкл. перемешивание",
+    Action.MIXING_OFF: "Выкл. перемешивание",
+    Action.DISCHARGE_ON: "Вкл. слив",
+    Action.DISCHARGE_OFF: "Выкл. слив",
+    Action.T_CONTROL_ON: "Вкл. режим изменения Т",
+    Action.T_CONTROL_OFF: "Выкл. режим изменения Т",
+    Action.P_CONTROL_ON: "Вкл. режим изменения p",
+    Action.P_CONTROL_OFF: "Выкл. режим изменения p",
+    Action.END: "Остановка всех процессов. Завершение работы модели.",
+    Action.V_LIMIT_LOW: "Слишком низкий уровень",
+    Action.V_WARNING_LOW: "Низкий уровень",
+    Action.V_WARNING_HIGH: "Высокий уровень",
+    Action.V_LIMIT_HIGH: "Слишком высокий уровень",
+    Action.T_LIMIT_LOW: "Слишком низкая температура",
+    Action.T_WARNING_LOW: "Низкая температура",
+    Action.T_WARNING_HIGH: "Высокая температура",
+    Action.T_LIMIT_HIGH: "Слишком высокая температура",
+    Action.P_LIMIT_LOW: "Слишком низкое давление",
+    Action.P_WARNING_LOW: "Низкое давление",
+    Action.P_WARNING_HIGH: "Высокое давление",
+    Action.P_LIMIT_HIGH: "Слишком высокое давление",
+}
+
+STATUS_TEXT = {
+    Status.DONE: "Выполнено",
+    Status.RAISED: "Предупреждение возникло",
+    Status.CLEARED: "Предупреждение снято",
+}
+
+# органы управления (поля ReactorControls), переключения которых попадают в журнал
+CONTROL_ACTIONS = (
+    ('feed_1', Action.FEED_1_ON, Action.FEED_1_OFF),
+    ('feed_2', Action.FEED_2_ON, Action.FEED_2_OFF),
+    ('mixing', Action.MIXING_ON, Action.MIXING_OFF),
+    ('discharge', Action.DISCHARGE_ON, Action.DISCHARGE_OFF),
+    ('T_control', Action.T_CONTROL_ON, Action.T_CONTROL_OFF),
+    ('p_control', Action.P_CONTROL_ON, Action.P_CONTROL_OFF),
+)
+
+# (переменная, уровень предупреждения) -> действие журнала
+ALARM_ACTIONS = {
+    ('V', -2): Action.V_LIMIT_LOW, ('V', -1): Action.V_WARNING_LOW,
+    ('V', 1): Action.V_WARNING_HIGH, ('V', 2): Action.V_LIMIT_HIGH,
+    ('T', -2): Action.T_LIMIT_LOW, ('T', -1): Action.T_WARNING_LOW,
+    ('T', 1): Action.T_WARNING_HIGH, ('T', 2): Action.T_LIMIT_HIGH,
+    ('p', -2): Action.P_LIMIT_LOW, ('p', -1): Action.P_WARNING_LOW,
+    ('p', 1): Action.P_WARNING_HIGH, ('p', 2): Action.P_LIMIT_HIGH,
+}
+
+
+class EventJournal:
+    def __init__(self):
+        self.timestamps = array('d')  # время записи (секунды epoch)
+        self.actions = array('B')
+        self.statuses = array('B')
+        # последнее записанное состояние органов управления
+        self.last_controls = {name: False for name, _, _ in CONTROL_ACTIONS}
+
+    def __len__(self):
+        return len(self.actions)
+
+    def append(self, timestamp, action, status=Status.DONE):
+        self.timestamps.append(timestamp)
+        self.actions.append(action)
+        self.statuses.append(status)
+
+    # запись включений и выключений органов управления с прошлого вызова
+    def record_controls(self, controls, timestamp):
+        last = self.last_controls
+        for name, action_on, action_off in CONTROL_ACTIONS:
+            state = getattr(controls, name)
+            if state != last[name]:
+                self.append(timestamp, action_on if state else action_off)
+                last[name] = state
+
+    # смена уровня предупреждения: снятие прежнего и возникновение нового
+    def record_alarm(self, timestamp, name, old, new):
+        if old:
+            self.append(timestamp, ALARM_ACTIONS[name, old], Status.CLEARED)
+        if new:
+            self.append(timestamp, ALARM_ACTIONS[name, new], Status.RAISED)
+
+    # события таблицы предупреждений (alarms.AlarmTable) с прошлого вызова
+    def record_alarms(self, alarms, timestamp):
+        if not alarms.events:
+            return
+        for name, old, new in alarms.events:
+            self.record_alarm(timestamp, name, old, new)
+        alarms.events.clear()
+
+    # записи журнала в виде строк отчёта (время, текст действия, текст статуса)
+    def rows(self, start=0):
+        for i in range(start, len(self.actions)):
+            yield (datetime.fromtimestamp(self.timestamps[i]).strftime("%H:%M:%S"),
+                   ACTION_TEXT[self.actions[i]], STATUS_TEXT[self.statuses[i]])
+
+    def to_dataframe(self):
+        import pandas as pd
+        return pd.DataFrame(list(self.rows()), columns=REPORT_COLUMNS)
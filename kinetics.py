@@ -0,0 +1,144 @@
+# кинетика реакции reagent_1 + reagent_2 -> product в объёме реактора
+# скорость (моль/л/с): r = eta * k(T) * c_1 * c_2, k(T) = A * exp(-Ea / (R * T)) - закон Аррениуса,
+# eta - эффективность перемешивания (без мешалки реакция идёт медленно, с мешалкой - тем быстрее,
+# чем выше скорость мотора params['v']['mixing']); давление в жидкофазную реакцию не входит
+#
+# состояние - количества веществ, моль: подача и слив меняют их вместе с объёмом (add/remove),
+# реакция интегрируется неявным методом Розенброка ROS2 (W-метод, L-устойчивый, 2-й порядок):
+# при больших константах скорости система жёсткая, явный шаг устойчив только при очень малых dt
+# у одной реакции якобиан ранга 1 (J = NU * grad(r)^T), и W = I - gamma*h*J на векторах,
+# параллельных NU, сводится к делению на число; W собирается заново только при смене шага
+# или заметном изменении константы скорости и состава, в остальных шагах используется сохранённая
+# (для W-метода точный якобиан не нужен: порядок сохраняется при любом W)
+import math
+
+
+# параметры по умолчанию; задаются в params['kinetics']
+KINETICS = {
+    'feed_1': 1.0,          # концентрация реагента 1 в подаче, моль/л
+    'feed_2': 1.0,          # концентрация реагента 2 в подаче, моль/л
+    'A': 5e8,               # предэкспоненциальный множитель, л/(моль*с)
+    'Ea': 60000.0,          # энергия активации, Дж/моль
+    'mixing_half': 150.0,   # скорость мотора, при которой перемешивание даёт половину эффекта
+    'eta_idle': 0.05,       # эффективность без перемешивания
+    'rtol': 1e-4,
+    'atol': 1e-9,
+}
+R_GAS = 8.314
+GAMMA = 1 + 1 / math.sqrt(2)
+# стехиометрия (reagent_1, reagent_2, product)
+NU = (-1.0, -1.0, 1.0)
+# объём, меньше которого реакция не считается, л
+V_MIN = 1e-9
+# W пересобирается, если константа скорости или сумма реагентов изменилась больше, чем на эту долю
+REFRESH_TOL = 0.05
+# и не реже, чем раз в столько шагов
+MAX_AGE = 200
+
+
+def rate_constant(T, A, Ea):
+    return A * math.exp(-Ea / (R_GAS * (T + 273.15)))
+
+
+def mixing_efficiency(mixing, speed, half, idle):
+    if not mixing:
+        return idle
+    return idle + (1 - idle) * speed / (speed + half)
+
+
+class Kinetics:
+    def __init__(self, params):
+        options = dict(KINETICS, **params.get('kinetics', {}))
+        self.feed = (options['feed_1'], options['feed_2'])
+        self.A, self.Ea = options['A'], options['Ea']
+        self.mixing_half, self.eta_idle = options['mixing_half'], options['eta_idle']
+        self.rtol, self.atol = options['rtol'], options['atol']
+        self.n = [0.0, 0.0, 0.0]
+        self.h = None       # шаг, предложенный после последнего принятого шага
+        # сохранённая W: (h, kappa, сумма реагентов, множитель q, возраст)
+        self.w = None
+        self.steps = 0
+        self.rejected = 0
+        self.factorizations = 0
+
+    # подача volume л реагента index (0 или 1)
+    def add(self, index, volume):
+        self.n[index] += self.feed[index] * volume
+
+    # слив доли share объёма (состав сливаемой жидкости равен составу в реакторе)
+    def remove(self, share):
+        keep = 1 - share
+        self.n = [amount * keep for amount in self.n]
+
+    def concentrations(self, V):
+        if V < V_MIN:
+            return 0.0, 0.0, 0.0
+        return self.n[0] / V, self.n[1] / V, self.n[2] / V
+
+    # превращение реагента 1 (ограничивающего при равных подачах), доля поданного количества
+    def conversion(self):
+        total = self.n[0] + self.n[2]
+        return self.n[2] / total if total > 0 else 0.0
+
+    # реакция за время duration при постоянных объёме V (л), температуре T (°C) и перемешивании
+    def react(self, duration, V, T, mixing, speed):
+        if V < V_MIN or duration <= 0:
+            return
+        # dn/dt = NU * kappa * n_1 * n_2, kappa = eta * k(T) / V
+        kappa = mixing_efficiency(mixing, speed, self.mixing_half, self.eta_idle) \
+            * rate_constant(T, self.A, self.Ea) / V
+        if kappa * self.n[0] * self.n[1] == 0:
+            return
+        t = 0.0
+        h = min(self.h or duration, duration)
+        while duration - t > 1e-12 * duration:
+            h = min(h, duration - t)
+            n, err = self._step(h, kappa)
+            if err > 1:
+                self.rejected += 1
+                h /= 2
+                continue
+            self.n = n
+            self.steps += 1
+            t += h
+            # локальная ошибка ~ h^3: при запасе в 8 раз шаг удваивается (шаги остаются
+            # в ряду h * 2^k, и сохранённая W чаще подходит)
+            if err < 0.125:
+                h *= 2
+        self.h = h
+
+    # W^-1 на векторе, параллельном NU, - умножение на q = 1 / (1 + gamma*h*kappa*(n_1 + n_2))
+    def _factor(self, h, kappa):
+        n_1, n_2 = self.n[0], self.n[1]
+        w = self.w
+        if w is not None and w[0] == h and w[4] < MAX_AGE \
+                and abs(kappa - w[1]) <= REFRESH_TOL * w[1] \
+                and abs(n_1 + n_2 - w[2]) <= REFRESH_TOL * w[2]:
+            self.w = w[:4] + (w[4] + 1,)
+            return w[3]
+        q = 1 / (1 + GAMMA * h * kappa * (n_1 + n_2))
+        self.w = (h, kappa, n_1 + n_2, q, 0)
+        self.factorizations += 1
+        return q
+
+    # шаг ROS2: W k1 = h f(n), W k2 = h f(n + k1) - 2 k1, n' = n + 1.5 k1 + 0.5 k2;
+    # оценка ошибки - разность с методом 1-го порядка n + k1
+    # f, k1 и k2 параллельны NU, поэтому шаг считается для глубины реакции (моль) - скаляра
+    def _step(self, h, kappa):
+        q = self._factor(h, kappa)
+        n_1, n_2, n_p = self.n
+        k1 = q * h * kappa * n_1 * n_2
+        m_1, m_2 = n_1 - k1, n_2 - k1
+        k2 = q * (h * kappa * m_1 * m_2 - 2 * k1) if m_1 > 0 and m_2 > 0 else -2 * q * k1
+        # количества не становятся отрицательными, баланс масс сохраняется точно
+        extent = 1.5 * k1 + 0.5 * k2
+        least = n_1 if n_1 < n_2 else n_2
+        if extent > least:
+            extent = least
+        # допуск - по наименьшему из количеств (из прежнего и нового значения берётся большее)
+        if extent >= 0:
+            smallest = least if least < n_p + extent else n_p + extent
+        else:
+            smallest = least - extent if least - extent < n_p else n_p
+        scale = self.atol + self.rtol * smallest
+        return [n_1 - extent, n_2 - extent, n_p + extent], abs(0.5 * (k1 + k2)) / scale
@@ -1,122 +1,25 @@
-from PyQt6 import uic, QtWidgets
-from PyQt6.QtWidgets import QApplication, QWidget, QVBoxLayout
+import time
+STARTUP_T0 = time.perf_counter()  # начало отсчёта времени запуска (python main.py --startup-time)
+from PyQt6.QtWidgets import QApplication, QWidget, QVBoxLayout, QLabel, QMessageBox
 from PyQt6.QtCore import QTimer
+from PyQt6.QtGui import QShortcut, QKeySequence
 from datetime import datetime
 import sys
 import os
-import pandas as pd
-from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
-from matplotlib.figure import Figure
 from wind_params import save_params
-
-
-# базовый класс графиков
-class BaseGraph(FigureCanvas):
-    def __init__(self, parent=None, width=5, height=4, dpi=100):
-        self.fig = Figure(figsize=(width, height), dpi=dpi)
-        self.axes = self.fig.add_subplot(111)
-        FigureCanvas.__init__(self, self.fig)
-        self.setParent(parent)
-        
-        self.xdata = []
-        self.lines = []
-        self.data_sets = []
-        self.line_styles = []  # Сохраняем стили линий
-        
-        grid_color = '#b0b0b0'
-        self.axes.grid(True, color=grid_color)
-        for spine in self.axes.spines.values():
-            spine.set_color(grid_color)
-    
-    def update_figure(self):
-        for line, data in zip(self.lines, self.data_sets):
-            line.set_data(self.xdata, data)
-        if self.xdata:
-            self.axes.set_xlim(0, max(self.xdata) + 1)
-            all_data = [item for sublist in self.data_sets for item in sublist]
-            self.axes.set_ylim(min(all_data) - 1, max(all_data) + 1)
-        self.draw()
-    
-    def clear_data(self):
-        self.xdata = []
-        for data in self.data_sets:
-            data.clear()
-        self.axes.cla()
-        self.axes.grid(True, color='#b0b0b0')
-        # Пересоздание линий с сохранением стилей
-        self.lines = [self.axes.plot([], [], color=style['color'], linestyle=style['linestyle'])[0] for style in self.line_styles]
-        self.draw()
-
-    def add_line(self, color, style='-'):
-        line, = self.axes.plot([], [], color=color, linestyle=style)
-        self.lines.append(line)
-        self.data_sets.append([])
-        self.line_styles.append({'color': color, 'linestyle': style})
-        
-# класс графика температуры
-class DynamicGraph(BaseGraph):
-    def __init__(self, parent=None):
-        super().__init__(parent)
-        self.add_line('r', '-')
-        self.add_line('b', '--')
-
-    def update_figure(self, x, temp, ideal_temp):
-        self.xdata.append(x)
-        self.data_sets[0].append(temp)
-        self.data_sets[1].append(ideal_temp)
-        super().update_figure()
-
-# класс графика объёмов
-class MultiVariableGraph(BaseGraph):
-    def __init__(self, parent=None):
-        super().__init__(parent)
-        self.add_line('g', '-')
-        self.add_line('b', '-')
-        self.add_line('r', '--')
-
-    def update_figure(self, x, V1, V2, V):
-        self.xdata.append(x)
-        self.data_sets[0].append(V2)
-        self.data_sets[1].append(V)
-        self.data_sets[2].append(V1)
-        super().update_figure()
-
-# класс графика давления
-class PGraph(BaseGraph):
-    def __init__(self, parent=None):
-        super().__init__(parent)
-        self.add_line('r', '-')
-        self.add_line('b', '--')
-
-    def update_figure(self, x, pressure, ideal_pressure):
-        self.xdata.append(x)
-        self.data_sets[0].append(pressure)
-        self.data_sets[1].append(ideal_pressure)
-        super().update_figure()
-
-# класса ПИД контроллера (температуры и давления)
-class PIDController:
-    def __init__(self, kp, ki, kd, set_point):
-        self.Kp = kp
-        self.Ki = ki
-        self.Kd = kd
-        self.set_point = set_point
-        self.integral = 0
-        self.previous_error = 0
-
-    def update(self, current_temperature, dt):
-        error = self.set_point - current_temperature
-        self.integral += error * dt
-        derivative = (error - self.previous_error) / dt
-        output = self.Kp * error + self.Ki * self.integral + self.Kd * derivative
-        self.previous_error = error
-        return output
-
-
-
-# Загрузка интерфейсов для двух окон
-Form1, Window1 = uic.loadUiType("param.ui")
-Form2, Window2 = uic.loadUiType("model.ui")
+from reactor_model import ReactorModel, ReactorControls
+from journal import EventJournal
+from report_sink import ReportSink, report_path
+from ui_cache import load_ui_type
+from tick_stats import TickStats
+from sim_clock import FRAME_MS
+from sim_worker import SimulationWorker
+from widget_binding import WidgetBinder
+
+
+# Загрузка интерфейса первого окна (форма второго окна, matplotlib, pandas и numpy
+# загружаются только при открытии окна модели или сохранении отчёта)
+Form1, Window1 = load_ui_type("param.ui")
 first_window = None
 second_window = None
 
@@ -143,14 +46,65 @@ def open_first_window(app):
 
 
 
-# во втором окне пользователь работает с реактором
-def open_second_window(app, params):
-    global second_window, form, pid_controller_T, pid_controller_p
+# окно модели по контрольной точке (python main.py --restore Reports/<exp>.ckpt): параметры, состояние
+# реактора, органы управления и журнал - из контрольной точки; продолжение пишется в новые файлы отчёта
+# (<exp>_2, <exp>_3, ...), прежние не перезаписываются
+def open_restored_window(app, path):
+    global params
+    from checkpoint import load_checkpoint
+    restored = load_checkpoint(path)
+    params = restored[0].params
+    name, number = params['name']['exp'], 2
+    while os.path.exists(report_path(params, '.csv')):
+        params['name']['exp'] = f'{name}_{number}'
+        number += 1
+    open_second_window(app, params, restored)
+
+
+# во втором окне пользователь работает с реактором;
+# restored - (модель, органы управления, журнал) из контрольной точки
+def open_second_window(app, params, restored=None):
+    global second_window, form, model, journal
     global timer, graph_update_timer, v_time
+    from graphs import DynamicGraph, MultiVariableGraph, PGraph, render_graphs
+    from telemetry import TelemetryRecorder
+    Form2, Window2 = load_ui_type("model.ui")
     second_window = Window2()
     form = Form2()
     form.setupUi(second_window)
     
+    # модель реактора
+    if restored is None:
+        model, controls = ReactorModel(params), ReactorControls()
+    else:
+        model, controls, journal = restored
+    # виджеты нового окна: прежние показанные значения недействительны
+    ui.invalidate()
+    # потоковая запись отчёта в Reports/<exp>.csv
+    global report_sink
+    report_sink = ReportSink(report_path(params, '.csv'))
+    # телеметрия каждого такта в Reports/<exp>.tlm
+    global telemetry
+    telemetry = TelemetryRecorder(report_path(params, '.tlm'))
+    # модель работает в отдельном потоке (запускается в конце настройки окна), окно показывает
+    # снимки её состояния, изменения органов управления и параметров отправляются через очередь
+    global sim_worker, snapshot, form_controls
+    sim_worker = SimulationWorker(model, controls, journal, telemetry, report_sink)
+    snapshot = sim_worker.latest
+    form_controls = {}
+    # чекбоксы окна - по органам управления модели (после восстановления они могут быть включены)
+    write_controls(snapshot)
+    # корпус, уровень, мешалка и змеевик рисует один виджет на месте метки корпуса
+    # (краны остаются метками поверх него)
+    global vessel
+    from vessel_widget import ReactorVessel
+    vessel = ReactorVessel(form.label.parentWidget())
+    vessel.setGeometry(form.label.geometry())
+    vessel.stackUnder(form.label_3)
+    for label in (form.label, form.label_5, form.label_6, form.label_7, form.label_46):
+        label.hide()
+    vessel.show()
+    
     # Настройка названий вещества:
     form.label_15.setText(params['name']['reagent_1'])
     form.label_16.setText(params['name']['reagent_2'])
@@ -174,7 +128,7 @@ def open_second_window(app, params):
     form.dial_3.valueChanged.connect(lambda value: form.label_39.setText(str(value)))
 
     def update_reagent_1(value):
-        params['v']['reagent_1'] = value
+        sim_worker.set_param('v', 'reagent_1', value)
     form.dial_3.valueChanged.connect(update_reagent_1)
     
     form.label_41.setText(str(int(form.dial_3.value()/params['v']['reagent_max']*100))+'%')
@@ -189,7 +143,7 @@ def open_second_window(app, params):
     form.dial_4.valueChanged.connect(lambda value: form.label_40.setText(str(value)))
 
     def update_reagent_2(value):
-        params['v']['reagent_2'] = value
+        sim_worker.set_param('v', 'reagent_2', value)
     form.dial_4.valueChanged.connect(update_reagent_2)
     
     form.label_42.setText(str(int(form.dial_4.value()/params['v']['reagent_max']*100))+'%')
@@ -204,7 +158,7 @@ def open_second_window(app, params):
     form.dial_5.valueChanged.connect(lambda value: form.label_43.setText(str(value)))
 
     def update_discharge(value):
-        params['v']['discharge'] = value
+        sim_worker.set_param('v', 'discharge', value)
     form.dial_5.valueChanged.connect(update_discharge)
     
     form.label_44.setText(str(int(form.dial_5.value()/params['v']['discharge_max']*100))+'%')
@@ -219,7 +173,7 @@ def open_second_window(app, params):
     form.dial_6.valueChanged.connect(lambda value: form.label_53.setText(str(value)))
 
     def update_v_mixing(value):
-        params['v']['mixing'] = value
+        sim_worker.set_param('v', 'mixing', value)
     form.dial_6.valueChanged.connect(update_v_mixing)
     
     form.label_54.setText('v = '+str(int(form.dial_6.value()/params['v']['mixing_max']*100))+'%')
@@ -227,29 +181,29 @@ def open_second_window(app, params):
     
     
     # Настройка температуры:
-    form.label_56.setText(str(round(params['T']['ambient'], 1))+' °C')
+    form.label_56.setText(format_T(params['T']['ambient']))
     form.doubleSpinBox.setMinimum(params['T']['limit_min'])
     form.doubleSpinBox.setMaximum(params['T']['limit_max'])
     form.doubleSpinBox.setValue(params['T']['ideal'])
     def update_T_ideal(value):
-        params['T']['ideal'] = value
+        sim_worker.set_param('T', 'ideal', value)
     form.doubleSpinBox.valueChanged.connect(update_T_ideal)
     
     
     # Настройка давления:
-    form.label_58.setText(str(round(params['p']['atmosphere'], 2))+' атм')
+    form.label_58.setText(format_p(params['p']['atmosphere']))
     form.doubleSpinBox_2.setMinimum(params['p']['limit_min'])
     form.doubleSpinBox_2.setMaximum(params['p']['limit_max'])
     form.doubleSpinBox_2.setValue(params['p']['ideal'])
     def update_p_ideal(value):
-        params['p']['ideal'] = value
+        sim_worker.set_param('p', 'ideal', value)
     form.doubleSpinBox_2.valueChanged.connect(update_p_ideal)
     
     
     # Инициализация и настройка виджета графика температуры
     global dynamic_graph
     plot_widget = second_window.findChild(QWidget, 'plotWidget')  # Найдите ваш plotWidget
-    dynamic_graph = DynamicGraph(parent=plot_widget)
+    dynamic_graph = DynamicGraph(parent=plot_widget, blit=True, deferred=True)
     plot_widget_layout = QVBoxLayout()  # Создайте новый QVBoxLayout
     plot_widget_layout.addWidget(dynamic_graph)
     plot_widget.setLayout(plot_widget_layout)
@@ -258,7 +212,7 @@ def open_second_window(app, params):
     # Инициализация и настройка виджета графика объёма
     global multi_variable_graph
     plot_widget_2 = second_window.findChild(QWidget, 'plotWidget_2')
-    multi_variable_graph = MultiVariableGraph(parent=plot_widget_2)
+    multi_variable_graph = MultiVariableGraph(parent=plot_widget_2, blit=True, deferred=True)
     plot_widget_2_layout = QVBoxLayout()
     plot_widget_2_layout.addWidget(multi_variable_graph)
     plot_widget_2.setLayout(plot_widget_2_layout)
@@ -267,7 +221,7 @@ def open_second_window(app, params):
     # Инициализация и настройка виджета графика объёма
     global p_graph
     plot_widget_3 = second_window.findChild(QWidget, 'plotWidget_3')
-    p_graph = PGraph(parent=plot_widget_3)
+    p_graph = PGraph(parent=plot_widget_3, blit=True, deferred=True)
     plot_widget_3_layout = QVBoxLayout()
     plot_widget_3_layout.addWidget(p_graph)
     plot_widget_3.setLayout(plot_widget_3_layout)
@@ -275,25 +229,71 @@ def open_second_window(app, params):
     
     
     # Настройка таймера для обновления графиков раз в половину секунды
+    # (шаг по оси времени графиков - модельное время с прошлого обновления; отсчёт - от времени модели
+    # при открытии окна: после --restore графики продолжаются со времени контрольной точки)
+    global time_elapsed, time_elapsed_V, time_elapsed_p, graph_last_time
+    graph_last_time = snapshot.state.time
+    time_elapsed = time_elapsed_V = time_elapsed_p = graph_last_time
     graph_update_timer = QTimer(second_window) 
+    graph_update_timer.timeout.connect(update_graph_time)
     graph_update_timer.timeout.connect(update_graph)
     graph_update_timer.timeout.connect(update_multi_graph)
     graph_update_timer.timeout.connect(update_p_graph)
+    graph_update_timer.timeout.connect(lambda: render_graphs((dynamic_graph, multi_variable_graph, p_graph)))
     graph_update_timer.start(500)
     
-    # Настройка таймера для более быстрого обновления остального функционала 
+    # Настройка таймера для более быстрого обновления остального функционала:
+    # окно обновляется раз в FRAME_MS по последнему снимку модели
+    # (шаги модели выполняет поток модели с учётом скорости модели)
+    sim_worker.set_speed(v_time)
     timer = QTimer(second_window)
     timer.timeout.connect(update_current_time)
-    timer.start(10) 
-    
-    # обновление таймера при изменении слайдера скорости модели:
-    def update_timer_interval():
-        global timer, graph_update_timer, v_time
-        timer.start(int(10 / v_time))
-        graph_update_timer.start(int(500 / v_time))
-    form.verticalSlider.valueChanged.connect(update_timer_interval)
-    
-    
+    timer.start(FRAME_MS) 
+    
+    # замеры тактов: F12 - показать/скрыть сводку (замеры идут, пока она видна),
+    # при закрытии сводка сохраняется в Reports/<exp>_ticks.json; REACTOR_TICK_STATS=1 - включить сразу
+    global tick_stats, tick_stats_overlay
+    tick_stats = TickStats(FRAME_MS, enabled=bool(os.environ.get('REACTOR_TICK_STATS')))
+    sim_worker.set_stats_enabled(tick_stats.enabled)
+    tick_stats_overlay = QLabel(second_window)
+    tick_stats_overlay.setStyleSheet('background-color: rgba(255, 255, 255, 220); font-family: monospace;')
+    tick_stats_overlay.move(10, 10)
+    tick_stats_overlay.setVisible(tick_stats.enabled)
+    def toggle_tick_stats():
+        enabled = not tick_stats.enabled
+        if not enabled and tick_stats.ticks:
+            tick_stats.dump(report_path(params, '_ticks.json'))
+        tick_stats.set_enabled(enabled)
+        sim_worker.set_stats_enabled(enabled)
+        tick_stats_overlay.setVisible(enabled)
+    QShortcut(QKeySequence('F12'), second_window).activated.connect(toggle_tick_stats)
+    
+    # F5 - сохранить контрольную точку в Reports/<exp>.ckpt (при закрытии окна сохраняется автоматически)
+    QShortcut(QKeySequence('F5'), second_window).activated.connect(
+        lambda: sim_worker.save_checkpoint(report_path(params, '.ckpt')))
+    def update_tick_stats_overlay():
+        if tick_stats.enabled:
+            tick_stats_overlay.setText('окно: ' + tick_stats.overlay_text() +
+                                       '\nмодель: ' + (sim_worker.stats_text or 'нет данных'))
+            tick_stats_overlay.adjustSize()
+            tick_stats_overlay.raise_()
+    graph_update_timer.timeout.connect(update_tick_stats_overlay)
+    
+    # сервер состояния и управления для внешних программ (--serve АДРЕС или REACTOR_SERVE)
+    global control_server
+    address = serve_address or os.environ.get('REACTOR_SERVE')
+    if address:
+        from control_server import ControlServer
+        control_server = ControlServer(address).start()
+        sim_worker.server = control_server
+    
+    # изменение скорости модели слайдером (интервалы таймеров окна не меняются):
+    def update_sim_speed(value):
+        sim_worker.set_speed(value)
+    form.verticalSlider.valueChanged.connect(update_sim_speed)
+    
+    
+    sim_worker.start()
     second_window.show()
 
 
@@ -301,302 +301,201 @@ def open_second_window(app, params):
 
 
 
-start = True
-V_1, V_2, V = 0, 0, 0
-T, p = None, None
-time_elapsed, time_elapsed_V, time_elapsed_p = None, None, None
-ind_V = -1
-ind_T, ind_p = 0, 0
-ind_T_block, ind_p_block, timer_active = False, False, False
-ind_add_reagent_1, ind_add_reagent_2, ind_mix, ind_discharge, ind_logic_T, ind_logic_p, ind_end = False, False, False, False, False, False, False
-
-
-# слот для обработки событий быстрого таймера
+# тексты предупреждений: уровень (alarms) -> (текст метки, показать жёлтый значок, показать красный значок)
+V_WARNINGS = {
+    -2: ('Слишком низкий уровень! \nИспользование реактора невозможно.', False, True),
+    -1: ('Низкий уровень! \nИспользование реактора не рекомендуется.', True, False),
+    0: ('Приемлимый уровень! \nИспользование реактора разрешено.', False, False),
+    1: ('Высокий уровень! \nИспользование реактора не рекомендуется.', True, False),
+    2: ('Слишком высокий уровень! \nИспользование реактора невозможно.', False, True),
+}
+T_WARNINGS = {
+    -2: ('Слишком низкая температура! \nИспользование реактора невозможно.', False, True),
+    -1: ('Низкая температура! \nИспользование реактора не рекомендуется.', True, False),
+    0: ('Приемлимая температура! \nИспользование реактора разрешено.', False, False),
+    1: ('Высокая температура! \nИспользование реактора не рекомендуется.', True, False),
+    2: ('Слишком высокая температура! \nИспользование реактора невозможно.', False, True),
+}
+P_WARNINGS = {
+    -2: ('Слишком низкое давление! \nИспользование реактора невозможно.', False, True),
+    -1: ('Низкое давление! \nИспользование реактора не рекомендуется.', True, False),
+    0: ('Приемлимое давление! \nИспользование реактора разрешено.', False, False),
+    1: ('Высокое давление! \nИспользование реактора не рекомендуется.', True, False),
+    2: ('Слишком высокое давление! \nИспользование реактора невозможно.', False, True),
+}
+
+
+def show_warning(text_label, warn_label, block_label, warning):
+    text, warn, block = warning
+    ui.set_text(text_label, text)
+    ui.set_visible(warn_label, warn)
+    ui.set_visible(block_label, block)
+
+
+# подписи температуры и давления - одинаковые при настройке окна и в каждом кадре
+def format_T(T):
+    return str(round(T, 1))+' °C'
+
+
+def format_p(p):
+    return str(round(p, 2))+' атм'
+
+
+model = None
+sim_worker = None
+snapshot = None
+# органы управления в том виде, в каком они показаны чекбоксами окна
+form_controls = {}
+
+
+# чтение состояния чекбоксов окна: изменения пользователя отправляются модели
+def read_controls():
+    values = {'feed_1': form.checkBox.isChecked(),
+              'feed_2': form.checkBox_2.isChecked(),
+              'discharge': form.checkBox_3.isChecked(),
+              'T_control': form.checkBox_4.isChecked(),
+              'mixing': form.checkBox_5.isChecked(),
+              'p_control': form.checkBox_7.isChecked()}
+    changes = {name: value for name, value in values.items() if form_controls.get(name) != value}
+    # сброс таймера - однократная команда (чекбокс снимается в render_frame)
+    reset_timer = form.checkBox_10.isChecked()
+    if reset_timer:
+        changes['reset_timer'] = True
+    if changes:
+        form_controls.update(changes)
+        sim_worker.set_controls(changes)
+    return reset_timer
+
+
+# возврат автоматических отключений модели в чекбоксы окна (только когда модель применила
+# все отправленные изменения, иначе снимок ещё не знает о последних действиях пользователя)
+def write_controls(snapshot):
+    if snapshot.applied != sim_worker.sent:
+        return
+    c = snapshot.controls
+    form.checkBox.setChecked(c.feed_1)
+    form.checkBox_2.setChecked(c.feed_2)
+    form.checkBox_3.setChecked(c.discharge)
+    form.checkBox_4.setChecked(c.T_control)
+    form.checkBox_5.setChecked(c.mixing)
+    form.checkBox_7.setChecked(c.p_control)
+    form_controls.update(feed_1=c.feed_1, feed_2=c.feed_2, discharge=c.discharge,
+                         T_control=c.T_control, mixing=c.mixing, p_control=c.p_control)
+
+
+# слот для обработки событий быстрого таймера (кадр окна модели)
 def update_current_time():
-    global form, df_rep, V_1, V_2, V, T, params, start, time_elapsed, time_elapsed_V, time_elapsed_p, ind_V, ind_T, ind_T_block, ind_p, ind_p_block
+    global form, params, snapshot
+    # поток модели остановился с ошибкой: окно перестаёт обновляться и сообщает об ошибке
+    error = sim_worker.failure()
+    if error is not None:
+        show_worker_error(error)
+        return
+    tick_stats.begin()
+    # команды внешних клиентов применяются к виджетам, изменения уходят модели вместе с действиями пользователя
+    if control_server is not None:
+        from control_server import apply_to_form
+        for changes in control_server.take_commands():
+            apply_to_form(form, changes)
+    reset_timer = read_controls()
+    snapshot = sim_worker.latest
+    tick_stats.mark('snapshot')
+    write_controls(snapshot)
+    render_frame(reset_timer)
+    tick_stats.end()
     
-    if start:
-        time_elapsed_V=0
-        time_elapsed_p=0
+    # сохранить и закрыть
+    if form.checkBox_12.isChecked():
+        # поток модели сохраняет контрольную точку, записывает завершение работы, дописывает отчёт
+        # и закрывает телеметрию
+        sim_worker.stop(report_path(params, '_model_ticks.json'), report_path(params, '.ckpt'))
+        # сохранение данных (.xlsx и показатели качества регулирования по телеметрии собираются в фоне,
+        # окно закрывается сразу)
+        report_sink.export_excel(report_path(params), report_path(params, '.tlm'))
+        if tick_stats.ticks:
+            tick_stats.dump(report_path(params, '_ticks.json'))
+        if control_server is not None:
+            control_server.stop()
+        # закрытие окна
+        second_window.close()
+        QApplication.instance().quit()
+
+
+# обновление окна по текущему состоянию модели
+# ошибка потока модели: таймеры окна останавливаются, текст ошибки - в строке состояния и в сообщении
+# (сообщение не блокирует цикл событий, окно можно закрыть)
+def show_worker_error(error):
+    global worker_error_box
+    timer.stop()
+    graph_update_timer.stop()
+    text = f'Модель остановлена из-за ошибки: {type(error).__name__}: {error}'
+    form.statusbar.showMessage(text)
+    worker_error_box = QMessageBox(QMessageBox.Icon.Critical, 'Ошибка модели', text,
+                                   QMessageBox.StandardButton.Ok, second_window)
+    worker_error_box.open()
+
+
+def render_frame(reset_timer=False):
+    global form, params
+    s = snapshot.state
+    controls = snapshot.controls
     
     # Обновление метки текущего времени
     current_time = datetime.now().strftime("%H:%M:%S")
-    form.label_45.setText(current_time)  
-    
-    # Обновление метки времени с начала работы)
-    global elapsed_time, timer_active
-    if (form.checkBox.isChecked() or form.checkBox_2.isChecked() or 
-        form.checkBox_3.isChecked() or form.checkBox_4.isChecked() or 
-        form.checkBox_5.isChecked() or form.checkBox_7.isChecked()) and not timer_active:
-        elapsed_time = 0
-        timer_active = True
-    if timer_active:
-        elapsed_time += 10  # увеличиваем времени на 10 мс каждый вызов функции
-        seconds = int(elapsed_time / 1000)
-        form.label_55.setText(f"{seconds // 3600:02}:{(seconds // 60) % 60:02}:{seconds % 60:02}")
-    if form.checkBox_10.isChecked():
-        timer_active = False
+    ui.set_text(form.label_45, current_time)
+    V_reactor = params['V']['reactor']
+    
+    # Обновление метки времени с начала работы
+    if s.timer_active:
+        seconds = int(s.elapsed_time / 1000)
+        ui.set_text(form.label_55, f"{seconds // 3600:02}:{(seconds // 60) % 60:02}:{seconds % 60:02}")
+    if reset_timer:
         form.checkBox_10.setChecked(False)
-        form.label_55.setText('00:00:00')
-    
+        ui.set_text(form.label_55, '00:00:00')
     
-    # Обновление объемов (залив реагентов)
-    v_reagent_1 = params['v']['reagent_1'] / 6000
-    v_reagent_2 = params['v']['reagent_2'] / 6000
-    if form.checkBox.isChecked() and (V+v_reagent_1)/params['V']['reactor']*100 < 100:
-        V_1 += v_reagent_1
-        V += v_reagent_1
-        form.label_3.show()
-    else:
-        form.checkBox.setChecked(False)
-        form.label_3.hide()
-    if form.checkBox_2.isChecked() and (V+v_reagent_2)/params['V']['reactor']*100 < 100:
-        V_2 += v_reagent_2
-        V += v_reagent_2
-        form.label_9.show()
-    else:
-        form.checkBox_2.setChecked(False)
-        form.label_9.hide()
-    
-    # Обновление объемов (слив реагентов)
-    v_discharge= params['v']['discharge'] / 6000
-    if form.checkBox_3.isChecked():
-        form.label_8.show()
-        if (V-v_discharge)/params['V']['reactor']*100 > 0:
-            V_1 -= V_1/V*v_discharge
-            V_2 -= V_2/V*v_discharge
-            V -= v_discharge
-    else:
-        form.label_8.hide()
+    # краны подачи и слива
+    ui.set_visible(form.label_3, controls.feed_1)
+    ui.set_visible(form.label_9, controls.feed_2)
+    ui.set_visible(form.label_8, controls.discharge)
     
     # Предупреждения по V
-    if V/params['V']['reactor']*100 < params['V']['reacror_limit_min']:
-        form.label_35.setText('Слишком низкий уровень! \nИспользование реактора невозможно.')
-        form.label_33.hide()
-        form.label_36.show()
-        ind_V=-1
-    elif V/params['V']['reactor']*100 < params['V']['reacror_warning_min']:
-        form.label_35.setText('Низкий уровень! \nИспользование реактора не рекомендуется.')
-        form.label_33.show()
-        form.label_36.hide()
-        ind_V=0
-    elif V/params['V']['reactor']*100 > params['V']['reacror_limit_max']:
-        form.label_35.setText('Слишком высокий уровень! \nИспользование реактора невозможно.')
-        form.label_33.hide()
-        form.label_36.show()
-        ind_V=-1
-    elif V/params['V']['reactor']*100 > params['V']['reacror_warning_max']:
-        form.label_35.setText('Высокий уровень! \nИспользование реактора не рекомендуется.')
-        form.label_33.show()
-        form.label_36.hide()
-        ind_V=0
-    else:
-        form.label_35.setText('Приемлимый уровень! \nИспользование реактора разрешено.')
-        form.label_33.hide()
-        form.label_36.hide()
-        ind_V=1
+    show_warning(form.label_35, form.label_33, form.label_36, V_WARNINGS[s.level_V])
     
 
-    # Визуализация изменений уровня внутри реактора (изменение геометрии label_7 в зависимости от V(%))
-    new_y = 396 - (272 - 3) * (V / params['V']['reactor'])
-    new_height = 3 + (272 - 3) * (V / params['V']['reactor'])
-    form.label_7.setGeometry(836, int(new_y), 138, int(new_height))  # Предположительные x и width
+    # Визуализация изменений уровня внутри реактора
+    vessel.set_fill(s.V / V_reactor)
 
     # Обновление инфы о заполненности:
-    if V > params['V']['reactor']*0.01:
-        form.label_47.setText(str(int(V))+' л ('+str(int(V/params['V']['reactor']*100))+' %)')
-        form.label_49.setText(str(int(V_1/V*100))+' %')
-        form.label_51.setText(str(int(V_2/V*100))+' %')
-        form.progressBar.setValue(int(V/params['V']['reactor']*100))
-    else:
-        form.label_47.setText(str(int(V))+' л ('+str(int(V/params['V']['reactor']*100))+' %)')
-        form.label_49.setText('0 %')
-        form.label_51.setText('0 %')
-        form.progressBar.setValue(int(V/params['V']['reactor']*100))
-    
-    
-    # Перемешивание (работа мотора) (циклическое изменение размеров метки с изображением мотора)
-    v_mixing = params['v']['mixing'] / 20
-    if form.checkBox_5.isChecked() and (ind_V != -1 and ind_T not in (-2,2)):
-        label_46_width = form.label_46.property('width') or 90
-        label_46_x = form.label_46.property('x') or 860
-        expanding = form.label_46.property('expanding') or False
-        width_change = 2 * v_mixing
-        x_change = 1 * v_mixing
-        if expanding:
-            label_46_width += width_change
-            label_46_x -= x_change
-        else:
-            label_46_width -= width_change
-            label_46_x += x_change
-        # центрирование метки
-        label_46_center = 860 + 45
-        label_46_x = label_46_center - label_46_width // 2
-        if label_46_width <= 1:
-            expanding = True
-        elif label_46_width >= 90:
-            expanding = False
-        # реализация вращения мотрора
-        form.label_46.setGeometry(int(label_46_x), 310, int(label_46_width), 61)
-        form.label_46.setProperty('width', label_46_width)
-        form.label_46.setProperty('x', label_46_x)
-        form.label_46.setProperty('expanding', expanding)
-    elif ind_V == -1 or ind_T in (-2,2):
-        form.checkBox_5.setChecked(False)
-        form.label_46.setGeometry(860, 310, 90, 61)
-        form.label_46.setProperty('width', 90)
-        form.label_46.setProperty('x', 860)
-        form.label_46.setProperty('expanding', False)
-    else:
-        form.label_46.setGeometry(860, 310, 90, 61)
-        form.label_46.setProperty('width', 90)
-        form.label_46.setProperty('x', 860)
-        form.label_46.setProperty('expanding', False)
-    
-    
-    # ПИД-контроллер температуры
-    global pid_controller_T, dt, T_id, dynamic_graph, time_elapsed
-    if start:
-        T = params['T']['ambient']
-        T_id = params['T']['ideal']
-        pid_controller_T = PIDController(kp=0.5, ki=0.1, kd=0.01, set_point=T_id)
-        dt = 0.005
-        time_elapsed=0
-        form.label_5.hide()
-        form.label_6.hide()
-    # если в процессе работы значение params['T']['ideal'] меняется (например в результате изменения на doubleSpinBox), то ПИД-регулятор переориентируется на новое значение
-    if params['T']['ideal'] != T_id:
-        T_id = params['T']['ideal']
-        pid_controller_T = PIDController(kp=0.5, ki=0.1, kd=0.01, set_point=T_id)
-    
-    if form.checkBox_4.isChecked() and ind_V != -1:
-        output = pid_controller_T.update(T, dt)
-        if T + output*dt <= params['T']['limit_min'] or T + output*dt >= params['T']['limit_max']:
-            form.checkBox_4.setChecked(False)
-            T_id += 0.0000001
-            ind_T_block = True
-        else:
-            ind_T_block = False
-            T += output*dt  # имитация изменения температуры
-            form.label_56.setText(str(round(T, 1))+' °C')
-
-        # Визуализация характера изменений Т внутри реактора (label_5 - нагрев, label_6 - охлаждение)
-        if abs(output) < 0.01 and abs(T-T_id) < 0.05:
-            form.label_5.hide()
-            form.label_6.hide()
-            form.checkBox_4.setChecked(False)
-        elif output > 0:
-            form.label_5.hide()
-            form.label_6.show()
-        elif output < 0:
-            form.label_5.show()
-            form.label_6.hide()
-    elif ind_V == -1:
-        form.checkBox_4.setChecked(False)
+    ui.set_text(form.label_47, str(int(s.V))+' л ('+str(int(s.V/V_reactor*100))+' %)')
+    if s.V > V_reactor*0.01:
+        ui.set_text(form.label_49, str(int(s.V_1/s.V*100))+' %')
+        ui.set_text(form.label_51, str(int(s.V_2/s.V*100))+' %')
     else:
-        form.label_5.hide()
-        form.label_6.hide()
-        
+        ui.set_text(form.label_49, '0 %')
+        ui.set_text(form.label_51, '0 %')
+    ui.set_value(form.progressBar, int(s.V/V_reactor*100))
     
-    # Предупреждения по Т
-    if T < params['T']['limit_min'] or ind_T_block:
-        form.label_60.setText('Слишком низкая температура! \nИспользование реактора невозможно.')
-        form.label_63.hide()
-        form.label_61.show()
-        ind_T=-2
-    elif T < params['T']['warning_min']:
-        form.label_60.setText('Низкая температура! \nИспользование реактора не рекомендуется.')
-        form.label_63.show()
-        form.label_61.hide()
-        ind_T=-1
-    elif T > params['T']['limit_max'] or ind_T_block:
-        form.label_60.setText('Слишком высокая температура! \nИспользование реактора невозможно.')
-        form.label_63.hide()
-        form.label_61.show()
-        ind_T=2
-    elif T > params['T']['warning_max']:
-        form.label_60.setText('Высокая температура! \nИспользование реактора не рекомендуется.')
-        form.label_63.show()
-        form.label_61.hide()
-        ind_T=1
-    else:
-        form.label_60.setText('Приемлимая температура! \nИспользование реактора разрешено.')
-        form.label_63.hide()
-        form.label_61.hide()
-        ind_T=0
-    
-    
-    # ПИД-контроллер давления
-    global pid_controller_p, p, dp, p_id, p_graph
-    if start:
-        p = params['p']['atmosphere']
-        p_id = params['p']['ideal']
-        pid_controller_p = PIDController(kp=0.5, ki=0.1, kd=0.01, set_point=p_id)
-        start=False
-        dp = 0.005
-        time_elapsed_p=0
-    # если в процессе работы значение params['p']['ideal'] меняется (например в результате изменения на doubleSpinBox), то ПИД-регулятор переориентируется на новое значение
-    if params['p']['ideal'] != p_id:
-        p_id = params['p']['ideal']
-        pid_controller_p = PIDController(kp=0.5, ki=0.1, kd=0.01, set_point=p_id)
-    
-    if form.checkBox_7.isChecked(): # and ind_V != -1
-        output = pid_controller_p.update(p, dp)
-        if p + output*dp <= params['p']['limit_min'] or p + output*dp >= params['p']['limit_max']:
-            form.checkBox_7.setChecked(False)
-            p_id += 0.0000001
-            ind_p_block = True
-        else:
-            ind_p_block = False
-            p += output*dp  # Имитация изменения температуры
-            form.label_58.setText(str(round(p, 1))+' атм')
-        
-        # реализация картинок, которые показывают что давление работает
-        if abs(output) < 0.01 and abs(p-p_id) < 0.05:
-            #form.label_5.hide()
-            #form.label_6.hide()
-            form.checkBox_7.setChecked(False)
-        # elif output > 0:
-        #     form.label_5.hide()
-        #     form.label_6.show()
-        # elif output < 0:
-        #     form.label_5.show()
-        #     form.label_6.hide()
-    # elif ind_V == -1:
-    #     form.checkBox_4.setChecked(False)
-    # else:
-    #     form.label_5.hide()
-    #     form.label_6.hide()
+    
+    tick_stats.mark('labels')
+    # Перемешивание (работа мотора): анимацию ведёт виджет реактора по реальному времени
+    vessel.set_mixing(controls.mixing, params['v']['mixing'])
     
     
+    tick_stats.mark('mixing animation')
     
+    # Температура (змеевик охлаждения или нагрева - в виджете реактора)
+    ui.set_text(form.label_56, format_T(s.T))
+    vessel.set_thermal(s.thermal)
+    
+    # Предупреждения по Т
+    show_warning(form.label_60, form.label_63, form.label_61, T_WARNINGS[s.ind_T])
+    
+    
+    # Давление
+    ui.set_text(form.label_58, format_p(s.p))
     
     # Предупреждения по p
-    if p < params['p']['limit_min'] or ind_p_block:
-        form.label_69.setText('Слишком низкое давление! \nИспользование реактора невозможно.')
-        form.label_71.hide()
-        form.label_68.show()
-        ind_p=-2
-    elif p < params['p']['warning_min']:
-        form.label_69.setText('Низкое давление! \nИспользование реактора не рекомендуется.')
-        form.label_71.show()
-        form.label_68.hide()
-        ind_p=-1
-    elif p > params['p']['limit_max'] or ind_p_block:
-        form.label_69.setText('Слишком высокое давление! \nИспользование реактора невозможно.')
-        form.label_71.hide()
-        form.label_68.show()
-        ind_p=2
-    elif p > params['p']['warning_max']:
-        form.label_69.setText('Высокое давление! \nИспользование реактора не рекомендуется.')
-        form.label_71.show()
-        form.label_68.hide()
-        ind_p=1
-    else:
-        form.label_69.setText('Приемлимое давление! \nИспользование реактора разрешено.')
-        form.label_71.hide()
-        form.label_68.hide()
-        ind_p=0
+    show_warning(form.label_69, form.label_71, form.label_68, P_WARNINGS[s.ind_p])
     
     # вывод запретов
     #form.textEdit.clear()  # Очищаем содержимое перед обновлением
@@ -614,107 +513,41 @@ def update_current_time():
     
     
     
-    # обновление таблицы отчётов:
-    def update_reagent_action(wiget_status, logic_ind_status, text_on, text_off, current_time):
-        if not logic_ind_status and wiget_status:
-            new_data = [{"Время": current_time, "Действие": text_on, "Статус действия": "Выполнено"}]
-        elif logic_ind_status and not wiget_status:
-            new_data = [{"Время": current_time, "Действие": text_off, "Статус действия": "Выполнено"}]
-        else:
-            return None
-        return pd.DataFrame(new_data)
-    
-    global ind_add_reagent_1, ind_add_reagent_2, ind_mix, ind_discharge, ind_logic_T, ind_logic_p, ind_end
-    # добавление 1 реагента
-    result_df = update_reagent_action(form.checkBox.isChecked(), ind_add_reagent_1,
-                                      "Вкл. добавления первого реагента",
-                                      "Выкл. добавления первого реагента",
-                                      current_time)
-    if result_df is not None:
-        df_rep = pd.concat([df_rep, result_df], ignore_index=True)
-    ind_add_reagent_1 = form.checkBox.isChecked()
-
-    # добавление 2 реагента
-    result_df = update_reagent_action(form.checkBox_2.isChecked(), ind_add_reagent_2,
-                                      "Вкл. добавления первого реагента",
-                                      "Выкл. добавления первого реагента",
-                                      current_time)
-    if result_df is not None:
-        df_rep = pd.concat([df_rep, result_df], ignore_index=True)
-    ind_add_reagent_2 = form.checkBox_2.isChecked()
-    
-    # перемешивание
-    result_df = update_reagent_action(form.checkBox_5.isChecked(), ind_mix,
-                                      "Вкл. перемешивание",
-                                      "Выкл. перемешивание",
-                                      current_time)
-    if result_df is not None:
-        df_rep = pd.concat([df_rep, result_df], ignore_index=True)
-    ind_mix = form.checkBox_5.isChecked()
-        
-    # слив
-    result_df = update_reagent_action(form.checkBox_3.isChecked(), ind_discharge,
-                                      "Вкл. слив",
-                                      "Выкл. слив",
-                                      current_time)
-    if result_df is not None:
-        df_rep = pd.concat([df_rep, result_df], ignore_index=True)
-    ind_discharge = form.checkBox_3.isChecked()
-    
-    # изменение Т
-    result_df = update_reagent_action(form.checkBox_4.isChecked(), ind_logic_T,
-                                      "Вкл. режим изменения Т",
-                                      "Выкл. режим изменения Т",
-                                      current_time)
-    if result_df is not None:
-        df_rep = pd.concat([df_rep, result_df], ignore_index=True)
-    ind_logic_T = form.checkBox_4.isChecked()
-    
-    # изменение p
-    result_df = update_reagent_action(form.checkBox_7.isChecked(), ind_logic_p,
-                                      "Вкл. режим изменения p",
-                                      "Выкл. режим изменения p",
-                                      current_time)
-    if result_df is not None:
-        df_rep = pd.concat([df_rep, result_df], ignore_index=True)
-    ind_logic_p = form.checkBox_7.isChecked()
-    
-    # end
-    if not ind_end and form.checkBox_12.isChecked():
-        new_data_1 = [{"Время": current_time, "Действие": "Остановка всех процессов. Завершение работы модели.", "Статус действия": "Выполнено"}]
-        df_rep = pd.concat([df_rep, pd.DataFrame(new_data_1)], ignore_index=True)
-    
-    
-    
-    # сохранить и закрыть
-    if form.checkBox_12.isChecked():
-        # сохранение данных
-        filename = f"{params['name']['exp']}.xlsx"  # название файла
-        reports_folder = os.path.join(os.getcwd(), 'Reports')  # путь к папке 'Reports' текущей директории
-        if not os.path.exists(reports_folder): # если такой папки не существует, то создаем ее
-            os.makedirs(reports_folder)
-        path = os.path.join(reports_folder, filename)
-        create_excel(path)
-        # закрытие окна
-        second_window.close()
-        QApplication.instance().quit()
+    tick_stats.mark('labels')
+    # все изменения кадра применяются одним проходом
+    ui.flush()
+    tick_stats.mark('widgets')
 
 
-# Создание пустого DataFrame
-df_rep = pd.DataFrame(columns=["Время", "Действие", "Статус действия"])
+# журнал действий оператора
+journal = EventJournal()
+report_sink = None
+telemetry = None
+tick_stats = TickStats(FRAME_MS)
+control_server = None
+serve_address = None
+ui = WidgetBinder()
+vessel = None
+graph_dt, graph_last_time = 0, 0
 # Функция скачивания файла excel
 def create_excel(path):
-    global df_rep
-    df_rep.to_excel(path, index=False)
+    journal.to_dataframe().to_excel(path, index=False)
+
+
+# модельное время с прошлого обновления графиков
+def update_graph_time():
+    global graph_dt, graph_last_time
+    graph_dt = snapshot.state.time - graph_last_time
+    graph_last_time = snapshot.state.time
 
 
 # прорисовка графика Т
 def update_graph():
-    global dynamic_graph, T, time_elapsed, params
+    global dynamic_graph, time_elapsed, params
     if form.checkBox_4.isChecked():
         ideal_temp = params['T']['ideal']
-        dynamic_graph.update_figure(time_elapsed, T, ideal_temp)
-        time_elapsed += 0.48
+        dynamic_graph.update_figure(time_elapsed, snapshot.state.T, ideal_temp)
+        time_elapsed += graph_dt
     # очистка графика
     if form.checkBox_6.isChecked():
         time_elapsed = 0
@@ -723,10 +556,11 @@ def update_graph():
 
 # прорисовка графика V
 def update_multi_graph():
-    global multi_variable_graph, time_elapsed_V, V, V_1, V_2, params
-    if (form.checkBox.isChecked() or form.checkBox_2.isChecked() or form.checkBox_3.isChecked()) and (V > params['V']['reactor']*0.001): # выклчаем запись графика, если резервуар пуст
-        multi_variable_graph.update_figure(time_elapsed_V, V, V_1, V_2)
-        time_elapsed_V += 0.48
+    global multi_variable_graph, time_elapsed_V, params
+    s = snapshot.state
+    if (form.checkBox.isChecked() or form.checkBox_2.isChecked() or form.checkBox_3.isChecked()) and (s.V > params['V']['reactor']*0.001): # выклчаем запись графика, если резервуар пуст
+        multi_variable_graph.update_figure(time_elapsed_V, s.V, s.V_1, s.V_2)
+        time_elapsed_V += graph_dt
     # очистка графика
     if form.checkBox_8.isChecked():
         time_elapsed_V = 0
@@ -736,11 +570,11 @@ def update_multi_graph():
 
 # прорисовка графика p
 def update_p_graph():
-    global p_graph, p, time_elapsed_p, params
+    global p_graph, time_elapsed_p, params
     if form.checkBox_7.isChecked():
         ideal_p = params['p']['ideal']
-        p_graph.update_figure(time_elapsed_p, p, ideal_p)
-        time_elapsed_p += 0.48
+        p_graph.update_figure(time_elapsed_p, snapshot.state.p, ideal_p)
+        time_elapsed_p += graph_dt
     # очистка графика
     if form.checkBox_9.isChecked():
         time_elapsed_p = 0
@@ -751,7 +585,23 @@ def update_p_graph():
 
 
 
+# время от запуска до показа окна параметров (после первой обработки событий)
+def report_startup_time():
+    print(f"startup: {(time.perf_counter() - STARTUP_T0) * 1000:.1f} ms")
+    QApplication.instance().quit()
+
+
 if __name__ == "__main__":
     app = QApplication(sys.argv)
-    open_first_window(app)
-    sys.exit(app.exec())
\ No newline at end of file
+    if '--serve' in sys.argv:
+        serve_address = sys.argv[sys.argv.index('--serve') + 1]
+    if '--restore' in sys.argv:
+        open_restored_window(app, sys.argv[sys.argv.index('--restore') + 1])
+    else:
+        open_first_window(app)
+    if '--startup-time' in sys.argv:
+        QTimer.singleShot(0, report_startup_time)
+    exit_code = app.exec()
+    if report_sink is not None:
+        report_sink.wait()
+    sys.exit(exit_code)
\ No newline at end of file
@@ -0,0 +1,284 @@
+# подбор коэффициентов ПИД-регуляторов Т и p по переходному процессу модели реактора
+# (перебор по сетке и/или симплекс-метод Нелдера-Мида; кандидаты считаются в пуле процессов)
+#
+# python pid_tuning.py params.json                        - регулятор Т, сетка + Нелдер-Мид, критерий ITAE
+# python pid_tuning.py params.json --loop p --cost iae    - регулятор p, критерий IAE
+# python pid_tuning.py params.json --method grid --kp 0.1:2:8 --ki 0:0.5:6 --kd 0:0.1:3
+# python pid_tuning.py params.json --write                - записать лучшие коэффициенты в params['pid']
+#
+# переходный процесс: из начального значения (ambient / atmosphere) к уставке (ideal или --target)
+# при допустимом уровне в реакторе; результаты - Reports/<exp>_pid_<loop>.csv
+import argparse
+import copy
+import itertools
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+import numpy as np
+
+from integrators import INTEGRATORS
+from reactor_model import ReactorModel, ReactorControls, PID_GAINS, TICK
+from report_sink import report_path
+
+
+# критерии качества переходного процесса (меньше - лучше)
+COSTS = ('iae', 'ise', 'itae', 'overshoot', 'settling')
+# полоса установления: доля величины скачка уставки, но не уже SETTLING_ATOL - точности, при которой
+# модель выключает регулятор (|x - уставка| < 0.05); тот же критерий - в analytics.step_metrics
+SETTLING_BAND = 0.02
+SETTLING_ATOL = 0.05
+# сетка по умолчанию: (начало, конец, число точек)
+DEFAULT_GRID = {'kp': (0.1, 3.0, 8), 'ki': (0.0, 1.0, 6), 'kd': (0.0, 0.1, 4)}
+GAIN_NAMES = ('kp', 'ki', 'kd')
+
+
+# исходные params для переходного процесса: уставка target, уровень между границами предупреждений
+def step_params(params, loop, target=None):
+    params = copy.deepcopy(params)
+    if target is not None:
+        params[loop]['ideal'] = target
+    start = params['T']['ambient'] if loop == 'T' else params['p']['atmosphere']
+    if params[loop]['ideal'] == start:
+        raise ValueError(f"уставка {loop} совпадает с начальным значением {start}: скачка нет")
+    return params
+
+
+# переходный процесс при коэффициентах gains; возвращает показатели качества
+def evaluate(params, loop, gains, horizon, dt=TICK, integrator='euler'):
+    params = copy.deepcopy(params)
+    params['pid'] = dict(params.get('pid', {}))
+    params['pid'][loop] = dict(zip(GAIN_NAMES, gains))
+    model = ReactorModel(params, integrator)
+    s = model.state
+    V = params['V']
+    # уровень посередине допустимого диапазона (регулирование Т при недопустимом уровне запрещено)
+    level = (V['reacror_warning_min'] + V['reacror_warning_max']) / 2
+    s.V = s.V_1 = V['reactor'] * level / 100
+    controls = ReactorControls(T_control=(loop == 'T'), p_control=(loop == 'p'))
+
+    n = int(round(horizon / dt))
+    x = np.empty(n)
+    start = s.T if loop == 'T' else s.p
+    set_point = params[loop]['ideal']
+    blocked = False
+    for i in range(n):
+        model.step(dt, controls)
+        x[i] = s.T if loop == 'T' else s.p
+        blocked = blocked or (s.ind_T_block if loop == 'T' else s.ind_p_block)
+    return performance(x, dt, start, set_point, blocked)
+
+
+# показатели качества по траектории x (шаг dt) при скачке уставки start -> set_point
+def performance(x, dt, start, set_point, blocked=False):
+    t = np.arange(1, len(x) + 1) * dt
+    e = set_point - x
+    step = set_point - start
+    # перерегулирование: выход за уставку в направлении скачка, % от скачка
+    overshoot = max(0.0, float(np.max((x - set_point) * np.sign(step)))) / abs(step) * 100
+    outside = np.flatnonzero(np.abs(e) > max(SETTLING_BAND * abs(step), SETTLING_ATOL))
+    if len(outside) == 0:
+        settling = 0.0
+    elif outside[-1] == len(x) - 1:
+        settling = float('inf')  # не установился за горизонт
+    else:
+        settling = float(t[outside[-1] + 1])
+    result = {
+        'iae': float(np.sum(np.abs(e)) * dt),
+        'ise': float(np.sum(e * e) * dt),
+        'itae': float(np.sum(t * np.abs(e)) * dt),
+        'overshoot': overshoot,
+        'settling': settling,
+        'final_error': float(e[-1]),
+        'blocked': bool(blocked),
+    }
+    # срабатывание блокировки по пределам - кандидат недопустим
+    if blocked:
+        for name in COSTS:
+            result[name] = float('inf')
+    return result
+
+
+# параметры задачи передаются в процессы пула один раз (initializer), а не с каждым кандидатом
+_task = None
+
+
+def _init_worker(task):
+    global _task
+    _task = task
+
+
+def _evaluate_candidate(gains):
+    params, loop, horizon, dt, integrator = _task
+    return evaluate(params, loop, gains, horizon, dt, integrator)
+
+
+class PIDTuner:
+    # bounds - {имя: (минимум, максимум)}: у модели нет ограничения мощности нагрева и
+    # давления, поэтому без ограничения коэффициентов оптимум уходит в сколь угодно большие kp
+    def __init__(self, params, loop='T', cost='itae', horizon=120.0, dt=TICK, integrator='euler',
+                 target=None, workers=None, bounds=None):
+        if loop not in ('T', 'p'):
+            raise ValueError(f"неизвестный контур: {loop} (T или p)")
+        if cost not in COSTS:
+            raise ValueError(f"неизвестный критерий: {cost} (доступны: {', '.join(COSTS)})")
+        self.params = step_params(params, loop, target)
+        self.loop = loop
+        self.cost = cost
+        self.task = (self.params, loop, horizon, dt, integrator)
+        self.workers = workers or os.cpu_count()
+        bounds = bounds or {name: DEFAULT_GRID[name][:2] for name in GAIN_NAMES}
+        self.lower = np.array([bounds[name][0] for name in GAIN_NAMES], dtype=float)
+        self.upper = np.array([bounds[name][1] for name in GAIN_NAMES], dtype=float)
+        self.results = []  # строки таблицы результатов
+        self.known = {}    # коэффициенты -> значение критерия
+        self.pool = None
+
+    def __enter__(self):
+        self.pool = ProcessPoolExecutor(self.workers, initializer=_init_worker, initargs=(self.task,))
+        return self
+
+    def __exit__(self, *exc):
+        self.pool.shutdown()
+        self.pool = None
+
+    # оценка списка кандидатов в пуле; возвращает значения критерия
+    # (повторные кандидаты, например симплекс на границе, берутся из уже посчитанных)
+    def evaluate_many(self, candidates, source):
+        candidates = [tuple(float(g) for g in np.clip(gains, self.lower, self.upper)) for gains in candidates]
+        new = list(dict.fromkeys(gains for gains in candidates if gains not in self.known))
+        if self.pool is None:
+            _init_worker(self.task)
+            metrics = list(map(_evaluate_candidate, new))
+        else:
+            chunk = max(1, len(new) // (self.workers * 4))
+            metrics = list(self.pool.map(_evaluate_candidate, new, chunksize=chunk))
+        for gains, m in zip(new, metrics):
+            row = dict(zip(GAIN_NAMES, gains), source=source, **m)
+            row['cost'] = m[self.cost]
+            self.results.append(row)
+            self.known[gains] = row['cost']
+        return [self.known[gains] for gains in candidates]
+
+    def grid_search(self, grid=DEFAULT_GRID):
+        axes = [np.linspace(*grid[name]) for name in GAIN_NAMES]
+        candidates = list(itertools.product(*axes))
+        costs = self.evaluate_many(candidates, 'grid')
+        i = int(np.argmin(costs))
+        return candidates[i], costs[i]
+
+    # симплекс-метод Нелдера-Мида; на каждой итерации отражение, растяжение и оба сжатия
+    # считаются параллельно (пул занят, а число итераций то же)
+    def nelder_mead(self, x0, step=None, iterations=60, tol=1e-6):
+        x0 = np.asarray(x0, dtype=float)
+        if step is None:
+            step = np.maximum(np.abs(x0) * 0.25, 0.02)
+        simplex = [x0] + [x0 + np.eye(len(x0))[i] * step[i] for i in range(len(x0))]
+        simplex = [np.clip(x, self.lower, self.upper) for x in simplex]
+        values = self.evaluate_many(simplex, 'nelder-mead')
+        for _ in range(iterations):
+            order = np.argsort(values)
+            simplex = [simplex[i] for i in order]
+            values = [values[i] for i in order]
+            if np.isfinite(values[-1]) and values[-1] - values[0] <= tol * (abs(values[0]) + tol):
+                break
+            centroid = np.mean(simplex[:-1], axis=0)
+            worst = simplex[-1]
+            trial = [centroid + (centroid - worst),       # отражение
+                     centroid + 2 * (centroid - worst),   # растяжение
+                     centroid + 0.5 * (centroid - worst),  # внешнее сжатие
+                     centroid - 0.5 * (centroid - worst)]  # внутреннее сжатие
+            trial = [np.clip(x, self.lower, self.upper) for x in trial]
+            f_r, f_e, f_oc, f_ic = self.evaluate_many(trial, 'nelder-mead')
+            if f_r < values[0]:
+                replace = (trial[1], f_e) if f_e < f_r else (trial[0], f_r)
+            elif f_r < values[-2]:
+                replace = (trial[0], f_r)
+            elif f_r < values[-1]:
+                replace = (trial[2], f_oc) if f_oc <= f_r else None
+            else:
+                replace = (trial[3], f_ic) if f_ic < values[-1] else None
+            if replace is not None:
+                simplex[-1], values[-1] = replace
+            else:
+                # сжатие всего симплекса к лучшей точке
+                simplex = [simplex[0]] + [simplex[0] + 0.5 * (x - simplex[0]) for x in simplex[1:]]
+                values = [values[0]] + self.evaluate_many(simplex[1:], 'nelder-mead')
+        i = int(np.argmin(values))
+        return tuple(float(g) for g in simplex[i]), values[i]
+
+    # лучший кандидат - по всей таблице (пробные точки симплекса тоже могли оказаться лучше)
+    def run(self, method='both', grid=DEFAULT_GRID, x0=None, iterations=60):
+        best = None
+        if method in ('grid', 'both'):
+            best = self.grid_search(grid)
+        if method in ('nelder-mead', 'both'):
+            start = best[0] if best is not None and np.isfinite(best[1]) else (x0 or tuple(PID_GAINS.values()))
+            self.nelder_mead(start, iterations=iterations)
+        row = min(self.results, key=lambda row: row['cost'])
+        return {name: row[name] for name in GAIN_NAMES}, row['cost']
+
+    def table(self):
+        import pandas as pd
+        df = pd.DataFrame(self.results)
+        return df.sort_values('cost', kind='stable').reset_index(drop=True)
+
+
+# диапазон сетки 'начало:конец:число точек'
+def parse_range(text):
+    start, stop, num = text.split(':')
+    return float(start), float(stop), int(num)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Подбор коэффициентов ПИД-регулятора модели реактора')
+    parser.add_argument('params', help='JSON с параметрами в формате wind_params.save_params')
+    parser.add_argument('--loop', choices=('T', 'p'), default='T', help='контур регулирования')
+    parser.add_argument('--cost', choices=COSTS, default='itae', help='критерий качества')
+    parser.add_argument('--method', choices=('grid', 'nelder-mead', 'both'), default='both')
+    parser.add_argument('--horizon', type=float, default=120.0, help='длительность переходного процесса, с')
+    parser.add_argument('--target', type=float, help='уставка (по умолчанию ideal из params)')
+    parser.add_argument('--dt', type=float, default=TICK, help='шаг модели, с')
+    parser.add_argument('--integrator', choices=sorted(INTEGRATORS), default='euler', help='интегратор Т и p')
+    for name in GAIN_NAMES:
+        start, stop, num = DEFAULT_GRID[name]
+        parser.add_argument(f'--{name}', type=parse_range, default=DEFAULT_GRID[name],
+                            help=f'сетка {name} начало:конец:точек (по умолчанию {start}:{stop}:{num})')
+    parser.add_argument('--unbounded', action='store_true',
+                        help='не ограничивать Нелдера-Мида сеткой (только kp, ki, kd >= 0)')
+    parser.add_argument('--iterations', type=int, default=60, help='итераций Нелдера-Мида')
+    parser.add_argument('--workers', type=int, help='число процессов (по умолчанию - все ядра)')
+    parser.add_argument('--write', action='store_true', help='записать лучшие коэффициенты в params["pid"]')
+    args = parser.parse_args(argv)
+
+    with open(args.params, encoding='utf-8') as file:
+        params = json.load(file)
+    grid = {name: getattr(args, name) for name in GAIN_NAMES}
+    if args.unbounded:
+        bounds = {name: (0.0, float('inf')) for name in GAIN_NAMES}
+    else:
+        bounds = {name: (min(grid[name][:2]), max(grid[name][:2])) for name in GAIN_NAMES}
+    started = datetime.now()
+    with PIDTuner(params, args.loop, args.cost, args.horizon, args.dt, args.integrator,
+                  args.target, args.workers, bounds) as tuner:
+        gains, cost = tuner.run(args.method, grid, iterations=args.iterations)
+    elapsed = (datetime.now() - started).total_seconds()
+
+    table = tuner.table()
+    path = report_path(params, f'_pid_{args.loop}.csv')
+    table.to_csv(path, index=False)
+    print(table.head(10).to_string())
+    print(f"контур {args.loop}: kp={gains['kp']:.4g}, ki={gains['ki']:.4g}, kd={gains['kd']:.4g}, "
+          f"{args.cost}={cost:.4g} ({len(table)} кандидатов за {elapsed:.1f} с, таблица: {path})")
+
+    if args.write:
+        params.setdefault('pid', {})[args.loop] = gains
+        with open(args.params, 'w', encoding='utf-8') as file:
+            json.dump(params, file, ensure_ascii=False, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,388 @@
+# окно установки: несколько реакторов в одном процессе
+# физика всех реакторов считается пакетно (ensemble.ReactorEnsemble) по одному таймеру кадра,
+# таблица-обзор обновляется несколько раз в секунду, подробный вид и графики - только для выбранного реактора
+#
+# python plant.py params_1.json params_2.json ...   - параметры реакторов (файлы или каталоги с *.json)
+# python plant.py params.json --copies 8            - 8 реакторов с одинаковыми параметрами
+import argparse
+import copy
+import glob
+import json
+import os
+import sys
+from datetime import datetime
+
+import numpy as np
+from PyQt6.QtWidgets import (QApplication, QWidget, QHBoxLayout, QVBoxLayout, QGridLayout, QLabel,
+                             QCheckBox, QDoubleSpinBox, QSpinBox, QSlider, QTableWidget,
+                             QTableWidgetItem, QTabWidget, QAbstractItemView)
+from PyQt6.QtCore import Qt, QTimer
+from PyQt6.QtGui import QColor
+
+from ensemble import ReactorEnsemble, EnsembleControls, CONTROL_FIELDS
+from journal import EventJournal, Action, CONTROL_ACTIONS
+from reactor_model import TICK
+from report_sink import ReportSink, report_path, unique_exp_names
+from sim_clock import SimulationClock, FRAME_MS
+from widget_binding import WidgetBinder
+
+
+# период обновления таблицы-обзора и точек графиков, мс
+OVERVIEW_MS = 250
+GRAPH_MS = 500
+# сколько точек истории хранится для каждого реактора (при GRAPH_MS = 500 - 30 минут)
+PLANT_RETENTION = 3600
+# величины, история которых хранится для графиков подробного вида
+HISTORY_FIELDS = ('V', 'V_1', 'V_2', 'T', 'T_id', 'p', 'p_id')
+
+OVERVIEW_COLUMNS = ('Реактор', 'V, л', 'Уровень, %', 'T, °C', 'p, атм', 'Режимы')
+# подписи органов управления подробного вида и сокращения для таблицы
+CONTROL_LABELS = {
+    'feed_1': ('Подача реагента 1', 'R1'),
+    'feed_2': ('Подача реагента 2', 'R2'),
+    'discharge': ('Слив', 'слив'),
+    'T_control': ('Режим изменения Т', 'T'),
+    'mixing': ('Перемешивание', 'мешалка'),
+    'p_control': ('Режим изменения p', 'p'),
+}
+# цвет ячейки по индексу предупреждения (ind_V: -1, 0, 1; ind_T, ind_p: -2..2)
+ALARM_COLORS = {
+    'V': {-1: '#f4a6a6', 0: '#f7e08b', 1: None},
+    'T': {-2: '#f4a6a6', -1: '#f7e08b', 0: None, 1: '#f7e08b', 2: '#f4a6a6'},
+    'p': {-2: '#f4a6a6', -1: '#f7e08b', 0: None, 1: '#f7e08b', 2: '#f4a6a6'},
+}
+
+
+# история величин всех реакторов: массивы (PLANT_RETENTION, N), запись одной строкой на все реакторы
+class PlantHistory:
+    def __init__(self, n, capacity=PLANT_RETENTION, fields=HISTORY_FIELDS):
+        self.capacity = capacity
+        self.time = np.empty(capacity)
+        self.data = {name: np.empty((capacity, n)) for name in fields}
+        self.count = 0
+
+    def append(self, time, values):
+        pos = self.count % self.capacity
+        self.time[pos] = time
+        for name, column in self.data.items():
+            column[pos] = values[name]
+        self.count += 1
+
+    # история реактора i в порядке записи
+    def series(self, name, i=None):
+        data = self.time if name == 'time' else self.data[name][:, i]
+        if self.count <= self.capacity:
+            return data[:self.count]
+        pos = self.count % self.capacity
+        return np.concatenate((data[pos:], data[:pos]))
+
+
+# модель установки без окна: реакторы, органы управления, журналы и отчёты
+class Plant:
+    def __init__(self, params_list, report=True):
+        self.params_list = params_list
+        self.n = len(params_list)
+        self.ensemble = ReactorEnsemble(params_list)
+        self.controls = EnsembleControls(self.n)
+        self.journals = [EventJournal() for _ in params_list]
+        self.sinks = [ReportSink(report_path(params, '.csv')) for params in params_list] if report else None
+        self.previous = {name: np.zeros(self.n, dtype=bool) for name, _, _ in CONTROL_ACTIONS}
+        self.history = PlantHistory(self.n)
+        # предупреждения, действующие с начала работы (как у AlarmTable)
+        now = datetime.now().timestamp()
+        for name, levels in self.ensemble.alarms.levels.items():
+            for i in np.flatnonzero(levels):
+                self.journals[i].record_alarm(now, name, 0, int(levels[i]))
+
+    # шаг всех реакторов; переключения органов управления записываются в журналы реакторов
+    def step(self, now):
+        self.ensemble.step(TICK, self.controls)
+        # смены уровней предупреждений (до переключений, которые они вызвали)
+        alarms = self.ensemble.alarms
+        for name, changed in alarms.changed.items():
+            if changed.any():
+                old, new = alarms.previous[name], alarms.levels[name]
+                for i in np.flatnonzero(changed):
+                    self.journals[i].record_alarm(now, name, int(old[i]), int(new[i]))
+        for name, action_on, action_off in CONTROL_ACTIONS:
+            state = getattr(self.controls, name)
+            previous = self.previous[name]
+            changed = np.flatnonzero(state != previous)
+            for i in changed:
+                self.journals[i].append(now, action_on if state[i] else action_off)
+            if len(changed):
+                previous[:] = state
+
+    def record_history(self):
+        e = self.ensemble
+        self.history.append(e.time, {'V': e.V, 'V_1': e.V_1, 'V_2': e.V_2, 'T': e.T, 'T_id': e.T_id,
+                                     'p': e.p, 'p_id': e.p_id})
+
+    def write_reports(self):
+        if self.sinks is not None:
+            for sink, journal in zip(self.sinks, self.journals):
+                sink.write_from(journal)
+
+    # завершение работы: запись END в журналы, сборка .xlsx в фоне
+    def finish(self, now):
+        for journal in self.journals:
+            journal.append(now, Action.END)
+        if self.sinks is None:
+            return
+        self.write_reports()
+        for sink, params in zip(self.sinks, self.params_list):
+            sink.export_excel(report_path(params))
+
+    def wait(self):
+        if self.sinks is not None:
+            for sink in self.sinks:
+                sink.wait()
+
+
+class PlantWindow(QWidget):
+    def __init__(self, plant, speed=1):
+        super().__init__()
+        from graphs import DynamicGraph, MultiVariableGraph, PGraph
+        self.plant = plant
+        self.ui = WidgetBinder()
+        self.clock = SimulationClock(speed=speed)
+        self.selected = 0
+        self.setWindowTitle('Установка: реакторов - ' + str(plant.n))
+
+        layout = QHBoxLayout(self)
+        # обзор всех реакторов
+        left = QVBoxLayout()
+        self.table = QTableWidget(plant.n, len(OVERVIEW_COLUMNS))
+        self.table.setHorizontalHeaderLabels(OVERVIEW_COLUMNS)
+        self.table.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
+        self.table.setSelectionMode(QAbstractItemView.SelectionMode.SingleSelection)
+        self.table.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+        self.cells = [[QTableWidgetItem() for _ in OVERVIEW_COLUMNS] for _ in range(plant.n)]
+        for row, items in enumerate(self.cells):
+            for column, item in enumerate(items):
+                self.table.setItem(row, column, item)
+            items[0].setText(plant.params_list[row]['name']['exp'])
+        self.cell_text = np.full((plant.n, len(OVERVIEW_COLUMNS)), None, dtype=object)
+        self.cell_color = np.full((plant.n, len(OVERVIEW_COLUMNS)), None, dtype=object)
+        self.table.currentCellChanged.connect(lambda row, *_: self.select(row))
+        left.addWidget(self.table)
+
+        speed_row = QHBoxLayout()
+        self.speed_label = QLabel()
+        self.speed_slider = QSlider(Qt.Orientation.Horizontal)
+        self.speed_slider.setRange(1, 100)
+        self.speed_slider.setValue(speed)
+        self.speed_slider.valueChanged.connect(self.set_speed)
+        speed_row.addWidget(QLabel('Скорость модели'))
+        speed_row.addWidget(self.speed_slider)
+        speed_row.addWidget(self.speed_label)
+        left.addLayout(speed_row)
+        layout.addLayout(left, 1)
+
+        # подробный вид выбранного реактора
+        right = QVBoxLayout()
+        self.title = QLabel()
+        right.addWidget(self.title)
+        grid = QGridLayout()
+        self.checkboxes = {}
+        for row, name in enumerate(CONTROL_FIELDS):
+            box = QCheckBox(CONTROL_LABELS[name][0])
+            box.toggled.connect(lambda checked, name=name: self.set_control(name, checked))
+            self.checkboxes[name] = box
+            grid.addWidget(box, row // 2, row % 2)
+        row = len(CONTROL_FIELDS) // 2
+        # уставки и скорости (значения пишутся в массивы параметров ансамбля);
+        # диапазон - из параметров выбранного реактора, как у регуляторов окна модели
+        self.inputs = {}
+        self.input_ranges = {}
+        for i, (group, key, text, widget_class, bounds) in enumerate((
+                ('T', 'ideal', 'Уставка T, °C', QDoubleSpinBox, ('limit_min', 'limit_max')),
+                ('p', 'ideal', 'Уставка p, атм', QDoubleSpinBox, ('limit_min', 'limit_max')),
+                ('v', 'reagent_1', 'Реагент 1, л/мин', QSpinBox, ('reagent_min', 'reagent_max')),
+                ('v', 'reagent_2', 'Реагент 2, л/мин', QSpinBox, ('reagent_min', 'reagent_max')),
+                ('v', 'discharge', 'Слив, л/мин', QSpinBox, ('discharge_min', 'discharge_max')))):
+            widget = widget_class()
+            widget.valueChanged.connect(lambda value, group=group, key=key: self.set_param(group, key, value))
+            self.inputs[(group, key)] = widget
+            self.input_ranges[(group, key)] = bounds
+            grid.addWidget(QLabel(text), row + i, 0)
+            grid.addWidget(widget, row + i, 1)
+        right.addLayout(grid)
+        self.values = QLabel()
+        right.addWidget(self.values)
+
+        self.tabs = QTabWidget()
+        self.graph_T = DynamicGraph(retention=PLANT_RETENTION, blit=True)
+        self.graph_V = MultiVariableGraph(retention=PLANT_RETENTION, blit=True)
+        self.graph_p = PGraph(retention=PLANT_RETENTION, blit=True)
+        self.tabs.addTab(self.graph_T, 'T')
+        self.tabs.addTab(self.graph_V, 'V')
+        self.tabs.addTab(self.graph_p, 'p')
+        right.addWidget(self.tabs, 1)
+        layout.addLayout(right, 1)
+
+        # один таймер на все реакторы: физика каждый кадр, обзор и графики реже
+        self.since_overview = self.since_graph = 0.0
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self.frame)
+        self.set_speed(speed)
+        self.select(0)
+        self.table.selectRow(0)
+        # ширина столбцов подбирается один раз (подбор по содержимому при каждом
+        # изменении ячейки пересчитывает весь столбец)
+        self.render_overview()
+        self.table.resizeColumnsToContents()
+
+    def set_speed(self, speed):
+        self.clock.set_speed(speed)
+        self.speed_label.setText(f'x{speed}')
+
+    def start(self):
+        self.timer.start(FRAME_MS)
+
+    def set_control(self, name, checked):
+        getattr(self.plant.controls, name)[self.selected] = checked
+
+    def set_param(self, group, key, value):
+        self.plant.ensemble.params[group][key][self.selected] = value
+
+    # выбор реактора для подробного вида: органы управления и графики переключаются на него
+    def select(self, i):
+        if i < 0 or i >= self.plant.n:
+            return
+        self.selected = i
+        params = self.plant.params_list[i]
+        self.title.setText(f"Реактор {params['name']['exp']}")
+        for (group, key), widget in self.inputs.items():
+            widget.blockSignals(True)
+            cast = type(widget.value())
+            low, high = self.input_ranges[(group, key)]
+            widget.setRange(cast(params[group][low]), cast(params[group][high]))
+            widget.setValue(cast(self.plant.ensemble.params[group][key][i]))
+            widget.blockSignals(False)
+        self.sync_checkboxes()
+        history = self.plant.history
+        time = history.series('time')
+        series = {name: history.series(name, i) for name in HISTORY_FIELDS}
+        self.graph_T.set_history(time, (series['T'], series['T_id']))
+        self.graph_V.set_history(time, (series['V_1'], series['V_2'], series['V']))
+        self.graph_p.set_history(time, (series['p'], series['p_id']))
+        self.render_detail()
+
+    # возврат автоматических отключений в чекбоксы выбранного реактора
+    def sync_checkboxes(self):
+        for name, box in self.checkboxes.items():
+            state = bool(getattr(self.plant.controls, name)[self.selected])
+            if box.isChecked() != state:
+                box.blockSignals(True)
+                box.setChecked(state)
+                box.blockSignals(False)
+
+    def frame(self):
+        plant = self.plant
+        now = datetime.now().timestamp()
+        for _ in range(self.clock.advance()):
+            plant.step(now)
+        self.sync_checkboxes()
+        self.render_detail()
+
+        self.since_overview += self.clock.frame_time * 1000
+        if self.since_overview >= OVERVIEW_MS:
+            self.since_overview = 0.0
+            self.render_overview()
+            plant.write_reports()
+        self.since_graph += self.clock.frame_time * 1000
+        if self.since_graph >= GRAPH_MS:
+            self.since_graph = 0.0
+            plant.record_history()
+            self.update_graphs()
+
+    def render_detail(self):
+        e, i = self.plant.ensemble, self.selected
+        fill = e.V[i] / e.params['V']['reactor'][i] * 100
+        self.ui.set_text(self.values, f"V = {e.V[i]:.1f} л ({fill:.0f} %), T = {e.T[i]:.1f} °C, p = {e.p[i]:.1f} атм")
+        self.ui.flush()
+
+    # таблица-обзор: значения считаются для всех реакторов сразу, в Qt передаются только изменения,
+    # таблица перерисовывается один раз после всех изменений
+    def render_overview(self):
+        self.table.setUpdatesEnabled(False)
+        try:
+            self._render_overview()
+        finally:
+            self.table.setUpdatesEnabled(True)
+
+    def _render_overview(self):
+        e = self.plant.ensemble
+        fill = e.fill_percent()
+        columns = {
+            1: [f'{v:.1f}' for v in e.V],
+            2: [f'{v:.0f}' for v in fill],
+            3: [f'{v:.1f}' for v in e.T],
+            4: [f'{v:.2f}' for v in e.p],
+            5: [', '.join(label for name, (_, label) in CONTROL_LABELS.items()
+                          if getattr(self.plant.controls, name)[i]) for i in range(self.plant.n)],
+        }
+        colors = {1: [ALARM_COLORS['V'][k] for k in e.ind_V.tolist()],
+                  2: [ALARM_COLORS['V'][k] for k in e.ind_V.tolist()],
+                  3: [ALARM_COLORS['T'][k] for k in e.ind_T.tolist()],
+                  4: [ALARM_COLORS['p'][k] for k in e.ind_p.tolist()]}
+        for column, texts in columns.items():
+            for row in np.flatnonzero(self.cell_text[:, column] != np.array(texts, dtype=object)):
+                self.cells[row][column].setText(texts[row])
+                self.cell_text[row, column] = texts[row]
+        for column, values in colors.items():
+            for row in np.flatnonzero(self.cell_color[:, column] != np.array(values, dtype=object)):
+                color = values[row]
+                self.cells[row][column].setBackground(QColor(color) if color else QColor(0, 0, 0, 0))
+                self.cell_color[row, column] = color
+
+    def update_graphs(self):
+        history, i = self.plant.history, self.selected
+        pos = (history.count - 1) % history.capacity
+        x = history.time[pos]
+        d = {name: column[pos, i] for name, column in history.data.items()}
+        self.graph_T.update_figure(x, d['T'], d['T_id'])
+        # порядок аргументов - как в main.py (линии графика: V_1, V_2, V)
+        self.graph_V.update_figure(x, d['V'], d['V_1'], d['V_2'])
+        self.graph_p.update_figure(x, d['p'], d['p_id'])
+
+    def closeEvent(self, event):
+        self.timer.stop()
+        self.plant.finish(datetime.now().timestamp())
+        super().closeEvent(event)
+
+
+# параметры реакторов из файлов и каталогов
+def load_params(paths, copies=1):
+    params_list = []
+    for path in paths:
+        files = sorted(glob.glob(os.path.join(path, '*.json'))) if os.path.isdir(path) else [path]
+        for file_path in files:
+            with open(file_path, encoding='utf-8') as file:
+                params = json.load(file)
+            params_list += [copy.deepcopy(params) for _ in range(copies)]
+    return unique_exp_names(params_list)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Несколько реакторов в одном окне')
+    parser.add_argument('params', nargs='+', help='JSON с параметрами реактора или каталог с такими файлами')
+    parser.add_argument('--copies', type=int, default=1, help='реакторов на каждый файл параметров')
+    parser.add_argument('--speed', type=int, default=1, help='скорость модели')
+    parser.add_argument('--no-report', action='store_true', help='не сохранять отчёты')
+    args = parser.parse_args(argv)
+
+    app = QApplication(sys.argv[:1])
+    plant = Plant(load_params(args.params, args.copies), report=not args.no_report)
+    window = PlantWindow(plant, args.speed)
+    window.resize(1400, 800)
+    window.show()
+    window.start()
+    code = app.exec()
+    plant.wait()
+    return code
+
+
+if __name__ == "__main__":
+    sys.exit(main())
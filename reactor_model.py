@@ -0,0 +1,270 @@
+# модель реактора без привязки к интерфейсу (физика, ПИД-регуляторы и проверки ограничений)
+from integrators import make_integrator
+from alarms import AlarmTable, IND_V
+from kinetics import Kinetics
+
+# длительность одного такта быстрого таймера окна модели, с
+TICK = 0.01
+# шаг ПИД-регулятора на один такт (0.005 на каждые 0.01 с модельного времени)
+PID_DT_PER_TICK = 0.005
+# коэффициенты ПИД-регуляторов температуры и давления
+PID_GAINS = {'kp': 0.5, 'ki': 0.1, 'kd': 0.01}
+
+
+# класса ПИД контроллера (температуры и давления)
+class PIDController:
+    def __init__(self, kp, ki, kd, set_point):
+        self.Kp = kp
+        self.Ki = ki
+        self.Kd = kd
+        self.set_point = set_point
+        self.integral = 0
+        self.previous_error = 0
+
+    def update(self, current_temperature, dt):
+        error = self.set_point - current_temperature
+        self.integral += error * dt
+        derivative = (error - self.previous_error) / dt
+        output = self.Kp * error + self.Ki * self.integral + self.Kd * derivative
+        self.previous_error = error
+        return output
+
+
+# состояние органов управления (аналог чекбоксов окна модели)
+class ReactorControls:
+    def __init__(self, feed_1=False, feed_2=False, discharge=False,
+                 T_control=False, mixing=False, p_control=False, reset_timer=False):
+        self.feed_1 = feed_1            # checkBox   - подача первого реагента
+        self.feed_2 = feed_2            # checkBox_2 - подача второго реагента
+        self.discharge = discharge      # checkBox_3 - слив
+        self.T_control = T_control      # checkBox_4 - режим изменения Т
+        self.mixing = mixing            # checkBox_5 - перемешивание
+        self.p_control = p_control      # checkBox_7 - режим изменения p
+        self.reset_timer = reset_timer  # checkBox_10 - сброс таймера работы
+
+    def any_active(self):
+        return (self.feed_1 or self.feed_2 or self.discharge or
+                self.T_control or self.mixing or self.p_control)
+
+
+# состояние реактора
+class ReactorState:
+    def __init__(self, params):
+        self.V_1, self.V_2, self.V = 0, 0, 0
+        self.T = params['T']['ambient']
+        self.p = params['p']['atmosphere']
+        # уставки, на которые в данный момент настроены ПИД-регуляторы
+        self.T_id = params['T']['ideal']
+        self.p_id = params['p']['ideal']
+        # индексы предупреждений: ind_V (-1, 0, 1), ind_T и ind_p (-2..2);
+        # level_V - уровень предупреждения по V с учётом стороны (-2..2, см. alarms)
+        self.ind_V = -1
+        self.level_V = -2
+        self.ind_T, self.ind_p = 0, 0
+        self.ind_T_block, self.ind_p_block = False, False
+        # характер изменения Т: 1 - нагрев, -1 - охлаждение, 0 - нет
+        self.thermal = 0
+        # последние выходы ПИД-регуляторов
+        self.output_T, self.output_p = 0, 0
+        # таймер работы (мс)
+        self.elapsed_time = 0
+        self.timer_active = False
+        # время модели с момента создания (с)
+        self.time = 0
+        # концентрации реагентов и продукта (моль/л) и превращение реагента 1 (доля), см. kinetics
+        self.c_1, self.c_2, self.c_product = 0.0, 0.0, 0.0
+        self.conversion = 0.0
+
+
+# модель реактора; params - словарь в формате wind_params.save_params
+# (словарь не копируется: изменения скоростей и уставок в нём сразу видны модели);
+# integrator - интегратор регулируемых Т и p (integrators.INTEGRATORS), 'euler' - исходная модель
+class ReactorModel:
+    def __init__(self, params, integrator='euler', **integrator_options):
+        self.params = params
+        # у Т и p свои экземпляры: адаптивный интегратор хранит последний шаг
+        self.integrator_T = make_integrator(integrator, **integrator_options)
+        self.integrator_p = make_integrator(integrator, **integrator_options)
+        self.state = ReactorState(params)
+        # коэффициенты регуляторов: params['pid']['T'] / ['p'] (подбираются pid_tuning.py), иначе PID_GAINS
+        pid_gains = params.get('pid', {})
+        self.gains_T = pid_gains.get('T', PID_GAINS)
+        self.gains_p = pid_gains.get('p', PID_GAINS)
+        self.pid_T = PIDController(set_point=self.state.T_id, **self.gains_T)
+        self.pid_p = PIDController(set_point=self.state.p_id, **self.gains_p)
+        # пороги предупреждений (собираются один раз; события - для journal.record_alarms)
+        self.alarms = AlarmTable(params)
+        # реакция reagent_1 + reagent_2 -> product (параметры - params['kinetics'])
+        self.kinetics = Kinetics(params)
+        # замеры времени участков шага (tick_stats.TickStats), None - без замеров
+        self.stats = None
+
+    # шаг модели длительностью dt (с); controls изменяется на месте (автоматические отключения)
+    def step(self, dt, controls):
+        s = self.state
+        stats = self.stats
+        s.time += dt
+        self._step_timer(dt, controls)
+        self._step_volumes(dt, controls)
+        if stats is not None:
+            stats.mark('volumes')
+        self._check_V()
+        self._step_mixing(controls)
+        if stats is not None:
+            stats.mark('alarms')
+        self._step_T(dt, controls)
+        if stats is not None:
+            stats.mark('T PID')
+        self._check_T()
+        if stats is not None:
+            stats.mark('alarms')
+        self._step_p(dt, controls)
+        if stats is not None:
+            stats.mark('p PID')
+        self._check_p()
+        if stats is not None:
+            stats.mark('alarms')
+        self._step_reaction(dt, controls)
+        if stats is not None:
+            stats.mark('kinetics')
+        return s
+
+    # объёмы, Т и p не меняются со временем: нет подачи, слива и регулирования
+    # (перемешивание на них не влияет; реакция при этом идёт - см. advance_idle)
+    def is_steady(self, controls):
+        return not (controls.feed_1 or controls.feed_2 or controls.discharge or
+                    controls.T_control or controls.p_control)
+
+    # пропуск интервала duration (с), на котором объёмы, Т и p не меняются (см. is_steady);
+    # реакция за интервал считается одним вызовом решателя с его собственным шагом
+    def advance_idle(self, duration, controls):
+        s = self.state
+        s.time += duration
+        if s.timer_active:
+            s.elapsed_time += duration * 1000
+        self._step_reaction(duration, controls)
+
+    # заполненность реактора, %
+    def fill_percent(self):
+        return self.state.V / self.params['V']['reactor'] * 100
+
+    def _step_timer(self, dt, controls):
+        s = self.state
+        if controls.any_active() and not s.timer_active:
+            s.elapsed_time = 0
+            s.timer_active = True
+        if s.timer_active:
+            s.elapsed_time += dt * 1000
+        if controls.reset_timer:
+            s.timer_active = False
+            controls.reset_timer = False
+
+    def _step_volumes(self, dt, controls):
+        s = self.state
+        V_reactor = self.params['V']['reactor']
+        v = self.params['v']
+        # залив реагентов (скорости в л/мин)
+        v_reagent_1 = v['reagent_1'] * dt / 60
+        v_reagent_2 = v['reagent_2'] * dt / 60
+        if controls.feed_1 and (s.V+v_reagent_1)/V_reactor*100 < 100:
+            s.V_1 += v_reagent_1
+            s.V += v_reagent_1
+            self.kinetics.add(0, v_reagent_1)
+        else:
+            controls.feed_1 = False
+        if controls.feed_2 and (s.V+v_reagent_2)/V_reactor*100 < 100:
+            s.V_2 += v_reagent_2
+            s.V += v_reagent_2
+            self.kinetics.add(1, v_reagent_2)
+        else:
+            controls.feed_2 = False
+        # слив реагентов
+        v_discharge = v['discharge'] * dt / 60
+        if controls.discharge and (s.V-v_discharge)/V_reactor*100 > 0:
+            self.kinetics.remove(v_discharge/s.V)
+            s.V_1 -= s.V_1/s.V*v_discharge
+            s.V_2 -= s.V_2/s.V*v_discharge
+            s.V -= v_discharge
+
+    def _check_V(self):
+        s = self.state
+        s.level_V = self.alarms.update('V', s.V / self.params['V']['reactor'] * 100)
+        s.ind_V = IND_V[s.level_V + 2]
+
+    # перемешивание запрещено при недопустимом уровне или температуре
+    def _step_mixing(self, controls):
+        s = self.state
+        if controls.mixing and (s.ind_V == -1 or s.ind_T in (-2, 2)):
+            controls.mixing = False
+
+    def _step_T(self, dt, controls):
+        s = self.state
+        T = self.params['T']
+        # если уставка изменилась, то ПИД-регулятор переориентируется на новое значение
+        if T['ideal'] != s.T_id:
+            s.T_id = T['ideal']
+            self.pid_T = PIDController(set_point=s.T_id, **self.gains_T)
+
+        if controls.T_control and s.ind_V != -1:
+            pid_dt = dt / TICK * PID_DT_PER_TICK
+            # имитация изменения температуры; при выходе за пределы - блокировка
+            s.T, output, blocked = self.integrator_T.advance_pid(self.pid_T, s.T, pid_dt,
+                                                                 T['limit_min'], T['limit_max'])
+            s.output_T = output
+            if blocked:
+                controls.T_control = False
+                s.T_id += 0.0000001
+                s.ind_T_block = True
+            else:
+                s.ind_T_block = False
+
+            if abs(output) < 0.01 and abs(s.T-s.T_id) < 0.05:
+                s.thermal = 0
+                controls.T_control = False
+            elif output > 0:
+                s.thermal = 1
+            elif output < 0:
+                s.thermal = -1
+        elif s.ind_V == -1:
+            controls.T_control = False
+        else:
+            s.thermal = 0
+
+    def _check_T(self):
+        s = self.state
+        s.ind_T = self.alarms.update('T', s.T, s.ind_T_block)
+
+    def _step_p(self, dt, controls):
+        s = self.state
+        p = self.params['p']
+        if p['ideal'] != s.p_id:
+            s.p_id = p['ideal']
+            self.pid_p = PIDController(set_point=s.p_id, **self.gains_p)
+
+        if controls.p_control:
+            pid_dt = dt / TICK * PID_DT_PER_TICK
+            # имитация изменения давления; при выходе за пределы - блокировка
+            s.p, output, blocked = self.integrator_p.advance_pid(self.pid_p, s.p, pid_dt,
+                                                                 p['limit_min'], p['limit_max'])
+            s.output_p = output
+            if blocked:
+                controls.p_control = False
+                s.p_id += 0.0000001
+                s.ind_p_block = True
+            else:
+                s.ind_p_block = False
+
+            if abs(output) < 0.01 and abs(s.p-s.p_id) < 0.05:
+                controls.p_control = False
+
+    def _check_p(self):
+        s = self.state
+        s.ind_p = self.alarms.update('p', s.p, s.ind_p_block)
+
+    # реакция за dt при текущих объёме, температуре и перемешивании
+    def _step_reaction(self, dt, controls):
+        s = self.state
+        kinetics = self.kinetics
+        kinetics.react(dt, s.V, s.T, controls.mixing, self.params['v']['mixing'])
+        s.c_1, s.c_2, s.c_product = kinetics.concentrations(s.V)
+        s.conversion = kinetics.conversion()
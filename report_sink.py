@@ -0,0 +1,97 @@
+# потоковая запись отчёта: строки журнала сразу дописываются в CSV (с периодическим fsync),
+# итоговый .xlsx (и показатели качества регулирования по телеметрии) собирается в фоновом потоке
+import csv
+import os
+import threading
+import time
+
+from journal import REPORT_COLUMNS
+
+
+# как часто содержимое CSV принудительно сбрасывается на диск, с
+FSYNC_INTERVAL = 1.0
+
+
+# путь к файлу отчёта в папке 'Reports' текущей директории (папка создаётся при необходимости)
+def report_path(params, ext='.xlsx'):
+    reports_folder = os.path.join(os.getcwd(), 'Reports')
+    if not os.path.exists(reports_folder):
+        os.makedirs(reports_folder)
+    return os.path.join(reports_folder, f"{params['name']['exp']}{ext}")
+
+
+# совпадающие имена экспериментов (params['name']['exp']) получают номер, чтобы отчёты не перезаписывались
+def unique_exp_names(params_list):
+    seen = {}
+    for params in params_list:
+        name = params['name']['exp']
+        seen[name] = seen.get(name, 0) + 1
+        if seen[name] > 1:
+            params['name']['exp'] = f'{name}_{seen[name]}'
+    return params_list
+
+
+# сборка .xlsx из CSV отчёта (в том числе после аварийного завершения)
+def csv_to_excel(csv_path, xlsx_path):
+    import pandas as pd
+    df = pd.read_csv(csv_path, dtype=str, keep_default_na=False)
+    df.to_excel(xlsx_path, index=False)
+
+
+# отчёты после завершения работы: .xlsx из CSV и, если есть телеметрия,
+# показатели качества регулирования Reports/<exp>_control.xlsx (analytics)
+def export_reports(csv_path, xlsx_path, telemetry_path=None):
+    csv_to_excel(csv_path, xlsx_path)
+    if telemetry_path is not None:
+        from analytics import export_control_summary
+        export_control_summary([telemetry_path])
+
+
+class ReportSink:
+    def __init__(self, csv_path, fsync_interval=FSYNC_INTERVAL):
+        self.csv_path = csv_path
+        self.fsync_interval = fsync_interval
+        self.file = open(csv_path, 'w', newline='', encoding='utf-8')
+        self.writer = csv.writer(self.file)
+        self.writer.writerow(REPORT_COLUMNS)
+        self.written = 0  # сколько записей журнала уже в файле
+        self.last_fsync = time.monotonic()
+        self.export_thread = None
+        self.sync()
+
+    # дозапись новых записей журнала
+    def write_from(self, journal):
+        if len(journal) == self.written or self.file.closed:
+            return
+        for row in journal.rows(self.written):
+            self.writer.writerow(row)
+        self.written = len(journal)
+        self.file.flush()
+        if time.monotonic() - self.last_fsync >= self.fsync_interval:
+            self.sync()
+
+    def sync(self):
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        self.last_fsync = time.monotonic()
+
+    def close(self):
+        if not self.file.closed:
+            self.sync()
+            self.file.close()
+
+    # закрытие CSV и сборка .xlsx в фоновом потоке (поток не daemon: процесс дождётся записи);
+    # telemetry_path - закрытый файл телеметрии прогона для показателей качества регулирования
+    def export_excel(self, xlsx_path, telemetry_path=None):
+        self.close()
+        self.export_thread = threading.Thread(target=export_reports,
+                                              args=(self.csv_path, xlsx_path, telemetry_path),
+                                              name='report-export')
+        self.export_thread.start()
+        return self.export_thread
+
+    # ожидание фоновой сборки .xlsx; вызывается до завершения интерпретатора,
+    # иначе поток не сможет импортировать pandas
+    def wait(self):
+        if self.export_thread is not None:
+            self.export_thread.join()
@@ -0,0 +1,230 @@
+# сценарии: список действий оператора с отметками времени модели, прогон без окна быстрее реального времени
+#
+# формат сценария (JSON):
+# {"duration": 7200,
+#  "events": [{"t": 0, "feed_1": true, "reagent_1": 30},
+#             {"t": 120, "feed_1": false, "T_control": true, "T_ideal": 60},
+#             {"t": 7200, "end": true}]}
+# ключи события - поля ReactorControls, скорости из params['v'] (reagent_1, reagent_2, discharge_rate, mixing_rate),
+# уставки T_ideal и p_ideal, end; допускаются и имена виджетов окна модели (checkBox_4, dial_3, ...)
+#
+# python scenario.py params.json scenario.json --integrator rk45 --dt 1  - крупный шаг с адаптивным интегратором
+# python scenario.py params.json scenario.json --fast-idle  - интервалы без изменений (нет подачи, слива
+# и регулирования) пропускаются одним переходом; без флага каждый шаг модели записывается в телеметрию,
+# как в окне модели, с флагом в телеметрии на месте пропуска - разрыв по времени
+#
+# контрольные точки (checkpoint.py): --save-checkpoint прогрев.ckpt - сохранить состояние в конце прогона,
+# --checkpoint прогрев.ckpt - начать с сохранённого состояния; время событий и duration сценария
+# тогда отсчитываются от момента контрольной точки, параметры берутся из params.json (варианты «что если»)
+import argparse
+import json
+import math
+import sys
+from datetime import datetime
+
+from reactor_model import ReactorModel, ReactorControls, TICK
+from integrators import INTEGRATORS
+from journal import EventJournal, Action
+from checkpoint import read_checkpoint, restore, save_checkpoint
+from report_sink import ReportSink, report_path
+from telemetry import TelemetryRecorder
+
+
+# имена виджетов окна модели -> ключи событий сценария
+WIDGET_KEYS = {
+    'checkBox': 'feed_1',
+    'checkBox_2': 'feed_2',
+    'checkBox_3': 'discharge',
+    'checkBox_4': 'T_control',
+    'checkBox_5': 'mixing',
+    'checkBox_7': 'p_control',
+    'checkBox_10': 'reset_timer',
+    'checkBox_12': 'end',
+    'dial_3': 'reagent_1',
+    'dial_4': 'reagent_2',
+    'dial_5': 'discharge_rate',
+    'dial_6': 'mixing_rate',
+    'doubleSpinBox': 'T_ideal',
+    'doubleSpinBox_2': 'p_ideal',
+}
+CONTROL_KEYS = ('feed_1', 'feed_2', 'discharge', 'T_control', 'mixing', 'p_control', 'reset_timer')
+# ключ -> (поле params['v'], минимум, максимум) - как у соответствующих dial
+RATE_KEYS = {
+    'reagent_1': ('reagent_1', 'reagent_min', 'reagent_max'),
+    'reagent_2': ('reagent_2', 'reagent_min', 'reagent_max'),
+    'discharge_rate': ('discharge', 'discharge_min', 'discharge_max'),
+    'mixing_rate': ('mixing', 'mixing_min', 'mixing_max'),
+}
+SETPOINT_KEYS = {'T_ideal': 'T', 'p_ideal': 'p'}
+# пределы значения QDial / QSpinBox (int в Qt - 32 бита)
+INT_RANGE = (-2 ** 31, 2 ** 31 - 1)
+
+
+def load_scenario(path):
+    with open(path, encoding='utf-8') as file:
+        scenario = json.load(file)
+    if isinstance(scenario, list):
+        scenario = {'events': scenario}
+    return scenario
+
+
+# значение события по типу органа управления: флаг - bool (true/false, 0/1), скорость - int,
+# уставка - конечное число float; неподходящее значение - ValueError
+def coerce_value(key, value):
+    if key in RATE_KEYS or key in SETPOINT_KEYS:
+        if isinstance(value, bool) or not isinstance(value, (int, float)) or not math.isfinite(value):
+            raise ValueError(f"{key}: ожидается число, получено {value!r}")
+        if key in SETPOINT_KEYS:
+            return float(value)
+        value = int(value)
+        if not INT_RANGE[0] <= value <= INT_RANGE[1]:
+            raise ValueError(f"{key}: значение вне допустимого диапазона: {value}")
+        return value
+    if not isinstance(value, (bool, int, float)) or value not in (0, 1):
+        raise ValueError(f"{key}: ожидается true или false, получено {value!r}")
+    return bool(value)
+
+
+# изменения с приведёнными к единому виду ключами (имена виджетов заменяются ключами событий)
+# и значениями (coerce_value)
+def normalize_changes(event, skip=('t',)):
+    changes = {}
+    for key, value in event.items():
+        if key in skip:
+            continue
+        key = WIDGET_KEYS.get(key, key)
+        if key not in CONTROL_KEYS and key not in RATE_KEYS and key not in SETPOINT_KEYS and key != 'end':
+            raise ValueError(f"неизвестный ключ события сценария: {key}")
+        changes[key] = coerce_value(key, value)
+    return changes
+
+
+# события, отсортированные по времени, с приведёнными к единому виду ключами
+def normalize_events(events):
+    return [(float(event['t']), normalize_changes(event)) for event in sorted(events, key=lambda e: e['t'])]
+
+
+# применение событий к параметрам и органам управления (значения ограничиваются как на виджетах)
+def apply_event(params, controls, changes):
+    for key, value in changes.items():
+        if key in CONTROL_KEYS:
+            setattr(controls, key, bool(value))
+        elif key in RATE_KEYS:
+            field, v_min, v_max = RATE_KEYS[key]
+            params['v'][field] = min(max(int(value), params['v'][v_min]), params['v'][v_max])
+        elif key in SETPOINT_KEYS:
+            group = params[SETPOINT_KEYS[key]]
+            group['ideal'] = min(max(float(value), group['limit_min']), group['limit_max'])
+
+
+class ScenarioRunner:
+    # report=True - отчёт Reports/<exp>.csv/.xlsx как в окне модели; telemetry=True - Reports/<exp>.tlm
+    # integrator - интегратор Т и p (integrators.INTEGRATORS); с 'rk45' допустим крупный шаг dt
+    # checkpoint - файл контрольной точки, с которой начинается прогон; save_checkpoint - куда сохранить
+    # состояние в конце прогона; fast_idle - пропускать интервалы без изменений одним переходом
+    # (без записей телеметрии на интервале)
+    def __init__(self, params, scenario, dt=TICK, report=True, telemetry=True, integrator='euler',
+                 checkpoint=None, save_checkpoint=None, fast_idle=False):
+        self.params = params
+        self.events = normalize_events(scenario.get('events', []))
+        self.duration = scenario.get('duration')
+        if self.duration is None:
+            self.duration = self.events[-1][0] if self.events else 0
+        self.dt = dt
+        self.fast_idle = fast_idle
+        self.model = ReactorModel(params, integrator)
+        self.controls = ReactorControls()
+        self.journal = EventJournal()
+        start_time = 0
+        if checkpoint is not None:
+            restore(read_checkpoint(checkpoint), self.model, self.controls, self.journal)
+            start_time = self.model.state.time
+            self.events = [(t + start_time, changes) for t, changes in self.events]
+            self.duration += start_time
+        self.checkpoint_path = save_checkpoint
+        self.checkpoint_thread = None
+        self.report_sink = ReportSink(report_path(params, '.csv')) if report else None
+        self.telemetry = TelemetryRecorder(report_path(params, '.tlm')) if telemetry else None
+        # время журнала: реальное время запуска + время модели с начала прогона
+        self.start_timestamp = datetime.now().timestamp() - start_time
+
+    def run(self):
+        model, controls, journal = self.model, self.controls, self.journal
+        s = model.state
+        i, n_events = 0, len(self.events)
+        ended = False
+        while s.time < self.duration - 1e-9 and not ended:
+            # события, время которых наступило
+            while i < n_events and self.events[i][0] <= s.time + 1e-9:
+                changes = self.events[i][1]
+                apply_event(self.params, controls, changes)
+                ended = ended or bool(changes.get('end'))
+                i += 1
+            if ended:
+                break
+            model.step(self.dt, controls)
+            if self.telemetry is not None:
+                self.telemetry.record(model, controls)
+            journal.record_alarms(model.alarms, self.start_timestamp + s.time)
+            journal.record_controls(controls, self.start_timestamp + s.time)
+            # пока состояние не меняется (нет подачи, слива и регулирования), переход сразу к следующему событию
+            if self.fast_idle and model.is_steady(controls):
+                next_time = self.events[i][0] if i < n_events else self.duration
+                if next_time > s.time + self.dt:
+                    model.advance_idle(next_time - s.time, controls)
+        # контрольная точка - до записи о завершении работы (продолжение прогона её не содержит)
+        if self.checkpoint_path is not None:
+            self.checkpoint_thread = save_checkpoint(self.checkpoint_path, model, controls, journal)
+        journal.append(self.start_timestamp + s.time, Action.END)
+        self.finish()
+        return model
+
+    def finish(self):
+        # телеметрия закрывается до сборки отчётов: по ней считаются показатели качества регулирования
+        if self.telemetry is not None:
+            self.telemetry.close()
+        if self.report_sink is not None:
+            self.report_sink.write_from(self.journal)
+            telemetry_path = report_path(self.params, '.tlm') if self.telemetry is not None else None
+            thread = self.report_sink.export_excel(report_path(self.params), telemetry_path)
+            thread.join()
+        if self.checkpoint_thread is not None:
+            self.checkpoint_thread.join()
+
+
+def run_scenario(params, scenario, **kwargs):
+    runner = ScenarioRunner(params, scenario, **kwargs)
+    runner.run()
+    return runner
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Прогон сценария модели реактора без окна')
+    parser.add_argument('params', help='JSON с параметрами в формате wind_params.save_params')
+    parser.add_argument('scenario', help='JSON со сценарием')
+    parser.add_argument('--dt', type=float, default=TICK, help='шаг модели, с (по умолчанию как в окне)')
+    parser.add_argument('--integrator', choices=list(INTEGRATORS), default='euler',
+                        help='интегратор Т и p (euler - как в окне)')
+    parser.add_argument('--no-report', action='store_true', help='не сохранять отчёт')
+    parser.add_argument('--no-telemetry', action='store_true', help='не записывать телеметрию')
+    parser.add_argument('--checkpoint', help='начать с контрольной точки (время сценария - от неё)')
+    parser.add_argument('--save-checkpoint', help='сохранить контрольную точку в конце прогона')
+    parser.add_argument('--fast-idle', action='store_true',
+                        help='пропускать интервалы без изменений (в телеметрии - разрыв по времени)')
+    args = parser.parse_args(argv)
+
+    with open(args.params, encoding='utf-8') as file:
+        params = json.load(file)
+    started = datetime.now()
+    runner = run_scenario(params, load_scenario(args.scenario), dt=args.dt,
+                          integrator=args.integrator, report=not args.no_report, telemetry=not args.no_telemetry,
+                          checkpoint=args.checkpoint, save_checkpoint=args.save_checkpoint,
+                          fast_idle=args.fast_idle)
+    elapsed = (datetime.now() - started).total_seconds()
+    s = runner.model.state
+    print(f"{params['name']['exp']}: {s.time:.0f} с модели за {elapsed:.3f} с "
+          f"(V={s.V:.2f}, T={s.T:.2f}, p={s.p:.3f}, продукт={s.c_product:.3f} моль/л, действий: {len(runner.journal)})")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,144 @@
+# кольцевой буфер для данных графиков с постоянной стоимостью добавления;
+# пределы осей считаются по выбранным для отрисовки данным (исходные точки или уровень пирамиды)
+import numpy as np
+
+
+class SeriesBuffer:
+    # capacity - сколько последних точек хранится (окно хранения)
+    def __init__(self, capacity):
+        self.capacity = capacity
+        # каждое значение записывается дважды (i и i + capacity), поэтому окно
+        # всегда доступно как непрерывный срез без копирования
+        self._data = np.empty(2 * capacity)
+        self._count = 0
+
+    def __len__(self):
+        return min(self._count, self.capacity)
+
+    def append(self, value):
+        pos = self._count % self.capacity
+        self._data[pos] = self._data[pos + self.capacity] = value
+        self._count += 1
+
+    # данные окна в порядке добавления (вид на внутренний массив, без копирования)
+    def view(self):
+        if self._count <= self.capacity:
+            return self._data[:self._count]
+        start = self._count % self.capacity
+        return self._data[start:start + self.capacity]
+
+    def first(self):
+        return self.view()[0]
+
+    def last(self):
+        return self._data[(self._count - 1) % self.capacity]
+
+    def clear(self):
+        self._count = 0
+
+    # сколько точек добавлено всего (включая вышедшие из окна хранения)
+    def total(self):
+        return self._count
+
+
+# уровень пирамиды: корзины по size исходных точек, для каждой - x первой точки, min и max каждого ряда
+class _PyramidLevel:
+    def __init__(self, size, capacity, n_series):
+        self.size = size
+        self.x = SeriesBuffer(capacity)
+        self.lo = [SeriesBuffer(capacity) for _ in range(n_series)]
+        self.hi = [SeriesBuffer(capacity) for _ in range(n_series)]
+        # незаполненная корзина
+        self.count = 0
+        self.pending_x = 0.0
+        self.pending_lo = [0.0] * n_series
+        self.pending_hi = [0.0] * n_series
+
+    def append(self, x, values):
+        if self.count == 0:
+            self.pending_x = x
+            self.pending_lo = list(values)
+            self.pending_hi = list(values)
+        else:
+            lo, hi = self.pending_lo, self.pending_hi
+            for i, value in enumerate(values):
+                if value < lo[i]:
+                    lo[i] = value
+                if value > hi[i]:
+                    hi[i] = value
+        self.count += 1
+        if self.count == self.size:
+            self.x.append(self.pending_x)
+            for buffer, value in zip(self.lo, self.pending_lo):
+                buffer.append(value)
+            for buffer, value in zip(self.hi, self.pending_hi):
+                buffer.append(value)
+            self.count = 0
+
+    # корзины, начиная с первой, x которой не меньше x_from, плюс незаполненная;
+    # каждая корзина - две точки (min и max), поэтому выбросы не теряются
+    def envelope(self, x_from):
+        bx = self.x.view()
+        start = int(np.searchsorted(bx, x_from)) if x_from is not None else 0
+        n = len(bx) - start + (1 if self.count else 0)
+        x = np.empty(2 * n)
+        x[:2 * (len(bx) - start)] = np.repeat(bx[start:], 2)
+        series = []
+        for lo, hi, pending_lo, pending_hi in zip(self.lo, self.hi, self.pending_lo, self.pending_hi):
+            y = np.empty(2 * n)
+            y[0:2 * (len(bx) - start):2] = lo.view()[start:]
+            y[1:2 * (len(bx) - start):2] = hi.view()[start:]
+            if self.count:
+                y[-2], y[-1] = pending_lo, pending_hi
+            series.append(y)
+        if self.count:
+            x[-2] = x[-1] = self.pending_x
+        return x, series
+
+    def clear(self):
+        self.x.clear()
+        for buffer in self.lo + self.hi:
+            buffer.clear()
+        self.count = 0
+
+
+# пирамида прореживания min/max для нескольких рядов с общим x: уровень l хранит корзины
+# по factor**l исходных точек (по capacity корзин на уровень), обновляется при каждом добавлении;
+# сами исходные точки (уровень 0) хранятся в SeriesBuffer графика
+class MinMaxPyramid:
+    def __init__(self, n_series, capacity, factor=4, levels=4):
+        self.levels = [_PyramidLevel(factor ** level, capacity, n_series) for level in range(1, levels + 1)]
+
+    def append(self, x, values):
+        for level in self.levels:
+            level.append(x, values)
+
+    def clear(self):
+        for level in self.levels:
+            level.clear()
+
+    # x самой ранней хранимой точки (исходные точки или корзины верхнего уровня)
+    def first(self, raw_x):
+        top = self.levels[-1].x
+        if raw_x.total() <= raw_x.capacity or not len(top):
+            return raw_x.first()
+        return min(top.first(), raw_x.first())
+
+    # данные для отрисовки диапазона x >= x_from (None - вся история) не более чем в max_points
+    # точках по x: исходные точки, если их мало, иначе самый подробный подходящий уровень
+    def select(self, raw_x, raw_series, x_from, max_points):
+        xs = raw_x.view()
+        raw_complete = raw_x.total() <= raw_x.capacity
+        if raw_complete or (x_from is not None and xs[0] <= x_from):
+            start = int(np.searchsorted(xs, x_from)) if x_from is not None else 0
+            if len(xs) - start <= 2 * max_points:
+                return xs[start:], [data.view()[start:] for data in raw_series]
+        for level in self.levels:
+            bx = level.x.view()
+            complete = level.x.total() <= level.x.capacity
+            if not (complete or (x_from is not None and len(bx) and bx[0] <= x_from)):
+                continue  # уровень не покрывает нужный диапазон
+            start = int(np.searchsorted(bx, x_from)) if x_from is not None else 0
+            if len(bx) - start <= max_points or level is self.levels[-1]:
+                return level.envelope(x_from)
+        return self.levels[-1].envelope(x_from)
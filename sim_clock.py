@@ -0,0 +1,43 @@
+# часы модели с фиксированным шагом: реальное время кадра умножается на скорость модели
+# и накапливается, за кадр выполняется столько шагов модели, сколько набралось
+import time
+
+from reactor_model import TICK
+
+
+# интервал обновления окна модели, мс (не зависит от скорости модели)
+FRAME_MS = 20
+# предел шагов модели за кадр: при нехватке производительности модель замедляется, а не копит долг
+MAX_STEPS_PER_FRAME = 5000
+
+
+class SimulationClock:
+    def __init__(self, step=TICK, speed=1, max_steps=MAX_STEPS_PER_FRAME):
+        self.step = step
+        self.speed = speed
+        self.max_steps = max_steps
+        self.accumulator = 0.0
+        self.last = None
+        self.frame_time = 0.0  # реальная длительность последнего кадра, с
+        self.dropped = 0.0     # модельное время, отброшенное из-за предела шагов, с
+
+    def set_speed(self, speed):
+        self.speed = speed
+
+    # сколько шагов модели выполнить в этом кадре
+    def advance(self):
+        now = time.perf_counter()
+        if self.last is None:
+            self.last = now
+            return 0
+        self.frame_time = now - self.last
+        self.last = now
+        self.accumulator += self.frame_time * self.speed
+        steps = int(self.accumulator / self.step)
+        if steps > self.max_steps:
+            self.dropped += (steps - self.max_steps) * self.step
+            steps = self.max_steps
+            self.accumulator = 0.0
+        else:
+            self.accumulator -= steps * self.step
+        return steps
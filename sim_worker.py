@@ -0,0 +1,186 @@
+# модель реактора в отдельном потоке: шаги модели, телеметрия, журнал и дозапись отчёта
+# выполняются в потоке модели, окно только показывает последний снимок состояния и отправляет
+# изменения органов управления и параметров через очередь; долгая отрисовка графиков
+# или перетаскивание окна больше не замедляют модельное время и не меняют работу регуляторов
+#
+# снимок (Snapshot) не изменяется после публикации: поток модели каждый раз создаёт новый
+# и заменяет ссылку latest (замена ссылки атомарна, блокировка не нужна)
+# команды применяются в потоке модели между пакетами шагов, в порядке поступления
+import copy
+import threading
+import time
+from collections import deque, namedtuple
+from datetime import datetime
+
+from checkpoint import save_checkpoint
+from journal import Action
+from reactor_model import TICK
+from sim_clock import SimulationClock
+from tick_stats import TickStats
+
+
+# интервал пакетов шагов модели, мс (меньше кадра окна: модельное время идёт равномернее)
+WORKER_PERIOD_MS = 5
+# как часто обновляется текст замеров потока модели, с
+STATS_PERIOD = 0.5
+
+# seq - номер снимка, applied - сколько команд применено к моменту снимка,
+# state / controls - копии ReactorState и ReactorControls, dropped - отброшенное модельное время, с
+Snapshot = namedtuple('Snapshot', 'seq applied state controls dropped')
+
+
+class SimulationWorker:
+    def __init__(self, model, controls, journal, telemetry=None, report_sink=None, server=None,
+                 speed=1, period_ms=WORKER_PERIOD_MS):
+        self.model = model
+        self.controls = controls
+        self.journal = journal
+        self.telemetry = telemetry
+        self.report_sink = report_sink
+        self.server = server
+        self.period = period_ms / 1000
+        self.clock = SimulationClock(speed=speed)
+        # замеры пакетов шагов (включаются командой, окно видит только текст stats_text)
+        self.stats = TickStats(period_ms)
+        self.stats_text = ''
+        self.commands = deque()
+        self.sent = 0  # сколько команд отправлено (увеличивается только окном)
+        self.applied = 0
+        self.latest = self._snapshot(0)
+        self.stats_path = None
+        self.checkpoint_path = None
+        self.checkpoint_threads = []
+        self.thread = None
+        self.error = None
+
+    def start(self):
+        self.clock.advance()
+        self.thread = threading.Thread(target=self._run, name='reactor-model', daemon=True)
+        self.thread.start()
+        return self
+
+    # ---- вызываются из потока окна ----
+
+    def set_controls(self, changes):
+        self._send('controls', changes)
+
+    def set_param(self, section, key, value):
+        self._send('param', (section, key, value))
+
+    def set_speed(self, speed):
+        self._send('speed', speed)
+
+    def set_stats_enabled(self, enabled):
+        self._send('stats', enabled)
+
+    # контрольная точка (checkpoint.py): состояние берётся в потоке модели между пакетами шагов,
+    # файл записывается в фоновом потоке
+    def save_checkpoint(self, path):
+        self._send('checkpoint', path)
+
+    # остановка: в журнал записывается завершение работы, отчёт дописывается, телеметрия закрывается;
+    # stats_path - куда сохранить замеры потока модели (если они есть), checkpoint_path - куда сохранить
+    # контрольную точку после последних шагов (до записи о завершении работы)
+    def stop(self, stats_path=None, checkpoint_path=None):
+        if self.thread is None:
+            return
+        self._send('stop', (stats_path, checkpoint_path))
+        self.thread.join()
+        self.thread = None
+        for thread in self.checkpoint_threads:
+            thread.join()
+        if self.error is not None:
+            raise self.error
+
+    # ошибка, на которой остановился поток модели (None - поток работает или остановлен командой stop);
+    # проверяется окном каждый кадр
+    def failure(self):
+        if self.error is not None:
+            return self.error
+        if self.thread is not None and not self.thread.is_alive():
+            return RuntimeError('поток модели завершился без команды остановки')
+        return None
+
+    def _send(self, kind, value):
+        self.sent += 1
+        self.commands.append((kind, value))
+
+    # ---- поток модели ----
+
+    def _snapshot(self, seq):
+        return Snapshot(seq, self.applied, copy.copy(self.model.state), copy.copy(self.controls),
+                        self.clock.dropped)
+
+    # шаги модели одного пакета: физика, телеметрия, журнал предупреждений и переключений
+    # (вызывается в потоке модели; без потока - для замеров benchmarks.py)
+    def step_batch(self, steps, now):
+        for _ in range(steps):
+            self.model.step(TICK, self.controls)
+            if self.telemetry is not None:
+                self.telemetry.record(self.model, self.controls)
+            self.journal.record_alarms(self.model.alarms, now)
+            self.journal.record_controls(self.controls, now)
+
+    # новый снимок для окна и состояние для сервера управления
+    def publish(self):
+        if self.server is not None:
+            self.server.publish(self.model, self.controls)
+        self.latest = self._snapshot(self.latest.seq + 1)
+
+    def _apply_commands(self):
+        stop = False
+        while self.commands:
+            kind, value = self.commands.popleft()
+            if kind == 'controls':
+                for name, state in value.items():
+                    setattr(self.controls, name, state)
+            elif kind == 'param':
+                section, key, param = value
+                self.model.params[section][key] = param
+            elif kind == 'speed':
+                self.clock.set_speed(value)
+            elif kind == 'stats':
+                self.stats.set_enabled(value)
+                self.model.stats = self.stats if value else None
+                self.stats_text = ''
+            elif kind == 'checkpoint':
+                self.checkpoint_threads = [thread for thread in self.checkpoint_threads if thread.is_alive()]
+                self.checkpoint_threads.append(save_checkpoint(value, self.model, self.controls, self.journal))
+            elif kind == 'stop':
+                stop = True
+                self.stats_path, self.checkpoint_path = value
+            self.applied += 1
+        return stop
+
+    def _run(self):
+        stats_time = 0.0
+        try:
+            while True:
+                stop = self._apply_commands()
+                self.stats.begin()
+                now = datetime.now().timestamp()
+                self.step_batch(self.clock.advance(), now)
+                self.stats.mark('telemetry')
+                if stop:
+                    if self.checkpoint_path is not None:
+                        self.checkpoint_threads.append(
+                            save_checkpoint(self.checkpoint_path, self.model, self.controls, self.journal))
+                    self.journal.append(now, Action.END)
+                if self.report_sink is not None:
+                    self.report_sink.write_from(self.journal)
+                self.stats.mark('report')
+                self.publish()
+                self.stats.end()
+                if self.stats.enabled and time.perf_counter() - stats_time >= STATS_PERIOD:
+                    stats_time = time.perf_counter()
+                    self.stats_text = self.stats.overlay_text()
+                if stop:
+                    break
+                time.sleep(self.period)
+        except Exception as error:
+            self.error = error
+        finally:
+            if self.telemetry is not None:
+                self.telemetry.close()
+            if self.stats.ticks and self.stats_path:
+                self.stats.dump(self.stats_path)
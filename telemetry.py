@@ -0,0 +1,122 @@
+# запись телеметрии каждого такта модели в бинарный файл фиксированных записей (memory-mapped)
+# и чтение записанного как массивов NumPy без копирования
+#
+# записи идут с шагом модели; исключение - прогон сценария с --fast-idle (scenario.py, batch.py):
+# интервал без изменений пропускается одним переходом, и между соседними записями - разрыв по time
+import os
+import struct
+
+import numpy as np
+
+from journal import CONTROL_ACTIONS
+
+
+MAGIC = b'RTLM'
+VERSION = 2
+# заголовок: метка, версия, размер записи, число записей
+HEADER = struct.Struct('<4sHHQ')
+HEADER_SIZE = 64
+# на сколько записей файл увеличивается за раз
+CHUNK = 65536
+
+RECORD = np.dtype([
+    ('time', '<f8'),       # время модели, с
+    ('V', '<f8'), ('V_1', '<f8'), ('V_2', '<f8'),
+    ('T', '<f8'), ('p', '<f8'),
+    ('T_id', '<f8'), ('p_id', '<f8'),  # уставки
+    ('output_T', '<f8'), ('output_p', '<f8'),  # выходы ПИД-регуляторов
+    ('c_1', '<f8'), ('c_2', '<f8'), ('c_product', '<f8'),  # концентрации, моль/л
+    ('ind_V', 'i1'), ('ind_T', 'i1'), ('ind_p', 'i1'),
+    ('thermal', 'i1'),
+    ('controls', 'u1'),    # биты органов управления в порядке journal.CONTROL_ACTIONS
+])
+CONTROL_BITS = {name: 1 << i for i, (name, _, _) in enumerate(CONTROL_ACTIONS)}
+
+
+class TelemetryRecorder:
+    def __init__(self, path, chunk=CHUNK):
+        self.path = path
+        self.chunk = chunk
+        self.count = 0
+        self.file = open(path, 'w+b')
+        self.capacity = 0
+        self.records = None
+        self._grow()
+
+    # увеличение файла на chunk записей и повторное отображение в память
+    def _grow(self):
+        if self.records is not None:
+            self.records.flush()
+            self._write_header()
+        self.capacity += self.chunk
+        self.file.truncate(HEADER_SIZE + self.capacity * RECORD.itemsize)
+        self.records = np.memmap(self.file, dtype=RECORD, mode='r+', offset=HEADER_SIZE,
+                                 shape=(self.capacity,))
+
+    def _write_header(self):
+        self.file.seek(0)
+        self.file.write(HEADER.pack(MAGIC, VERSION, RECORD.itemsize, self.count))
+        self.file.flush()
+
+    # запись состояния модели после очередного шага
+    def record(self, model, controls):
+        if self.count == self.capacity:
+            self._grow()
+        s = model.state
+        mask = 0
+        for name, bit in CONTROL_BITS.items():
+            if getattr(controls, name):
+                mask |= bit
+        self.records[self.count] = (s.time, s.V, s.V_1, s.V_2, s.T, s.p, s.T_id, s.p_id,
+                                    s.output_T, s.output_p, s.c_1, s.c_2, s.c_product, s.ind_V, s.ind_T, s.ind_p, s.thermal, mask)
+        self.count += 1
+
+    def flush(self):
+        self.records.flush()
+        self._write_header()
+
+    # закрытие с обрезкой неиспользованного хвоста файла
+    def close(self):
+        if self.file.closed:
+            return
+        self.flush()
+        self.records = None
+        self.file.truncate(HEADER_SIZE + self.count * RECORD.itemsize)
+        self.file.close()
+
+
+class TelemetryReader:
+    def __init__(self, path):
+        with open(path, 'rb') as file:
+            magic, version, itemsize, count = HEADER.unpack(file.read(HEADER.size))
+        if magic != MAGIC:
+            raise ValueError(f'{path}: не файл телеметрии')
+        if version != VERSION or itemsize != RECORD.itemsize:
+            raise ValueError(f'{path}: неподдерживаемая версия телеметрии {version}')
+        size = (os.path.getsize(path) - HEADER_SIZE) // RECORD.itemsize
+        if not size:
+            self.count = 0
+            self.records = np.empty(0, dtype=RECORD)
+            return
+        self.records = np.memmap(path, dtype=RECORD, mode='r', offset=HEADER_SIZE, shape=(size,))
+        self.count = min(count, size)
+        # файл не был закрыт (аварийное завершение): записи после последнего сброса заголовка
+        # определяются по ненулевому времени (незаписанный хвост файла заполнен нулями)
+        if size > self.count:
+            tail = self.records['time'][self.count:] > 0
+            self.count += len(tail) if tail.all() else int(np.argmin(tail))
+        self.records = self.records[:self.count]
+
+    def __len__(self):
+        return self.count
+
+    # записи за интервал времени модели [t_start, t_end) - срез без копирования
+    def range(self, t_start=None, t_end=None):
+        time = self.records['time']
+        start = 0 if t_start is None else np.searchsorted(time, t_start, side='left')
+        end = self.count if t_end is None else np.searchsorted(time, t_end, side='left')
+        return self.records[start:end]
+
+    # одно поле за интервал времени, например reader.field('T', 60, 120)
+    def field(self, name, t_start=None, t_end=None):
+        return self.range(t_start, t_end)[name]
@@ -0,0 +1,122 @@
+# замеры работы быстрого таймера окна модели: фактический интервал между тактами,
+# время выполнения такта по участкам и число пропущенных сроков
+# (в выключенном состоянии begin/mark/end сразу возвращаются)
+import json
+import time
+from collections import deque
+
+
+# сколько последних значений хранится для расчёта перцентилей
+WINDOW = 2000
+# такт считается опоздавшим, если интервал больше ожидаемого в LATE_FACTOR раз
+LATE_FACTOR = 1.5
+
+
+class TickStats:
+    def __init__(self, interval_ms, enabled=False, window=WINDOW):
+        self.enabled = enabled
+        self.window = window
+        self.set_interval(interval_ms)
+        self.reset()
+
+    def reset(self):
+        self.ticks = 0
+        self.late = 0      # интервал между тактами больше ожидаемого в LATE_FACTOR раз
+        self.overruns = 0  # выполнение такта дольше ожидаемого интервала
+        self.expected_total = 0.0  # сумма ожидаемых интервалов, с
+        self.first_tick = None
+        self.last_tick = None
+        self.intervals = deque(maxlen=self.window)
+        self.durations = deque(maxlen=self.window)
+        self.sections = {}
+        self.current = {}
+        self.last_mark = None
+
+    # ожидаемый интервал таймера (меняется слайдером скорости модели)
+    def set_interval(self, interval_ms):
+        self.interval = max(interval_ms, 0) / 1000
+
+    def set_enabled(self, enabled):
+        self.enabled = enabled
+        if enabled:
+            self.reset()
+
+    def begin(self):
+        if not self.enabled:
+            return
+        now = time.perf_counter()
+        if self.last_tick is not None:
+            interval = now - self.last_tick
+            self.intervals.append(interval)
+            if self.interval and interval > self.interval * LATE_FACTOR:
+                self.late += 1
+        else:
+            self.first_tick = now
+        self.last_tick = now
+        self.last_mark = now
+        self.current.clear()
+
+    # конец участка такта: время с предыдущей отметки добавляется к участку name
+    def mark(self, name):
+        if not self.enabled or self.last_mark is None:
+            return
+        now = time.perf_counter()
+        self.current[name] = self.current.get(name, 0) + now - self.last_mark
+        self.last_mark = now
+
+    def end(self):
+        if not self.enabled or self.last_tick is None:
+            return
+        duration = time.perf_counter() - self.last_tick
+        self.durations.append(duration)
+        self.ticks += 1
+        self.expected_total += self.interval
+        if self.interval and duration > self.interval:
+            self.overruns += 1
+        for name, value in self.current.items():
+            if name not in self.sections:
+                self.sections[name] = deque(maxlen=self.window)
+            self.sections[name].append(value)
+
+    # отставание таймера от реального времени: сколько тактов по расписанию уже должно было
+    # пройти минус сколько прошло, в секундах реального времени (отрицательное - модель отстаёт)
+    def drift(self):
+        if self.first_tick is None:
+            return 0.0
+        return self.expected_total - (self.last_tick - self.first_tick)
+
+    def summary(self):
+        import numpy as np
+
+        def describe(values):
+            if not values:
+                return None
+            values = np.fromiter(values, dtype=float) * 1e3
+            return {'p50_ms': float(np.percentile(values, 50)), 'p99_ms': float(np.percentile(values, 99)),
+                    'max_ms': float(values.max()), 'mean_ms': float(values.mean())}
+        return {
+            'expected_interval_ms': self.interval * 1e3,
+            'ticks': self.ticks,
+            'late': self.late,
+            'overruns': self.overruns,
+            'drift_s': self.drift(),
+            'interval': describe(self.intervals),
+            'duration': describe(self.durations),
+            'sections': {name: describe(values) for name, values in self.sections.items()},
+        }
+
+    # краткая строка для наложения в окне модели
+    def overlay_text(self):
+        s = self.summary()
+        if not s['duration']:
+            return 'замеры: нет данных'
+        interval = s['interval']['p50_ms'] if s['interval'] else 0
+        lines = [f"такт {s['duration']['p50_ms']:.2f}/{s['duration']['p99_ms']:.2f} мс (p50/p99), "
+                 f"интервал {interval:.1f} из {s['expected_interval_ms']:.0f} мс",
+                 f"опоздания {s['late']}, перегрузки {s['overruns']}, расхождение {s['drift_s']:+.2f} с"]
+        lines += [f"  {name}: {value['p50_ms']:.3f} мс" for name, value in s['sections'].items() if value]
+        return '\n'.join(lines)
+
+    def dump(self, path):
+        with open(path, 'w', encoding='utf-8') as file:
+            json.dump(self.summary(), file, indent=2, ensure_ascii=False)
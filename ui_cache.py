@@ -0,0 +1,102 @@
+# загрузка форм из .ui через кэш сгенерированных модулей Python:
+# .ui компилируется (PyQt6.uic.compileUi) только если изменилось его содержимое, иначе импортируется готовый модуль
+#
+# ключ кэша - (mtime_ns, размер) .ui из os.stat: пока они совпадают с записанными в индексе
+# (.ui_cache/<имя>.json), .ui не читается; иначе .ui читается и хэшируется, и модуль генерируется заново,
+# только если изменилось содержимое (например, после git checkout меняется лишь mtime)
+# пути к изображениям формы отсчитываются от папки .ui (как в Qt Designer), а не от текущего каталога
+#
+# python ui_cache.py - заранее сгенерировать кэш для всех .ui в папке программы
+import hashlib
+import importlib.util
+import io
+import json
+import os
+import re
+import sys
+
+from PyQt6 import QtWidgets
+
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+CACHE_DIR = os.path.join(BASE_DIR, '.ui_cache')
+# версия генерации модулей (входит в хэш: при изменении build старый кэш не используется)
+FORMAT = b'2'
+
+
+def _index_path(ui_path):
+    return os.path.join(CACHE_DIR, os.path.splitext(os.path.basename(ui_path))[0] + '.json')
+
+
+# (модуль формы, класс корневого виджета) по индексу кэша; None - .ui изменился или кэша нет
+def _lookup(ui_path, stat):
+    try:
+        with open(_index_path(ui_path), encoding='utf-8') as file:
+            entry = json.load(file)
+        module_path = os.path.join(CACHE_DIR, entry['module'])
+        if (entry['mtime_ns'], entry['size']) != (stat.st_mtime_ns, stat.st_size):
+            return None
+    except (OSError, ValueError, KeyError):
+        return None
+    return (module_path, entry['base']) if os.path.exists(module_path) else None
+
+
+# пути QPixmap("...") в сгенерированном коде - от папки .ui (ресурсы ":/..." и абсолютные пути не меняются)
+def _resolve_images(code, ui_path):
+    ui_dir = os.path.relpath(os.path.dirname(ui_path), CACHE_DIR)
+    header = ('import os\n\n'
+              f'UI_DIR = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), {ui_dir!r}))\n')
+    code = re.sub(r'QtGui\.QPixmap\("([^":][^"]*)"\)', r'QtGui.QPixmap(os.path.join(UI_DIR, "\1"))', code)
+    return code.replace('from PyQt6 import', header + 'from PyQt6 import', 1)
+
+
+# генерация модуля формы (старые версии для того же .ui удаляются);
+# возвращает (путь модуля, класс корневого виджета)
+def build(ui_path):
+    stat = os.stat(ui_path)
+    cached = _lookup(ui_path, stat)
+    if cached is not None:
+        return cached
+    with open(ui_path, 'rb') as file:
+        data = file.read()
+    name = os.path.splitext(os.path.basename(ui_path))[0]
+    module_path = os.path.join(CACHE_DIR, f'{name}_{hashlib.sha1(FORMAT + data).hexdigest()[:16]}.py')
+    base_name = re.search(rb'<widget class="(\w+)"', data).group(1).decode()
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    if not os.path.exists(module_path):
+        from PyQt6.uic import compileUi
+        code = io.StringIO()
+        compileUi(io.StringIO(data.decode('utf-8')), code)
+        for old in os.listdir(CACHE_DIR):
+            if old.startswith(name + '_') and old.endswith('.py'):
+                os.remove(os.path.join(CACHE_DIR, old))
+        _write(module_path, _resolve_images(code.getvalue(), ui_path))
+    entry = {'mtime_ns': stat.st_mtime_ns, 'size': stat.st_size,
+             'module': os.path.basename(module_path), 'base': base_name}
+    _write(_index_path(ui_path), json.dumps(entry))
+    return module_path, base_name
+
+
+# запись через временный файл (параллельно запущенное окно не прочитает недописанный файл)
+def _write(path, text):
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as file:
+        file.write(text)
+    os.replace(tmp_path, path)
+
+
+# аналог uic.loadUiType: возвращает (класс формы, базовый класс окна); ui_path - от папки программы
+def load_ui_type(ui_path):
+    module_path, base_name = build(os.path.join(BASE_DIR, ui_path))
+    spec = importlib.util.spec_from_file_location(os.path.basename(module_path)[:-3], module_path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    form_class = next(getattr(module, name) for name in dir(module) if name.startswith('Ui_'))
+    return form_class, getattr(QtWidgets, base_name)
+
+
+if __name__ == "__main__":
+    for name in sorted(os.listdir(BASE_DIR)):
+        if name.endswith('.ui'):
+            print(build(os.path.join(BASE_DIR, name))[0])
+    sys.exit(0)
@@ -0,0 +1,139 @@
+# реактор окна модели одним виджетом: корпус, уровень жидкости, мешалка и змеевик нагрева/охлаждения
+# рисуются в paintEvent вместо изменения геометрии и видимости отдельных меток (label, label_5,
+# label_6, label_7, label_46); изменения копятся в области перерисовки и применяются не чаще
+# MAX_FPS раз в секунду, перерисовывается только изменившаяся часть
+# анимация мешалки зависит от реального времени, а не от числа кадров или шагов модели
+import os
+import time
+
+from PyQt6.QtCore import Qt, QRect, QTimer
+from PyQt6.QtGui import QPainter, QPixmap, QRegion
+from PyQt6.QtWidgets import QWidget
+
+from reactor_model import TICK
+
+
+MAX_FPS = 30
+# предел шага анимации за один кадр (как прежний предел 5 тактов на кадр)
+MAX_FRAME_TIME = 5 * TICK
+
+# расположение слоёв в координатах виджета (прежние метки относительно метки корпуса в model.ui)
+LEVEL_X, LEVEL_WIDTH = 107, 138
+LEVEL_TOP = 303                  # верхний край жидкости при пустом реакторе
+LEVEL_MIN, LEVEL_RANGE = 3, 269  # высота при пустом реакторе и прирост при полном
+MOTOR_CENTER, MOTOR_TOP = 176, 217
+MOTOR_WIDTH, MOTOR_HEIGHT = 90, 61
+COIL_RECT = (122, 280, 102, 88)
+# изображения - из папки программы, как и в формах .ui (ui_cache), а не из текущего каталога
+IMAGES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'images')
+
+
+class ReactorVessel(QWidget):
+    def __init__(self, parent=None, images=IMAGES_DIR):
+        super().__init__(parent)
+        self.sources = {name: QPixmap(os.path.join(images, file)) for name, file in (
+            ('vessel', 'model3.png'), ('level', 'liquid_level.png'), ('motor', 'motor1.1.png'),
+            (-1, 'coil_cooling.png'), (1, 'coil_heating.png'))}
+        self.scaled = {}
+        self.fill = 0.0      # заполненность, доля
+        self.thermal = 0     # 1 - нагрев, -1 - охлаждение, 0 - змеевик не показан
+        self.mixing = False
+        self.mixing_speed = 0
+        self.phase = 0.0     # положение мешалки: пройденный путь изменения ширины, пиксели
+        self.dirty = QRegion()
+        self.last_frame = None
+        self.timer = QTimer(self)
+        self.timer.setInterval(1000 // MAX_FPS)
+        self.timer.timeout.connect(self._frame)
+
+    # ---- состояние (вызывается каждый кадр окна; перерисовка - только при изменениях) ----
+
+    def set_fill(self, fill):
+        fill = min(max(fill, 0.0), 1.0)
+        old, new = self._level_rect(self.fill), self._level_rect(fill)
+        self.fill = fill
+        if old != new:
+            self._invalidate(old.united(new))
+
+    def set_thermal(self, thermal):
+        if thermal != self.thermal:
+            self.thermal = thermal
+            self._invalidate(QRect(*COIL_RECT))
+
+    # speed - скорость мотора (params['v']['mixing'])
+    def set_mixing(self, mixing, speed):
+        self.mixing_speed = speed
+        if mixing == self.mixing:
+            return
+        self.mixing = mixing
+        if not mixing:
+            self.phase = 0.0
+        self.last_frame = None
+        self._invalidate(self._motor_rect())
+
+    # ---- отрисовка ----
+
+    # ширина мешалки: пилообразное «вращение» от MOTOR_WIDTH до 1 и обратно
+    def motor_width(self):
+        span = MOTOR_WIDTH - 1
+        position = self.phase % (2 * span)
+        return MOTOR_WIDTH - (position if position <= span else 2 * span - position)
+
+    def _motor_rect(self):
+        width = int(self.motor_width())
+        return QRect(MOTOR_CENTER - width // 2, MOTOR_TOP, width, MOTOR_HEIGHT)
+
+    @staticmethod
+    def _level_rect(fill):
+        return QRect(LEVEL_X, int(LEVEL_TOP - LEVEL_RANGE * fill), LEVEL_WIDTH, int(LEVEL_MIN + LEVEL_RANGE * fill))
+
+    def _invalidate(self, rect):
+        self.dirty = self.dirty.united(rect)
+        if not self.timer.isActive():
+            self.timer.start()
+
+    # кадр анимации: мешалка сдвигается на реальное время с прошлого кадра, затем перерисовка
+    # накопленной области; без изменений и без перемешивания таймер останавливается
+    def _frame(self):
+        if self.mixing:
+            now = time.perf_counter()
+            if self.last_frame is not None:
+                frame_time = min(now - self.last_frame, MAX_FRAME_TIME)
+                old = self._motor_rect()
+                # прежняя скорость: 2 * mixing / 20 пикселей ширины за такт TICK
+                self.phase += self.mixing_speed / 10 / TICK * frame_time
+                new = self._motor_rect()
+                if new != old:
+                    self.dirty = self.dirty.united(old.united(new))
+            self.last_frame = now
+        if not self.dirty.isEmpty():
+            self.update(self.dirty)
+            self.dirty = QRegion()
+        elif not self.mixing:
+            self.timer.stop()
+
+    def resizeEvent(self, event):
+        # масштабирование - один раз при изменении размера (как scaledContents у меток)
+        smooth = Qt.TransformationMode.SmoothTransformation
+        ignore = Qt.AspectRatioMode.IgnoreAspectRatio
+        self.scaled['vessel'] = self.sources['vessel'].scaled(self.size(), ignore, smooth)
+        for thermal in (-1, 1):
+            self.scaled[thermal] = self.sources[thermal].scaled(COIL_RECT[2], COIL_RECT[3], ignore, smooth)
+        super().resizeEvent(event)
+
+    def paintEvent(self, event):
+        # порядок слоёв как в model.ui: жидкость под корпусом (внутри корпуса он прозрачный),
+        # затем мешалка и змеевик
+        area = event.rect()
+        painter = QPainter(self)
+        level = self._level_rect(self.fill)
+        if area.intersects(level):
+            painter.drawPixmap(level, self.sources['level'])
+        painter.drawPixmap(0, 0, self.scaled['vessel'])
+        motor = self._motor_rect()
+        if area.intersects(motor):
+            painter.drawPixmap(motor, self.sources['motor'])
+        coil = QRect(*COIL_RECT)
+        if self.thermal and area.intersects(coil):
+            painter.drawPixmap(coil.topLeft(), self.scaled[self.thermal])
+        painter.end()
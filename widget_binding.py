@@ -0,0 +1,51 @@
+# обновление виджетов окна только при изменении: значения за кадр собираются в set_*
+# и применяются одним проходом в flush(), вызов Qt выполняется, только если значение
+# отличается от последнего показанного (setText, setVisible, setGeometry и т.п. не бесплатны:
+# каждый вызов может запросить перекомпоновку и перерисовку)
+# виджеты, которые меняет пользователь (чекбоксы, слайдеры), через WidgetBinder не обновляются:
+# сохранённое значение разойдётся с фактическим
+
+
+class WidgetBinder:
+    def __init__(self):
+        # (id виджета, метод) -> значение, которое будет на экране после flush
+        self.shown = {}
+        # (id виджета, метод) -> (виджет, значение): изменения текущего кадра
+        self.pending = {}
+        self.pushed = 0  # сколько вызовов Qt выполнено
+
+    # сравнение выполняется сразу, в pending попадают только изменения
+    def _set(self, widget, method, value):
+        key = (id(widget), method)
+        if self.shown.get(key, self) != value:
+            self.shown[key] = value
+            self.pending[key] = (widget, value)
+
+    def set_text(self, widget, text):
+        self._set(widget, 'setText', text)
+
+    def set_visible(self, widget, visible):
+        self._set(widget, 'setVisible', bool(visible))
+
+    def set_geometry(self, widget, x, y, width, height):
+        self._set(widget, 'setGeometry', (int(x), int(y), int(width), int(height)))
+
+    def set_value(self, widget, value):
+        self._set(widget, 'setValue', value)
+
+    # применение изменений кадра
+    def flush(self):
+        if not self.pending:
+            return
+        for (_, method), (widget, value) in self.pending.items():
+            if method == 'setGeometry':
+                widget.setGeometry(*value)
+            else:
+                getattr(widget, method)(value)
+        self.pushed += len(self.pending)
+        self.pending.clear()
+
+    # забыть показанные значения (например, виджеты изменены в обход binder или окно создано заново)
+    def invalidate(self):
+        self.shown.clear()
+        self.pending.clear()